@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Load test for /predict/promotion.
+Sends single-product requests to the API in process at a fixed arrival rate
+and reports requests/sec and latency percentiles for the previous handler
+(prediction run on the event loop), the batcher with batching disabled, and
+the micro-batching coalescer. Latency is measured from each request's
+scheduled send time, so time spent waiting behind a blocked event loop is
+included.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import numpy as np
+import httpx
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import src.prediction_api as api
+from src.prediction_model import TradeAIPredictionModel
+from benchmarks.bench_bulk_prediction import training_data, request_products
+
+
+@api.app.post("/benchmark/legacy-promotion")
+async def legacy_predict_promotion_impact(request: api.PromotionRequest):
+    """Previous handler: the prediction blocks the event loop"""
+    result = api.prediction_model.predict_promotion_impact(request.product.dict(), request.promotion.dict())
+    result['timestamp'] = api.datetime.now().isoformat()
+    return result
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Load test /predict/promotion')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per configuration')
+    parser.add_argument('--rate', type=float, default=100, help='Requests sent per second')
+    parser.add_argument('--window-ms', type=float, default=2.0, help='Batching window (ms)')
+    parser.add_argument('--max-batch-size', type=int, default=64, help='Largest batch')
+    parser.add_argument('--model-type', type=str, default='ensemble', help='Model type to train')
+    return parser.parse_args()
+
+
+async def run_load(path, payloads, rate):
+    """Send the payloads at a fixed rate, returning latencies and elapsed seconds"""
+    transport = httpx.ASGITransport(app=api.app)
+    latencies = np.empty(len(payloads))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        start = time.perf_counter()
+
+        async def send(i, payload):
+            scheduled = start + i / rate
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            response = await client.post(path, json=payload)
+            latencies[i] = time.perf_counter() - scheduled
+            response.raise_for_status()
+
+        await asyncio.gather(*[send(i, payload) for i, payload in enumerate(payloads)])
+        elapsed = time.perf_counter() - start
+
+    return latencies, elapsed
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+    rng = np.random.RandomState(42)
+
+    X, y = training_data(5000, rng)
+    api.prediction_model = TradeAIPredictionModel(model_type=args.model_type)
+    api.prediction_model.train(X, y)
+
+    promotion = {'promo_type': 'BOGO', 'discount_percentage': 20.0, 'region': 'South',
+                 'channel': 'Retail', 'promo_cost': 2000.0}
+    payloads = [{'product': product, 'promotion': promotion}
+                for product in request_products(args.requests, rng)]
+
+    print(f"{args.requests:,} requests sent at {args.rate:g} req/s")
+    configurations = [
+        ('previous handler', '/benchmark/legacy-promotion', None),
+        ('batching off', '/predict/promotion', api.PredictionBatcher(window=0, max_batch_size=1)),
+        (f"batching {args.window_ms:g}ms/{args.max_batch_size}", '/predict/promotion',
+         api.PredictionBatcher(window=args.window_ms / 1000, max_batch_size=args.max_batch_size))
+    ]
+    for label, path, batcher in configurations:
+        if batcher is not None:
+            api.prediction_batcher = batcher
+        latencies, elapsed = asyncio.run(run_load(path, payloads, args.rate))
+        batches = f"  mean batch {batcher.stats()['mean_batch_size']:.1f}" if batcher else ""
+        print(f"{label:<20} {len(latencies) / elapsed:8.1f} req/s  "
+              f"p50 {np.percentile(latencies, 50) * 1000:7.1f}ms  "
+              f"p99 {np.percentile(latencies, 99) * 1000:7.1f}ms{batches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark for prediction API cold start.
+Saves a model artifact to a temporary model directory, then starts the API
+in fresh processes, with and without PREDICTION_SERVE_ONLY, and reports the
+time from process launch until /health reports the model loaded, split into
+interpreter start, imports and startup, plus the first prediction and
+whether sklearn and pandas were imported. With --importtime, the imports of
+a serve-only start are profiled with `python -X importtime`.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PAYLOAD = {
+    'product': {'product_name': 'Product 1', 'base_price': 25.0, 'avg_monthly_sales': 4000.0,
+                'sales_volatility': 500.0, 'product_category': 'Beverage'},
+    'promotion': {'promo_type': 'Discount', 'discount_percentage': 15.0, 'promo_cost': 1000.0}
+}
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark prediction API cold start')
+    parser.add_argument('--samples', type=int, default=20000, help='Training samples')
+    parser.add_argument('--model-type', type=str, default='ensemble', help='Model type to train')
+    parser.add_argument('--runs', type=int, default=3, help='Cold starts per mode')
+    parser.add_argument('--importtime', action='store_true',
+                        help='Profile the imports of a serve-only start with -X importtime')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def child():
+    """Start the API in this process and report timings as JSON"""
+    import asyncio
+
+    launched = float(os.environ['BENCH_LAUNCHED'])
+    interpreter_ready = time.time()
+    start = time.perf_counter()
+    import httpx
+    import src.prediction_api as api
+    imported = time.perf_counter()
+
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await api.startup_event()
+            health = (await client.get('/health')).json()
+            ready = time.perf_counter()
+            response = await client.post('/predict/promotion', json=PAYLOAD)
+            predicted = time.perf_counter()
+            await api.shutdown_event()
+        return health, ready, response, predicted
+
+    health, ready, response, predicted = asyncio.run(run())
+    print(json.dumps({
+        'interpreter': interpreter_ready - launched,
+        'imports': imported - start,
+        'startup': ready - imported,
+        'health_ready': interpreter_ready - launched + ready - start,
+        'model_loaded': health['model_loaded'],
+        'first_prediction': predicted - ready,
+        'prediction_status': response.status_code,
+        'sklearn_imported': 'sklearn' in sys.modules,
+        'pandas_imported': 'pandas' in sys.modules
+    }))
+
+
+def cold_start(env):
+    """Start the API in a fresh process and return its timings"""
+    env = dict(env, BENCH_LAUNCHED=repr(time.time()))
+    output = subprocess.run([sys.executable, '-W', 'ignore', os.path.abspath(__file__), '--child'],
+                            env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def profile_imports(env):
+    """Import the API serve-only under -X importtime and print the slowest imports"""
+    result = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-X', 'importtime', '-c', 'import src.prediction_api'],
+        env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, check=True
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            imports.append((int(parts[1]), parts[2].rstrip()))
+    print("\nSlowest imports of a serve-only start (cumulative):")
+    for cumulative, name in sorted(imports, reverse=True)[:15]:
+        print(f"  {cumulative / 1000:8.1f} ms {name}")
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+    if args.child:
+        child()
+        return
+
+    from src.prediction_model import TradeAIPredictionModel
+    from benchmarks.bench_bulk_prediction import training_data
+
+    rng = np.random.RandomState(42)
+    model_dir = tempfile.mkdtemp(prefix="trade_ai_startup_")
+
+    try:
+        X, y = training_data(args.samples, rng)
+        model = TradeAIPredictionModel(model_type=args.model_type)
+        model.train(X, y)
+        model.save_model(os.path.join(model_dir, f"{args.model_type}_model_bench.model"))
+
+        base_env = dict(os.environ, MODEL_DIR=model_dir, DATA_DIR=model_dir, MODEL_POLL_SECONDS='0')
+        for label, serve_only in [('default', 'false'), ('serve-only', 'true')]:
+            env = dict(base_env, PREDICTION_SERVE_ONLY=serve_only)
+            runs = [cold_start(env) for _ in range(args.runs)]
+            best = min(runs, key=lambda run: run['health_ready'])
+            print(f"{label:<11} health-ready {best['health_ready']:.3f}s "
+                  f"(interpreter {best['interpreter']:.3f}s, imports {best['imports']:.3f}s, "
+                  f"startup {best['startup']:.3f}s)  first prediction "
+                  f"{best['first_prediction'] * 1000:.1f} ms [{best['prediction_status']}]  "
+                  f"sklearn imported: {best['sklearn_imported']}, "
+                  f"pandas imported: {best['pandas_imported']}")
+
+        if args.importtime:
+            profile_imports(dict(base_env, PREDICTION_SERVE_ONLY='true'))
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
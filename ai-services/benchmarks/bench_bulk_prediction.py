@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark for bulk promotion impact prediction.
+Compares TradeAIPredictionModel.predict_promotion_impact_batch with the
+previous per-product loop of single-row pipeline calls used by /predict/bulk.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.prediction_model import TradeAIPredictionModel
+
+CATEGORIES = ['Beverage', 'Snack', 'Condiment']
+PROMO_TYPES = ['Discount', 'BOGO', 'Bundle']
+REGIONS = ['North', 'South', 'East', 'West']
+CHANNELS = ['Retail', 'Wholesale', 'Online']
+
+
+def training_data(n_samples, rng):
+    """Synthetic training set with the model's input columns"""
+    df = pd.DataFrame({
+        'base_price': rng.uniform(10, 100, n_samples),
+        'discount_percentage': rng.uniform(0, 30, n_samples),
+        'avg_monthly_sales': rng.uniform(1000, 10000, n_samples),
+        'sales_volatility': rng.uniform(100, 2000, n_samples),
+        'seasonality_index': rng.uniform(0.7, 1.3, n_samples),
+        'competitor_intensity': rng.uniform(0, 1, n_samples),
+        'product_category': rng.choice(CATEGORIES, n_samples),
+        'promo_type': rng.choice(PROMO_TYPES, n_samples),
+        'region': rng.choice(REGIONS, n_samples),
+        'channel': rng.choice(CHANNELS, n_samples)
+    })
+    target = (df['avg_monthly_sales'] + df['discount_percentage'] * 50 - df['base_price'] * 10 +
+              rng.normal(0, 500, n_samples))
+    return df, target
+
+
+def request_products(n_products, rng):
+    """Product dicts as sent to /predict/bulk"""
+    return [{
+        'product_name': f"Product {i}",
+        'base_price': float(rng.uniform(10, 100)),
+        'avg_monthly_sales': float(rng.uniform(0, 10000)),
+        'sales_volatility': None if i % 7 == 0 else float(rng.uniform(100, 2000)),
+        'seasonality_index': float(rng.uniform(0.7, 1.3)),
+        'competitor_intensity': float(rng.uniform(0, 1)),
+        'product_category': str(rng.choice(CATEGORIES)),
+        'margin_percentage': 0.3
+    } for i in range(n_products)]
+
+
+def legacy_predict_promotion_impact(model, product_data, promotion_details):
+    """Previous implementation: one single-row pipeline call per product"""
+    base_price = product_data.get('base_price', 0)
+    avg_monthly_sales = product_data.get('avg_monthly_sales', 0)
+    X_pred = pd.DataFrame({
+        'base_price': [base_price],
+        'discount_percentage': [promotion_details.get('discount_percentage', 0)],
+        'avg_monthly_sales': [avg_monthly_sales],
+        'sales_volatility': [product_data.get('sales_volatility', avg_monthly_sales * 0.2)],
+        'seasonality_index': [product_data.get('seasonality_index', 1.0)],
+        'competitor_intensity': [product_data.get('competitor_intensity', 0.5)],
+        'product_category': [product_data.get('product_category', 'Unknown')],
+        'promo_type': [promotion_details.get('promo_type', 'Discount')],
+        'region': [promotion_details.get('region', 'National')],
+        'channel': [promotion_details.get('channel', 'Retail')]
+    })
+    predicted_sales = model.predict(X_pred)[0]
+
+    sales_lift = predicted_sales - avg_monthly_sales
+    sales_lift_percentage = (sales_lift / avg_monthly_sales) * 100 if avg_monthly_sales > 0 else 0
+    promo_cost = promotion_details.get('promo_cost', 0)
+    incremental_margin = sales_lift * base_price * product_data.get('margin_percentage', 0.3)
+    roi = (incremental_margin / promo_cost) * 100 if promo_cost > 0 else 0
+
+    return {
+        'product': product_data.get('product_name', 'Unknown'),
+        'baseline_sales': avg_monthly_sales,
+        'predicted_sales': predicted_sales,
+        'sales_lift': sales_lift,
+        'sales_lift_percentage': sales_lift_percentage,
+        'promo_cost': promo_cost,
+        'incremental_margin': incremental_margin,
+        'roi': roi,
+        'confidence': model._calculate_confidence(X_pred)
+    }
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark bulk promotion prediction')
+    parser.add_argument('--products', type=int, default=5000, help='Products per bulk request')
+    parser.add_argument('--samples', type=int, default=5000, help='Training samples')
+    parser.add_argument('--model-type', type=str, default='ensemble', help='Model type to train')
+    return parser.parse_args()
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+    rng = np.random.RandomState(42)
+
+    X, y = training_data(args.samples, rng)
+    model = TradeAIPredictionModel(model_type=args.model_type)
+    model.train(X, y)
+
+    products = request_products(args.products, rng)
+    promotion = {'promo_type': 'BOGO', 'discount_percentage': 20.0, 'region': 'South',
+                 'channel': 'Retail', 'promo_cost': 2000.0}
+
+    start = time.perf_counter()
+    expected = [legacy_predict_promotion_impact(model, product, promotion) for product in products]
+    loop_time = time.perf_counter() - start
+    print(f"Per-product loop ({args.products:,} products): {loop_time:.3f}s")
+
+    start = time.perf_counter()
+    results = model.predict_promotion_impact_batch(products, promotion)
+    batch_time = time.perf_counter() - start
+    print(f"Batch call: {batch_time:.3f}s  (speedup {loop_time / batch_time:.0f}x)")
+
+    expected = pd.DataFrame(expected).astype({'sales_lift_percentage': float})
+    pd.testing.assert_frame_equal(pd.DataFrame(results), expected, check_exact=True)
+    print("Outputs match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark for dictionary-encoded categorical columns.
+Compares memory and groupby/encoding time of the feature frame with
+product_name, product_category and promo_type held as categoricals and as
+Python string objects.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OneHotEncoder
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.data_processor import TradeAIDataProcessor
+from utils.categorical import CATEGORICAL_COLUMNS, CategoryCodes
+from benchmarks.synthetic_data import generate_dataset
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark categorical encoding')
+    parser.add_argument('--products', type=int, default=1000, help='Number of products')
+    parser.add_argument('--days', type=int, default=730, help='Days of sales history')
+    return parser.parse_args()
+
+
+def timed(function, *args):
+    """Run a function, returning its result and the elapsed seconds"""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+
+    sales_df, promo_df, product_catalog = generate_dataset(
+        n_products=args.products, n_days=args.days
+    )
+    processor = TradeAIDataProcessor()
+    processor.sales_df = sales_df
+    processor.promo_df = promo_df
+    processor.product_catalog = product_catalog
+
+    encoded = processor.prepare_features_for_model()
+    strings = encoded.astype({col: object for col in CATEGORICAL_COLUMNS})
+    print(f"Feature rows: {len(encoded):,}")
+
+    columns = list(CATEGORICAL_COLUMNS)
+    results = {}
+    for label, df in [('strings', strings), ('categoricals', encoded)]:
+        memory = df.memory_usage(deep=True).sum()
+        aggregated, aggregate_time = timed(processor.aggregate_by_product, df)
+        _, groupby_time = timed(
+            lambda: df.groupby(['date', 'product_category'], observed=True)['is_promo'].transform('mean')
+        )
+        if label == 'strings':
+            encoder = OneHotEncoder(handle_unknown='ignore')
+            onehot, encode_time = timed(encoder.fit_transform, df[columns])
+        else:
+            codes = CategoryCodes()
+            encoder = OneHotEncoder(handle_unknown='ignore')
+            onehot, encode_time = timed(lambda: encoder.fit_transform(codes.fit_transform(df[columns])))
+        results[label] = (aggregated, onehot)
+
+        print(f"{label:<13} memory {memory / 1e6:8.1f} MB  "
+              f"aggregate_by_product {aggregate_time:.3f}s  "
+              f"date/category groupby {groupby_time:.3f}s  "
+              f"one-hot {encode_time:.3f}s")
+
+    (strings_agg, strings_onehot), (encoded_agg, encoded_onehot) = results['strings'], results['categoricals']
+    pd.testing.assert_frame_equal(strings_agg, encoded_agg.astype(strings_agg.dtypes.to_dict()))
+    assert (strings_onehot != encoded_onehot).nnz == 0
+    print("Outputs match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark for compiled tree-ensemble inference.
+Compares the fitted forest's predict with CompiledForest on the same
+preprocessed input at several batch sizes, checking the predictions are
+bit-identical.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.prediction_model import TradeAIPredictionModel
+from utils.compiled_forest import CompiledForest, BACKENDS
+from benchmarks.bench_bulk_prediction import training_data
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark compiled forest inference')
+    parser.add_argument('--samples', type=int, default=5000, help='Training samples')
+    parser.add_argument('--model-type', type=str, default='ensemble', help='Model type to train')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 100, 10000],
+                        help='Batch sizes to time')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed calls per batch size')
+    return parser.parse_args()
+
+
+def median_time(function, X, repeats):
+    """Median seconds of repeated calls, and the last result"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(X)
+        times.append(time.perf_counter() - start)
+    return np.median(times), result
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+    rng = np.random.RandomState(42)
+
+    X, y = training_data(args.samples, rng)
+    model = TradeAIPredictionModel(model_type=args.model_type)
+    model.train(X, y)
+    forest = model.model.named_steps['model']
+
+    backends = ['auto', 'numpy']
+    try:
+        CompiledForest(forest, backend='numba')
+        backends.append('numba')
+    except ImportError:
+        print("Numba not installed; skipping the numba backend")
+
+    start = time.perf_counter()
+    compiled = {backend: CompiledForest(forest, backend=backend) for backend in backends}
+    print(f"Compile: {(time.perf_counter() - start) / len(backends) * 1000:.1f}ms "
+          f"({len(forest.estimators_)} trees, {len(compiled['numpy'].value):,} nodes)")
+
+    batch, _ = training_data(max(args.batch_sizes), rng)
+    X_model = model.model.named_steps['preprocessor'].transform(batch)
+
+    for size in args.batch_sizes:
+        rows = X_model[:size]
+        sklearn_time, expected = median_time(forest.predict, rows, args.repeats)
+        line = f"batch {size:>6}: sklearn {sklearn_time * 1000:8.2f}ms"
+        for backend in backends:
+            elapsed, result = median_time(compiled[backend].predict, rows, args.repeats)
+            assert np.array_equal(result, expected), f"{backend} predictions differ"
+            line += f"  {backend} {elapsed * 1000:8.2f}ms ({sklearn_time / elapsed:.1f}x)"
+        print(line)
+    print("Predictions bit-identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the compiled preprocessor.
+Times the encoding of /predict/promotion payloads with the fitted
+ColumnTransformer and with CompiledPreprocessor, checking the outputs are
+equal, then times predict_promotion_impact_batch as called by the
+prediction batcher (single requests and full batches) with and without it.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.prediction_model import TradeAIPredictionModel
+from benchmarks.bench_bulk_prediction import training_data, request_products
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark compiled preprocessing')
+    parser.add_argument('--samples', type=int, default=5000, help='Training samples')
+    parser.add_argument('--model-type', type=str, default='ensemble', help='Model type to train')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64],
+                        help='Requests per batch')
+    parser.add_argument('--repeats', type=int, default=200, help='Timed calls per batch size')
+    return parser.parse_args()
+
+
+def median_time(function, repeats):
+    """Median seconds of repeated calls, and the last result"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return np.median(times), result
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+    rng = np.random.RandomState(42)
+
+    X, y = training_data(args.samples, rng)
+    model = TradeAIPredictionModel(model_type=args.model_type)
+    model.train(X, y)
+    model.compile_inference()
+    compiled = model.compiled_preprocessor
+    preprocessor = model.model.named_steps['preprocessor']
+
+    promotion = {'promo_type': 'BOGO', 'discount_percentage': 20.0, 'region': 'South',
+                 'channel': 'Retail', 'promo_cost': 2000.0}
+    products = request_products(max(args.batch_sizes), rng)
+    products[0]['product_category'] = 'Unseen'
+
+    print(f"{args.model_type} model, {compiled.n_features_out} encoded features")
+    for size in args.batch_sizes:
+        batch = products[:size]
+        columns = model._promotion_columns(batch, [promotion] * size)
+
+        sklearn_time, expected = median_time(
+            lambda: preprocessor.transform(model._promotion_features(columns)), args.repeats
+        )
+        compiled_time, encoded = median_time(lambda: compiled.transform(columns), args.repeats)
+        expected = expected.toarray() if hasattr(expected, 'toarray') else expected
+        assert np.array_equal(encoded, expected.astype(encoded.dtype), equal_nan=True), "Encodings differ"
+
+        model.compiled_preprocessor = None
+        frame_time, reference = median_time(
+            lambda: model.predict_promotion_impact_batch(batch, promotion), args.repeats
+        )
+        model.compiled_preprocessor = compiled
+        direct_time, results = median_time(
+            lambda: model.predict_promotion_impact_batch(batch, promotion), args.repeats
+        )
+        assert results == reference, "Predictions differ"
+
+        print(f"batch {size:>4}: encode ColumnTransformer {sklearn_time * 1000:7.3f}ms  "
+              f"compiled {compiled_time * 1000:7.3f}ms ({sklearn_time / compiled_time:.0f}x)  |  "
+              f"predict_promotion_impact_batch {frame_time * 1000:7.3f}ms -> "
+              f"{direct_time * 1000:7.3f}ms ({frame_time / direct_time:.1f}x)")
+    print("Encodings and predictions match")
+
+
+if __name__ == "__main__":
+    main()
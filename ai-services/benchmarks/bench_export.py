@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark for TradeAIDataProcessor.export_processed_data.
+Compares the previous CSV export (features rebuilt, per-row profile loop,
+indented JSON) with the Parquet export reusing computed features.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.data_processor import TradeAIDataProcessor
+from benchmarks.synthetic_data import generate_dataset
+
+
+def legacy_export(processor, output_path):
+    """Previous implementation"""
+    os.makedirs(output_path, exist_ok=True)
+    df = processor.prepare_features_for_model()
+    df.to_csv(os.path.join(output_path, 'processed_data.csv'), index=False)
+
+    agg_df = processor.aggregate_by_product(df)
+    agg_df.to_csv(os.path.join(output_path, 'product_aggregated.csv'), index=False)
+
+    product_profiles = {}
+    for _, row in agg_df.iterrows():
+        product_profiles[row['product_name']] = row.to_dict()
+    with open(os.path.join(output_path, 'product_profiles.json'), 'w') as f:
+        json.dump(product_profiles, f, indent=2, default=float)
+
+
+def directory_size(path):
+    """Total size of the files under a directory, in bytes"""
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark processed data export')
+    parser.add_argument('--products', type=int, default=1000, help='Number of products')
+    parser.add_argument('--days', type=int, default=365, help='Days of sales history')
+    return parser.parse_args()
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+
+    sales_df, promo_df, product_catalog = generate_dataset(
+        n_products=args.products, n_days=args.days
+    )
+    processor = TradeAIDataProcessor()
+    processor.sales_df = sales_df
+    processor.promo_df = promo_df
+    processor.product_catalog = product_catalog
+    print(f"Sales rows: {len(sales_df):,}")
+
+    output_root = tempfile.mkdtemp()
+    try:
+        legacy_path = os.path.join(output_root, 'legacy')
+        start = time.perf_counter()
+        legacy_export(processor, legacy_path)
+        legacy_time = time.perf_counter() - start
+        legacy_size = directory_size(legacy_path)
+        print(f"{'CSV export (previous)':<32} {legacy_time:7.2f}s  {legacy_size / 1e6:8.1f} MB")
+
+        # Features are built once and reused by every export below
+        start = time.perf_counter()
+        processor.feature_index().frame()
+        print(f"{'Feature build (once)':<32} {time.perf_counter() - start:7.2f}s")
+
+        for label, options in [('CSV export', {}),
+                               ('Parquet export', {'format': 'parquet'}),
+                               ('Parquet export, zstd', {'format': 'parquet', 'compression': 'zstd'})]:
+            path = os.path.join(output_root, label.replace(' ', '_').replace(',', ''))
+            start = time.perf_counter()
+            processor.export_processed_data(path, **options)
+            elapsed = time.perf_counter() - start
+            size = directory_size(path)
+            print(f"{label:<32} {elapsed:7.2f}s  {size / 1e6:8.1f} MB  "
+                  f"({legacy_time / elapsed:.1f}x faster, {legacy_size / size:.1f}x smaller)")
+    finally:
+        shutil.rmtree(output_root)
+
+
+if __name__ == "__main__":
+    main()
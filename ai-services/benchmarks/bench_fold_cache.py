@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the preprocessing cache of hyperparameter search.
+Runs the same grid search over small forests with GridSearchCV on the whole
+pipeline, which refits and re-applies the preprocessor on every fit, and
+with HyperparameterSearch, which preprocesses each fold once into dense
+float32 matrices, and reports wall-clock time, preprocessor fits and the
+best CV score at growing row counts.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from sklearn.model_selection import GridSearchCV, KFold
+from sklearn.pipeline import Pipeline
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.prediction_model import TradeAIPredictionModel
+from utils.model_search import HyperparameterSearch, SCORING
+from benchmarks.bench_bulk_prediction import training_data
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark the fold preprocessing cache')
+    parser.add_argument('--samples', type=int, nargs='+', default=[10000, 100000], help='Training samples')
+    parser.add_argument('--trees', type=int, default=10, help='Trees per candidate forest')
+    return parser.parse_args()
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+    param_grid = {
+        'model__n_estimators': [args.trees],
+        'model__max_depth': [5, 10, 15],
+        'model__min_samples_leaf': [1, 4]
+    }
+    n_candidates = int(np.prod([len(values) for values in param_grid.values()]))
+
+    for n_samples in args.samples:
+        X, y = training_data(n_samples, np.random.RandomState(42))
+        model = TradeAIPredictionModel(model_type='random_forest')
+        pipeline = Pipeline(steps=[
+            ('preprocessor', model._create_preprocessor()),
+            ('model', model._create_model())
+        ])
+
+        start = time.perf_counter()
+        folds = KFold(n_splits=5, shuffle=True, random_state=42)
+        baseline = GridSearchCV(pipeline, param_grid, cv=folds, scoring=SCORING,
+                                refit=False).fit(X, y)
+        baseline_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        search = HyperparameterSearch(pipeline, param_grid, strategy='grid', cv=5, random_state=42)
+        search.fit(X, y)
+        # Exclude the final refit on all data, which GridSearchCV skipped
+        search_time = time.perf_counter() - start
+        start = time.perf_counter()
+        pipeline.set_params(**search.best_params_).fit(X, y)
+        search_time -= time.perf_counter() - start
+
+        print(f"{n_samples:>8,} samples  pipeline GridSearchCV {baseline_time:7.2f}s "
+              f"({n_candidates * 5} preprocessor fits, CV RMSE {np.sqrt(-baseline.best_score_):.2f})  "
+              f"fold cache {search_time:7.2f}s ({search.preprocessor_fits_} preprocessor fits, "
+              f"CV RMSE {np.sqrt(-search.best_score_):.2f})  {baseline_time / search_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark for hyperparameter search.
+Searches the random forest's parameter grid with the previous exhaustive
+GridSearchCV over the whole pipeline and with each HyperparameterSearch
+strategy, and reports wall-clock time, fits, best cross-validated RMSE and
+the holdout R² and RMSE of the refitted model.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.pipeline import Pipeline
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.prediction_model import TradeAIPredictionModel, PARAM_GRID
+from utils.model_search import HyperparameterSearch, SEARCH_STRATEGIES
+from benchmarks.bench_bulk_prediction import training_data
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark hyperparameter search')
+    parser.add_argument('--samples', type=int, default=5000, help='Training samples')
+    parser.add_argument('--model-type', type=str, default='random_forest', help='Model type to search')
+    parser.add_argument('--strategies', type=str, nargs='+', default=['baseline', *SEARCH_STRATEGIES],
+                        help='Strategies to run ("baseline" is the previous GridSearchCV)')
+    return parser.parse_args()
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+    rng = np.random.RandomState(42)
+    X, y = training_data(args.samples, rng)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    n_combinations = int(np.prod([len(values) for values in PARAM_GRID.values()]))
+    print(f"Grid of {n_combinations} combinations, {len(X_train):,} training samples, "
+          f"{os.cpu_count()} CPU(s)")
+
+    for strategy in args.strategies:
+        model = TradeAIPredictionModel(model_type=args.model_type)
+        pipeline = Pipeline(steps=[
+            ('preprocessor', model._create_preprocessor()),
+            ('model', model._create_model())
+        ])
+        start = time.perf_counter()
+        if strategy == 'baseline':
+            search = GridSearchCV(pipeline, PARAM_GRID, cv=5, scoring='neg_mean_squared_error',
+                                  n_jobs=-1).fit(X_train, y_train)
+            n_fits = len(search.cv_results_['params']) * 5
+        else:
+            search = HyperparameterSearch(pipeline, PARAM_GRID, strategy=strategy, cv=5,
+                                          random_state=42).fit(X_train, y_train)
+            n_fits = search.n_fits_
+        elapsed = time.perf_counter() - start
+
+        predicted = search.best_estimator_.predict(X_test)
+        print(f"{strategy:<9} {elapsed:8.1f}s  {n_fits:4d} fits  "
+              f"CV RMSE {np.sqrt(-search.best_score_):7.1f}  "
+              f"holdout RMSE {np.sqrt(mean_squared_error(y_test, predicted)):7.1f}  "
+              f"R² {r2_score(y_test, predicted):.4f}  {search.best_params_}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark for incremental retraining.
+Trains a model on a history of samples, then for each day of new samples
+compares a full refit on the whole history with train_incremental on the
+new day only, reporting training time and test RMSE of both, and whether
+full_refit_reason would have forced a full refit.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from sklearn.metrics import mean_squared_error
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.prediction_model import TradeAIPredictionModel
+from benchmarks.bench_bulk_prediction import training_data
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark incremental retraining')
+    parser.add_argument('--history', type=int, default=30000, help='Samples of the initial history')
+    parser.add_argument('--daily', type=int, default=1000, help='New samples per day')
+    parser.add_argument('--days', type=int, default=3, help='Days of new samples')
+    parser.add_argument('--model-type', type=str, default='random_forest', help='Model type to train')
+    parser.add_argument('--new-trees', type=int, default=None,
+                        help='Trees (or boosting stages) per incremental update '
+                             '(default: in proportion to the share of new samples)')
+    return parser.parse_args()
+
+
+def rmse(model, X, y):
+    """Test RMSE of a model"""
+    return np.sqrt(mean_squared_error(y, model.predict(X)))
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+    rng = np.random.RandomState(42)
+    X, y = training_data(args.history + args.daily * args.days, rng)
+    X_test, y_test = training_data(5000, rng)
+
+    incremental = TradeAIPredictionModel(model_type=args.model_type)
+    start = time.perf_counter()
+    incremental.train(X.iloc[:args.history], y.iloc[:args.history])
+    print(f"Initial fit on {args.history:,} samples: {time.perf_counter() - start:.2f}s  "
+          f"test RMSE {rmse(incremental, X_test, y_test):.1f}")
+
+    for day in range(1, args.days + 1):
+        seen = args.history + args.daily * day
+        X_new, y_new = X.iloc[seen - args.daily:seen], y.iloc[seen - args.daily:seen]
+
+        reason = incremental.full_refit_reason(X_new, y_new, new_trees=args.new_trees)
+        start = time.perf_counter()
+        incremental.train_incremental(X_new, y_new, new_trees=args.new_trees)
+        incremental_time = time.perf_counter() - start
+
+        full = TradeAIPredictionModel(model_type=args.model_type)
+        start = time.perf_counter()
+        full.train(X.iloc[:seen], y.iloc[:seen])
+        full_time = time.perf_counter() - start
+
+        print(f"Day {day} ({seen:,} samples seen): full refit {full_time:6.2f}s "
+              f"RMSE {rmse(full, X_test, y_test):7.1f}  incremental {incremental_time:6.2f}s "
+              f"RMSE {rmse(incremental, X_test, y_test):7.1f}  "
+              f"({full_time / incremental_time:.0f}x faster; full refit needed: {reason or 'no'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark for TradeAIDataProcessor.load_data.
+Compares load time and peak RSS of CSV loading with the typed columnar path,
+including column projection and date-range predicate pushdown.
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import resource
+import subprocess
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.data_processor import TradeAIDataProcessor
+from benchmarks.synthetic_data import generate_dataset, write_dataset
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark data ingestion')
+    parser.add_argument('--data-path', type=str, default='/tmp/trade_ai_bench_ingestion',
+                        help='Directory for the synthetic dataset')
+    parser.add_argument('--products', type=int, default=2000, help='Number of products')
+    parser.add_argument('--days', type=int, default=1095, help='Days of sales history')
+    parser.add_argument('--mode', type=str, default=None,
+                        choices=['csv', 'columnar', 'columnar-projected'],
+                        help='Run a single mode (used internally)')
+    return parser.parse_args()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    # VmHWM is reset on exec, unlike ru_maxrss which keeps the parent's peak
+    if os.path.exists('/proc/self/status'):
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(args):
+    """Load and clean sales data in one mode, reporting time and peak RSS as JSON"""
+    processor = TradeAIDataProcessor(data_path=args.data_path)
+
+    start = time.perf_counter()
+    if args.mode == 'csv':
+        processor.load_data()
+    elif args.mode == 'columnar':
+        processor.load_data(columnar=True)
+    else:
+        processor.load_data(columnar=True, columns=['date', 'product_name', 'quantity_sold'],
+                            start_date='2024-01-01', end_date='2024-12-31')
+    if 'revenue' not in processor.sales_df:
+        processor.sales_df['revenue'] = 0.0
+    df = processor.clean_sales_data()
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        'mode': args.mode,
+        'rows': len(df),
+        'seconds': elapsed,
+        'peak_rss_mb': peak_rss_mb()
+    }))
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+
+    if args.mode:
+        run_mode(args)
+        return
+
+    print("Generating synthetic dataset...")
+    sales_df, promo_df, product_catalog = generate_dataset(
+        n_products=args.products, n_days=args.days
+    )
+    write_dataset(args.data_path, sales_df, promo_df, product_catalog)
+    del sales_df, promo_df
+    print(f"Sales rows: {args.products * args.days:,}")
+
+    # Convert once so the columnar runs measure cached loads
+    TradeAIDataProcessor(data_path=args.data_path).load_data(columnar=True)
+
+    for mode in ['csv', 'columnar', 'columnar-projected']:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--data-path', args.data_path,
+             '--mode', mode],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{result['mode']:>20}: {result['seconds']:.2f}s  "
+              f"peak RSS {result['peak_rss_mb']:.0f} MB  ({result['rows']:,} rows)")
+
+
+if __name__ == "__main__":
+    main()
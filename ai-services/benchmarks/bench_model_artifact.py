@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark for memory-mapped model artifacts.
+Saves one model as a joblib file and as a model artifact, then compares
+cold load time in a fresh process and the memory of N concurrent worker
+processes that each load the model and score a batch. PSS (proportional
+set size) splits shared pages between the processes mapping them, so the
+summed PSS of the workers is their real combined footprint.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing as mp
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.prediction_model import TradeAIPredictionModel
+from benchmarks.bench_bulk_prediction import training_data, request_products
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark memory-mapped model artifacts')
+    parser.add_argument('--samples', type=int, default=20000, help='Training samples')
+    parser.add_argument('--model-type', type=str, default='ensemble', help='Model type to train')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8], help='Worker counts')
+    return parser.parse_args()
+
+
+def evict_from_page_cache(path):
+    """Drop a file's (or a directory's files') clean pages from the page cache"""
+    paths = [path] if os.path.isfile(path) else [
+        os.path.join(root, name) for root, _, names in os.walk(path) for name in names
+    ]
+    for file_path in paths:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def memory_mb():
+    """RSS, PSS and private memory of this process in MB"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    private = values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    return values.get('Rss', 0), values.get('Pss', 0), private
+
+
+def worker(path, products, barrier, results):
+    """Load the model, score a batch, and report memory once all workers have"""
+    start = time.perf_counter()
+    model = TradeAIPredictionModel()
+    model.load_model(path, compiled=True)
+    load_time = time.perf_counter() - start
+    model.predict_promotion_impact_batch(products, {'promo_type': 'BOGO', 'promo_cost': 100.0})
+
+    # Measure while every worker holds its model
+    barrier.wait()
+    results.put((load_time,) + memory_mb())
+    barrier.wait()
+
+
+def run_workers(path, products, n_workers):
+    """Load the model in n concurrent worker processes"""
+    context = mp.get_context('spawn')
+    barrier = context.Barrier(n_workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(path, products, barrier, results))
+                 for _ in range(n_workers)]
+    for process in processes:
+        process.start()
+    measurements = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return np.array(measurements)
+
+
+def directory_size(path):
+    """Bytes of a file or all files below a directory"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+    rng = np.random.RandomState(42)
+    model_dir = tempfile.mkdtemp(prefix="trade_ai_artifacts_")
+
+    try:
+        X, y = training_data(args.samples, rng)
+        model = TradeAIPredictionModel(model_type=args.model_type)
+        model.train(X, y)
+        products = request_products(100, rng)
+
+        paths = {
+            'joblib': os.path.join(model_dir, f"{args.model_type}_model_bench.joblib"),
+            'artifact': os.path.join(model_dir, f"{args.model_type}_model_bench.model")
+        }
+        for path in paths.values():
+            model.save_model(path)
+
+        for label, path in paths.items():
+            print(f"\n{label} ({directory_size(path) / 1e6:.1f} MB on disk)")
+            evict_from_page_cache(path)
+            cold = run_workers(path, products, 1)
+            print(f"  cold load {cold[0, 0]:.3f}s")
+            for n_workers in args.workers:
+                measurements = run_workers(path, products, n_workers)
+                load_time, rss, pss, private = measurements.mean(axis=0)
+                print(f"  {n_workers} worker(s): load {load_time:.3f}s  "
+                      f"RSS {rss:7.1f} MB/worker  private {private:7.1f} MB/worker  "
+                      f"total PSS {measurements[:, 2].sum():7.1f} MB")
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark for hot model reloading.
+Sends /predict/promotion requests to the API in process at a fixed arrival
+rate while a new model is saved to the watched model directory, and reports
+latency percentiles before and while the model registry loads and swaps in
+the new model, failed requests, and the time until the new model serves.
+"""
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import threading
+import numpy as np
+import httpx
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import src.prediction_api as api
+from src.prediction_model import TradeAIPredictionModel
+from benchmarks.bench_bulk_prediction import training_data, request_products
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark hot model reloading')
+    parser.add_argument('--rate', type=float, default=100, help='Requests sent per second')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration of the load')
+    parser.add_argument('--poll-interval', type=float, default=0.5, help='Registry poll interval')
+    parser.add_argument('--model-type', type=str, default='ensemble', help='Model type to train')
+    return parser.parse_args()
+
+
+async def run_load(payloads, rate):
+    """Send the payloads at a fixed rate, returning send times, latencies and failures"""
+    transport = httpx.ASGITransport(app=api.app)
+    sent = np.empty(len(payloads))
+    latencies = np.empty(len(payloads))
+    failures = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        start = time.perf_counter()
+
+        async def send(i, payload):
+            scheduled = start + i / rate
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            response = await client.post('/predict/promotion', json=payload)
+            sent[i] = scheduled
+            latencies[i] = time.perf_counter() - scheduled
+            if response.status_code != 200:
+                failures.append(response.status_code)
+
+        await asyncio.gather(*[send(i, payload) for i, payload in enumerate(payloads)])
+
+    return sent, latencies, failures
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+    rng = np.random.RandomState(42)
+    model_dir = tempfile.mkdtemp(prefix="trade_ai_models_")
+
+    try:
+        X, y = training_data(5000, rng)
+        current = TradeAIPredictionModel(model_type=args.model_type)
+        current.train(X, y)
+        current.save_model(os.path.join(model_dir, f"{args.model_type}_model_current.joblib"))
+        new = TradeAIPredictionModel(model_type=args.model_type)
+        new.train(X, y * 1.1)
+
+        api.model_registry.model_dir = model_dir
+        api.model_registry.poll_interval = args.poll_interval
+        api.model_registry.refresh()
+        api.model_registry.start()
+
+        promotion = {'promo_type': 'BOGO', 'discount_percentage': 20.0, 'region': 'South',
+                     'channel': 'Retail', 'promo_cost': 2000.0}
+        payloads = [{'product': product, 'promotion': promotion}
+                    for product in request_products(int(args.rate * args.seconds), rng)]
+
+        # Save the new model halfway through the load
+        swap = {}
+
+        def save_new_model():
+            time.sleep(args.seconds / 2)
+            swap['saved'] = time.perf_counter()
+            new.save_model(os.path.join(model_dir, f"{args.model_type}_model_new.joblib"))
+            while api.prediction_model is not api.model_registry.active or api.prediction_model.model_id != new.model_id:
+                time.sleep(0.01)
+            swap['active'] = time.perf_counter()
+
+        saver = threading.Thread(target=save_new_model)
+        saver.start()
+        sent, latencies, failures = asyncio.run(run_load(payloads, args.rate))
+        saver.join()
+        api.model_registry.stop()
+
+        before = latencies[sent < swap['saved']]
+        during = latencies[(sent >= swap['saved']) & (sent < swap['active'])]
+        after = latencies[sent >= swap['active']]
+        print(f"{len(payloads):,} requests at {args.rate:g} req/s, {len(failures)} failed")
+        print(f"New model serving {swap['active'] - swap['saved']:.2f}s after it was saved")
+        for label, values in [('before save', before), ('during reload', during), ('after swap', after)]:
+            if len(values):
+                print(f"{label:<14} {len(values):6,} requests  "
+                      f"p50 {np.percentile(values, 50) * 1000:7.1f}ms  "
+                      f"p99 {np.percentile(values, 99) * 1000:7.1f}ms")
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark for routed (per-category) models.
+Trains a global model and one model per product category on data whose
+promotion response differs by category, saves them to a model directory,
+and compares test accuracy and bulk prediction time of the global model
+with the ModelRouter dispatching to the per-category models.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, r2_score
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.prediction_model import TradeAIPredictionModel
+from src.model_registry import ModelRegistry
+from src.model_router import ModelRouter
+from benchmarks.bench_bulk_prediction import training_data, CATEGORIES
+
+# Sales uplift per discount point, by category
+CATEGORY_RESPONSE = {'Beverage': 120.0, 'Snack': 40.0, 'Condiment': -20.0}
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark routed per-category models')
+    parser.add_argument('--samples', type=int, default=15000, help='Training samples')
+    parser.add_argument('--products', type=int, default=5000, help='Products per bulk request')
+    parser.add_argument('--model-type', type=str, default='ensemble', help='Model type to train')
+    return parser.parse_args()
+
+
+def segmented_data(n_samples, rng):
+    """Training data whose response to discounts depends on the category"""
+    X, _ = training_data(n_samples, rng)
+    response = X['product_category'].map(CATEGORY_RESPONSE).astype(float)
+    y = (X['avg_monthly_sales'] + X['discount_percentage'] * response - X['base_price'] * 10 +
+         rng.normal(0, 300, n_samples))
+    return X, y
+
+
+def as_requests(X):
+    """Product and promotion dicts of feature rows"""
+    products = X[['base_price', 'avg_monthly_sales', 'sales_volatility', 'seasonality_index',
+                  'competitor_intensity', 'product_category']].to_dict('records')
+    promotions = X[['discount_percentage', 'promo_type', 'region', 'channel']].to_dict('records')
+    return products, promotions
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+    rng = np.random.RandomState(42)
+    model_dir = tempfile.mkdtemp(prefix="trade_ai_routes_")
+
+    try:
+        X, y = segmented_data(args.samples, rng)
+        global_model = TradeAIPredictionModel(model_type=args.model_type)
+        global_model.train(X, y)
+        global_model.save_model(os.path.join(model_dir, f"{args.model_type}_model_global.model"))
+
+        for category in CATEGORIES:
+            rows = (X['product_category'] == category).to_numpy()
+            model = TradeAIPredictionModel(model_type=args.model_type)
+            model.route = {'column': 'product_category', 'value': category}
+            model.train(X[rows], y[rows])
+            model.save_model(os.path.join(
+                model_dir, f"{args.model_type}_model_global_product_category-{category.lower()}.model"
+            ))
+
+        registry = ModelRegistry(model_dir)
+        registry.refresh()
+        router = ModelRouter(registry, route_by='product_category')
+
+        X_test, y_test = segmented_data(args.products, rng)
+        products, promotions = as_requests(X_test)
+
+        for label, scorer in [('global model', registry.active), ('routed models', router)]:
+            scorer.predict_promotion_impact_batch(products[:10], promotions[:10])
+            start = time.perf_counter()
+            results = scorer.predict_promotion_impact_batch(products, promotions)
+            elapsed = time.perf_counter() - start
+            predicted = pd.Series([result['predicted_sales'] for result in results])
+            print(f"{label:<14} bulk of {args.products:,}: {elapsed:.3f}s  "
+                  f"MAE {mean_absolute_error(y_test, predicted):8.1f}  "
+                  f"R² {r2_score(y_test, predicted):.4f}")
+        print(f"Routing: {router.stats()}")
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark for parallel rolling feature computation in TradeAIDataProcessor.
+Times calculate_rolling_features with an increasing number of worker
+processes and checks every run against the single-process result.
+"""
+
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.data_processor import TradeAIDataProcessor, ROLLING_FEATURES
+from benchmarks.synthetic_data import generate_dataset
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark parallel rolling features')
+    parser.add_argument('--products', type=int, default=5000, help='Number of products')
+    parser.add_argument('--days', type=int, default=730, help='Days of sales history')
+    parser.add_argument('--jobs', type=int, nargs='+',
+                        default=[1, 2, 4, 8, 16, 32, 64],
+                        help='Worker counts to time')
+    return parser.parse_args()
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+
+    sales_df, _, _ = generate_dataset(n_products=args.products, n_days=args.days)
+    processor = TradeAIDataProcessor()
+    processor.sales_df = sales_df
+    sales_clean = processor.clean_sales_data()
+
+    print(f"Sales rows: {len(sales_clean):,}  CPU cores: {os.cpu_count()}")
+
+    baseline = None
+    baseline_time = None
+    for n_jobs in args.jobs:
+        processor.n_jobs = n_jobs
+        start = time.perf_counter()
+        result = processor.calculate_rolling_features(sales_clean)
+        elapsed = time.perf_counter() - start
+
+        if baseline is None:
+            baseline, baseline_time = result[ROLLING_FEATURES], elapsed
+        else:
+            pd.testing.assert_frame_equal(result[ROLLING_FEATURES], baseline, check_exact=True)
+
+        print(f"n_jobs={n_jobs:>3}: {elapsed:.3f}s  "
+              f"{len(sales_clean) / elapsed / 1e6:.1f}M rows/s  "
+              f"speedup {baseline_time / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
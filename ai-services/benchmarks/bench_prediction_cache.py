@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the prediction cache.
+Replays bulk requests in which planners re-score the same products with the
+same promotion while changing only the promotion cost, with and without a
+PredictionCache, and checks the results are identical.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.prediction_model import TradeAIPredictionModel
+from utils.prediction_cache import PredictionCache
+from benchmarks.bench_bulk_prediction import training_data, request_products
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark the prediction cache')
+    parser.add_argument('--requests', type=int, default=200, help='Bulk requests replayed')
+    parser.add_argument('--products', type=int, default=50, help='Products per request')
+    parser.add_argument('--catalog', type=int, default=500, help='Distinct products requested')
+    parser.add_argument('--model-type', type=str, default='ensemble', help='Model type to train')
+    return parser.parse_args()
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+    rng = np.random.RandomState(42)
+
+    X, y = training_data(5000, rng)
+    model = TradeAIPredictionModel(model_type=args.model_type)
+    model.train(X, y)
+    model.compile_inference()
+
+    catalog = request_products(args.catalog, rng)
+    workload = []
+    for _ in range(args.requests):
+        products = [catalog[i] for i in rng.choice(args.catalog, args.products, replace=False)]
+        promotion = {'promo_type': 'BOGO', 'discount_percentage': 20.0, 'region': 'South',
+                     'channel': 'Retail', 'promo_cost': float(rng.choice([500, 1000, 2000, 5000]))}
+        workload.append((products, promotion))
+
+    start = time.perf_counter()
+    expected = [model.predict_promotion_impact_batch(products, promotion)
+                for products, promotion in workload]
+    uncached_time = time.perf_counter() - start
+
+    cache = PredictionCache(max_size=10000, ttl=300)
+    start = time.perf_counter()
+    results = [model.predict_promotion_impact_batch(products, promotion, cache)
+               for products, promotion in workload]
+    cached_time = time.perf_counter() - start
+
+    assert results == expected, "Cached results differ"
+    stats = cache.stats()
+    print(f"{args.requests} requests of {args.products} products from {args.catalog}")
+    print(f"Uncached: {uncached_time:.3f}s  Cached: {cached_time:.3f}s  "
+          f"(speedup {uncached_time / cached_time:.1f}x, hit rate {stats['hit_rate']:.1%})")
+    print("Results match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark for TradeAIDataProcessor.generate_prediction_dataset.
+Compares narrow (date range, products) queries answered from the feature
+index with building the features of the whole history and filtering them.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.data_processor import TradeAIDataProcessor
+from benchmarks.synthetic_data import generate_dataset
+
+
+def full_rebuild_query(processor, start_date, end_date, products):
+    """Previous implementation: features of the whole history, then filtered"""
+    df = processor.prepare_features_for_model(include_target=True)
+    df = df[(df['date'] >= pd.to_datetime(start_date)) & (df['date'] <= pd.to_datetime(end_date))]
+    df = df[df['product_name'].isin(products)]
+    return df.sort_values(['product_name', 'date'], kind='stable').reset_index(drop=True)
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark prediction dataset queries')
+    parser.add_argument('--products', type=int, default=1000, help='Number of products')
+    parser.add_argument('--days', type=int, default=730, help='Days of sales history')
+    parser.add_argument('--queries', type=int, default=20,
+                        help='Distinct one-week, two-product queries to time')
+    return parser.parse_args()
+
+
+def timed(function, *args):
+    """Run a function, returning its result and the elapsed seconds"""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+
+    sales_df, promo_df, product_catalog = generate_dataset(
+        n_products=args.products, n_days=args.days
+    )
+    processor = TradeAIDataProcessor()
+    processor.sales_df = sales_df
+    processor.promo_df = promo_df
+    processor.product_catalog = product_catalog
+    print(f"Sales rows: {len(sales_df):,}")
+
+    rng = np.random.default_rng(0)
+    names = np.sort(sales_df['product_name'].unique())
+    dates = np.sort(pd.to_datetime(sales_df['date'].unique()))
+    queries = []
+    for _ in range(args.queries):
+        start = pd.Timestamp(dates[rng.integers(0, len(dates) - 7)])
+        queries.append((str(start.date()), str((start + pd.Timedelta(days=6)).date()),
+                        list(rng.choice(names, 2, replace=False))))
+
+    expected, full_time = timed(full_rebuild_query, processor, *queries[0])
+    print(f"Full rebuild and filter: {full_time:.3f}s per query")
+
+    index, index_time = timed(processor.feature_index)
+    print(f"Index build (once per data load): {index_time:.3f}s")
+
+    result, first_time = timed(processor.generate_prediction_dataset, *queries[0])
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    cold_times = [timed(processor.generate_prediction_dataset, *query)[1] for query in queries[1:]]
+    cold_time = np.median([first_time] + cold_times)
+    print(f"Cold query: {cold_time * 1000:.1f}ms median  "
+          f"(speedup {full_time / cold_time:.0f}x)")
+
+    cached_times = [timed(processor.generate_prediction_dataset, *query)[1] for query in queries]
+    print(f"Cached query: {np.median(cached_times) * 1000:.2f}ms median")
+    print(f"Cache: {index.cache_info()}")
+    print("Outputs match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark for out-of-core training from feature shards.
+Writes a synthetic feature dataset as monthly Parquet shards, then trains a
+model in fresh processes the in-memory way (the full feature frame, split
+with train_test_split, then TradeAIPredictionModel.train) and from the
+shards with train_shards, and reports training time, peak RSS and test
+RMSE of both on the same test shards.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.feature_shards import FeatureShards
+
+FEATURE_DROP = ['quantity_sold', 'date']
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark out-of-core training from feature shards')
+    parser.add_argument('--samples', type=int, default=500000, help='Feature rows')
+    parser.add_argument('--months', type=int, default=36, help='Monthly shards')
+    parser.add_argument('--model-type', type=str, default='random_forest', help='Model type to train')
+    parser.add_argument('--child', type=str, default=None, choices=['memory', 'shards'],
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--path', type=str, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def write_shards(path, n_samples, n_months):
+    """Write synthetic features as monthly Parquet shards"""
+    from utils.columnar_io import write_partitioned
+    from benchmarks.bench_bulk_prediction import training_data
+
+    X, y = training_data(n_samples, np.random.RandomState(42))
+    days = np.sort(np.random.RandomState(7).randint(0, n_months * 30, n_samples))
+    df = X.assign(quantity_sold=y.to_numpy(), date=pd.Timestamp('2022-01-01') + pd.to_timedelta(days, 'D'))
+    write_partitioned(df, path)
+
+
+def child(mode, path, model_type):
+    """Train in this process and report time, peak RSS and test RMSE as JSON"""
+    from sklearn.model_selection import train_test_split
+    from src.prediction_model import TradeAIPredictionModel
+
+    shards = FeatureShards(path)
+    train, validation, test = shards.split()
+    model = TradeAIPredictionModel(model_type=model_type)
+
+    start = time.perf_counter()
+    if mode == 'memory':
+        # As train_models.train_model: full frame, split, then train's own split
+        df = pd.concat(list(shards.iter(train + validation)), ignore_index=True)
+        X = df.drop(FEATURE_DROP, axis=1)
+        y = df['quantity_sold']
+        X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+        model.train(X_train, y_train)
+    else:
+        model.train_shards(shards, train, validation)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        'time': elapsed,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'test_rmse': model.evaluate_shards(shards, test)['rmse']
+    }))
+
+
+def run_child(mode, path, model_type):
+    """Train in a fresh process and return its report"""
+    output = subprocess.run(
+        [sys.executable, '-W', 'ignore', os.path.abspath(__file__), '--child', mode,
+         '--path', path, '--model-type', model_type],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+    if args.child:
+        child(args.child, args.path, args.model_type)
+        return
+
+    path = tempfile.mkdtemp(prefix="trade_ai_shards_")
+    try:
+        write_shards(path, args.samples, args.months)
+        shards = FeatureShards(path)
+        size_mb = sum(os.path.getsize(shard) for shard in shards.paths) / 2 ** 20
+        print(f"{args.samples:,} rows in {len(shards)} shards ({size_mb:.1f} MB on disk), "
+              f"{args.model_type}")
+        for mode in ('memory', 'shards'):
+            report = run_child(mode, path, args.model_type)
+            print(f"{mode:<7} {report['time']:7.2f}s  peak RSS {report['peak_rss_mb']:8.1f} MB  "
+                  f"test RMSE {report['test_rmse']:.1f}")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
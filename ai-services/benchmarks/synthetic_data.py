@@ -0,0 +1,87 @@
+"""
+Synthetic Trade AI datasets for benchmarks.
+Generates sales histories, promotion calendars and product catalogs in the
+same shape as the files read by TradeAIDataProcessor.load_data().
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+CATEGORIES = ['Water', 'Juice', 'Energy Drink', 'Chips', 'Savory Snacks', 'Nuts']
+PROMO_TYPES = ['Discount', 'BOGO', 'Bundle']
+
+
+def generate_dataset(n_products=100, n_days=365, promos_per_product=12,
+                     overlapping=False, start_date='2022-01-01', seed=42):
+    """
+    Generate a synthetic dataset.
+
+    Args:
+        n_products (int): Number of products
+        n_days (int): Number of days of daily sales per product
+        promos_per_product (int): Number of promotions per product
+        overlapping (bool): Whether promotions of a product may overlap
+        start_date (str): First day of the sales history
+        seed (int): Random seed
+
+    Returns:
+        tuple: (sales_df, promo_df, product_catalog)
+    """
+    rng = np.random.default_rng(seed)
+    products = [f"Product {i:05d}" for i in range(n_products)]
+    dates = pd.date_range(start_date, periods=n_days, freq='D')
+
+    # Daily sales for every product
+    base = rng.uniform(50, 500, n_products)
+    quantity = rng.poisson(np.repeat(base, n_days)).astype(np.int64)
+    prices = np.round(rng.uniform(5, 50, n_products), 2)
+    sales_df = pd.DataFrame({
+        'date': np.tile(dates.values, n_products),
+        'product_name': np.repeat(products, n_days),
+        'quantity_sold': quantity,
+        'revenue': np.round(quantity * np.repeat(prices, n_days), 2)
+    })
+
+    # Promotion calendar
+    n_promos = n_products * promos_per_product
+    promo_products = np.repeat(np.arange(n_products), promos_per_product)
+    durations = rng.integers(3, 15, n_promos)
+    if overlapping:
+        starts = rng.integers(0, max(n_days - 14, 1), n_promos)
+    else:
+        slot = max(n_days // promos_per_product, 15)
+        slots = np.tile(np.arange(promos_per_product), n_products)
+        starts = slots * slot + rng.integers(0, slot - 14, n_promos)
+    promo_df = pd.DataFrame({
+        'product_name': np.array(products, dtype=object)[promo_products],
+        'promo_start_date': dates[0] + pd.to_timedelta(starts, unit='D'),
+        'promo_end_date': dates[0] + pd.to_timedelta(starts + durations - 1, unit='D'),
+        'promo_type': rng.choice(PROMO_TYPES, n_promos),
+        'discount_percentage': np.round(rng.uniform(0, 40, n_promos), 1)
+    })
+    promo_df = promo_df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+    product_catalog = [
+        {
+            'product_name': name,
+            'category': CATEGORIES[i % len(CATEGORIES)],
+            'base_price': float(prices[i]),
+            'margin_percentage': float(np.round(rng.uniform(0.2, 0.5), 2))
+        }
+        for i, name in enumerate(products)
+    ]
+
+    return sales_df, promo_df, product_catalog
+
+
+def write_dataset(data_path, sales_df, promo_df, product_catalog):
+    """Write a synthetic dataset as the CSV/JSON files load_data() expects"""
+    os.makedirs(data_path, exist_ok=True)
+    sales_df.to_csv(os.path.join(data_path, 'sales_data.csv'), index=False)
+    promo_df.to_csv(os.path.join(data_path, 'promotional_data.csv'), index=False)
+    with open(os.path.join(data_path, 'product_catalog.json'), 'w') as f:
+        json.dump(product_catalog, f, indent=2)
+    with open(os.path.join(data_path, 'company_profile.json'), 'w') as f:
+        json.dump({'name': 'Synthetic Co'}, f, indent=2)
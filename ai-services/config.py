@@ -42,14 +42,40 @@ TRAINING_CONFIG = {
     'test_size': 0.2,
     'validation_split': 0.2,
     'cross_validation_folds': 5,
-    'hyperparameter_optimization': True
+    'hyperparameter_optimization': True,
+    # Increment of the niceness of the API's training job processes, so
+    # prediction traffic gets the CPU first
+    'job_niceness': int(os.getenv('TRAINING_JOB_NICENESS', '10')),
+    # Retry-After (seconds) of predictions refused while the first model
+    # trains, until a training job has completed to estimate from
+    'retry_after_seconds': int(os.getenv('TRAINING_RETRY_AFTER_SECONDS', '30'))
 }
 
 # Prediction Configuration
 PREDICTION_CONFIG = {
     'confidence_threshold': 0.7,
     'max_prediction_horizon_days': 90,
-    'min_historical_data_points': 30
+    'min_historical_data_points': 30,
+    # Micro-batching of /predict/promotion: requests arriving within the
+    # window (or until the batch is full) are scored together
+    'batch_window_ms': float(os.getenv('PREDICTION_BATCH_WINDOW_MS', '2')),
+    'max_batch_size': int(os.getenv('PREDICTION_MAX_BATCH_SIZE', '64')),
+    # Cache of model outputs by encoded model input (0 entries disables it)
+    'cache_size': int(os.getenv('PREDICTION_CACHE_SIZE', '10000')),
+    'cache_ttl_seconds': float(os.getenv('PREDICTION_CACHE_TTL_SECONDS', '300')),
+    # Seconds between scans of the model directory for newly saved models
+    # (0 disables hot reloading)
+    'model_poll_seconds': float(os.getenv('MODEL_POLL_SECONDS', '5')),
+    # Route requests to models specialised by this column (product_category,
+    # promo_type, region or channel) when one is saved for the request's value
+    'route_by': os.getenv('PREDICTION_ROUTE_BY', ''),
+    # Size on disk of the routed models kept loaded
+    'routed_models_memory_mb': float(os.getenv('PREDICTION_ROUTED_MODELS_MEMORY_MB', '1024')),
+    # Serve forest models with the compiled tree-ensemble engine
+    'compiled_inference': os.getenv('PREDICTION_COMPILED_INFERENCE', 'true').lower() == 'true',
+    # Serve only: load model artifacts without sklearn and skip loading
+    # training data and training a default model at startup
+    'serve_only': os.getenv('PREDICTION_SERVE_ONLY', 'false').lower() == 'true'
 }
 
 # Data Processing Configuration
@@ -107,11 +133,21 @@ def validate_config():
     
     return errors
 
-# Validate configuration on import
-config_errors = validate_config()
-if config_errors:
-    print("AI Configuration Warnings:")
-    for error in config_errors:
-        print(f"  - {error}")
-else:
-    print("AI Configuration: Local ML models ready ✅")
\ No newline at end of file
+def report_config():
+    """
+    Validate the AI configuration and print the result.
+    
+    Called explicitly by entry points (e.g. on API startup) rather than on
+    import, so importing the configuration has no side effects.
+    
+    Returns:
+        list: Configuration errors
+    """
+    config_errors = validate_config()
+    if config_errors:
+        print("AI Configuration Warnings:")
+        for error in config_errors:
+            print(f"  - {error}")
+    else:
+        print("AI Configuration: Local ML models ready ✅")
+    return config_errors
\ No newline at end of file
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Trade AI Model Registry
+This module indexes the saved models of the prediction service and hot-swaps
+the active model when a newer one is saved, without restarting the API.
+"""
+
+import os
+import sys
+import json
+import glob
+import threading
+from datetime import datetime
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.prediction_model import TradeAIPredictionModel
+from utils.model_artifact import ARTIFACT_SUFFIX, is_artifact, read_metadata, serving_size
+
+# Request used to warm up a loaded model before it serves traffic
+WARMUP_PRODUCT = {'product_name': 'warmup', 'base_price': 10.0, 'avg_monthly_sales': 1000.0}
+WARMUP_PROMOTION = {'promo_type': 'Discount', 'discount_percentage': 10.0, 'promo_cost': 100.0}
+
+
+class ModelRegistry:
+    """
+    In-memory index of the models saved in a directory.
+    
+    The directory is scanned once on start and then polled for new
+    `*_model_*.joblib` files and `*_model_*.model` artifacts in a background
+    thread. Each model is indexed with its metadata (`*_metadata_*.json`,
+    written by train_models.py, or an artifact's own metadata) so
+    listing models never touches the disk. When a model newer than the
+    active one appears, it is loaded and warmed up in the polling thread and
+    then made active with a single reference swap: requests already being
+    scored finish on the previous model, new requests get the new one.
+    """
+    
+    def __init__(self, model_dir, poll_interval=5.0, compiled=True, serve_only=False, on_activate=None):
+        """
+        Initialize the registry.
+        
+        Args:
+            model_dir (str): Directory of saved models
+            poll_interval (float): Seconds between scans of the directory;
+                0 disables watching
+            compiled (bool): Load models with compiled inference
+            serve_only (bool): Load model artifacts serve-only (see
+                TradeAIPredictionModel.load_model)
+            on_activate (callable): Called with each newly active model
+        """
+        self.model_dir = model_dir
+        self.poll_interval = poll_interval
+        self.compiled = compiled
+        self.serve_only = serve_only
+        self.on_activate = on_activate
+        self.active = None
+        self.active_id = None
+        self.active_signature = None
+        self.activations = 0
+        self.errors = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @staticmethod
+    def model_id(path):
+        """ID of a saved model: its file name without extension"""
+        return os.path.splitext(os.path.basename(path))[0]
+    
+    def _read_metadata(self, path):
+        """Metadata saved next to a model by train_models.py, or in an artifact"""
+        name = self.model_id(path).replace("_model_", "_metadata_", 1)
+        metadata_path = os.path.join(os.path.dirname(path), f"{name}.json")
+        try:
+            if os.path.exists(metadata_path):
+                with open(metadata_path, 'r') as f:
+                    return json.load(f)
+            if is_artifact(path):
+                metadata = read_metadata(path)
+                return {
+                    'model_type': metadata.get('model_type', 'unknown'),
+                    'route': metadata.get('route'),
+                    'training_date': metadata.get('timestamp', ''),
+                    'test_metrics': metadata.get('metrics', {}),
+                    'feature_importance': metadata.get('feature_importance', {})
+                }
+        except (OSError, ValueError):
+            pass
+        return None
+    
+    def _index(self, path, created):
+        """Index entry of a saved model"""
+        metadata = self._read_metadata(path)
+        if os.path.isdir(path):
+            # Only the files serving loads, not the artifact's training pipeline
+            size = serving_size(path, serve_only=self.serve_only)
+        else:
+            size = os.path.getsize(path)
+        entry = {
+            'model_id': self.model_id(path),
+            'path': path,
+            'created': created,
+            'size': size,
+            'has_metadata': metadata is not None,
+            'route': None,
+            'model_type': 'unknown',
+            'training_date': datetime.fromtimestamp(created).isoformat(),
+            'accuracy': 0.0,
+            'features': []
+        }
+        if metadata is not None:
+            entry.update({
+                'model_type': metadata.get('model_type', 'unknown'),
+                'route': metadata.get('route'),
+                'training_date': metadata.get('training_date', ''),
+                'accuracy': metadata.get('test_metrics', {}).get('r2', 0.0),
+                'features': list(metadata.get('feature_importance', {}).keys())[:5]
+            })
+        return entry
+    
+    def scan(self):
+        """
+        Index new and rewritten model files and drop deleted ones.
+        
+        Metadata written after its model is picked up on a later scan.
+        
+        Returns:
+            dict: Newest indexed global (not routed) model entry that has not
+                failed to load, or None
+        """
+        paths = (glob.glob(os.path.join(self.model_dir, "*_model_*.joblib")) +
+                 glob.glob(os.path.join(self.model_dir, f"*_model_*{ARTIFACT_SUFFIX}")))
+        with self._lock:
+            present = set()
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                model_id = self.model_id(path)
+                # The inode changes when a file or artifact is replaced by a rename
+                signature = (stat.st_size, stat.st_mtime, stat.st_ino)
+                present.add(model_id)
+                
+                entry = self._entries.get(model_id)
+                if entry is None or entry['signature'] != signature or not entry['has_metadata']:
+                    indexed = self._index(path, stat.st_ctime)
+                    if entry is not None and entry['signature'] == signature and indexed['route'] is None:
+                        # Route learned from the loaded model
+                        indexed['route'] = entry['route']
+                    self._entries[model_id] = dict(indexed, signature=signature)
+            
+            for model_id in list(self._entries):
+                if model_id not in present:
+                    del self._entries[model_id]
+            
+            entries = [entry for entry in self._usable() if entry['route'] is None]
+        return max(entries, key=lambda entry: entry['created']) if entries else None
+    
+    def _usable(self):
+        """Entries that have not failed to load (lock held)"""
+        # Models that failed to load are retried once their file changes
+        return [entry for entry in self._entries.values()
+                if self.errors.get(entry['model_id'], (None,))[0] != entry['signature']]
+    
+    def routes(self, column):
+        """
+        Newest routed model of each value of a routing column.
+        
+        Args:
+            column (str): Routing column, e.g. "product_category"
+            
+        Returns:
+            dict: Column value to its model's index entry
+        """
+        routes = {}
+        with self._lock:
+            for entry in self._usable():
+                route = entry['route']
+                if not route or route.get('column') != column:
+                    continue
+                current = routes.get(route.get('value'))
+                if current is None or entry['created'] > current['created']:
+                    routes[route.get('value')] = entry
+        return routes
+    
+    def record_error(self, entry, error):
+        """
+        Record that a model failed to load; it is skipped until its file changes.
+        
+        Args:
+            entry (dict): Index entry of the model
+            error (Exception): Load error
+        """
+        with self._lock:
+            self.errors[entry['model_id']] = (entry['signature'], str(error))
+        print(f"Error loading model {entry['path']}: {error}")
+    
+    def load(self, entry):
+        """
+        Load and warm up a model without activating it.
+        
+        Args:
+            entry (dict): Index entry of the model
+        
+        Returns:
+            TradeAIPredictionModel: Loaded model
+        """
+        model = TradeAIPredictionModel()
+        model.load_model(entry['path'], compiled=self.compiled, serve_only=self.serve_only)
+        model.predict_promotion_impact_batch([WARMUP_PRODUCT], WARMUP_PROMOTION)
+        return model
+    
+    def activate(self, model, model_id, signature=None):
+        """
+        Make a model the active one.
+        
+        Args:
+            model (TradeAIPredictionModel): Loaded model
+            model_id (str): ID of the model's file (None if unsaved)
+            signature (tuple): Signature of the loaded file, to reload it
+                when it is rewritten
+        """
+        with self._lock:
+            self.active = model
+            self.active_id = model_id
+            self.active_signature = signature
+            self.activations += 1
+        if self.on_activate is not None:
+            self.on_activate(model)
+    
+    def refresh(self):
+        """
+        Scan the directory and activate the newest model if it is not active,
+        or reload the active model if its file was rewritten.
+        
+        Returns:
+            bool: True if a model was activated
+        """
+        # The polling thread and callers (e.g. finished training jobs) may
+        # refresh at the same time; load each model once
+        with self._refresh_lock:
+            return self._refresh()
+    
+    def _refresh(self):
+        """Refresh (refresh lock held)"""
+        newest = self.scan()
+        if newest is None:
+            return False
+        if newest['model_id'] == self.active_id:
+            if newest['signature'] == self.active_signature:
+                return False
+        else:
+            active = self._entries.get(self.active_id)
+            if active is not None and active['created'] >= newest['created']:
+                return False
+        
+        try:
+            model = self.load(newest)
+        except Exception as e:
+            self.record_error(newest, e)
+            return False
+        
+        # A routed model indexed before its metadata was written
+        if model.route:
+            with self._lock:
+                if newest['model_id'] in self._entries:
+                    self._entries[newest['model_id']]['route'] = model.route
+            return False
+        
+        with self._lock:
+            self.errors.pop(newest['model_id'], None)
+        self.activate(model, newest['model_id'], newest['signature'])
+        print(f"Activated model {newest['model_id']}")
+        return True
+    
+    def _watch(self):
+        """Poll the directory until stopped"""
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing models: {e}")
+    
+    def start(self):
+        """Start watching the directory in a background thread"""
+        if self.poll_interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop watching the directory"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def models(self):
+        """
+        Indexed models, newest first.
+        
+        Returns:
+            list: Model info dicts (model_id, model_type, route,
+                training_date, accuracy, features, is_active)
+        """
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda entry: entry['created'], reverse=True)
+            return [{
+                'model_id': entry['model_id'],
+                'model_type': entry['model_type'],
+                'route': f"{entry['route'].get('column')}={entry['route'].get('value')}" if entry['route'] else None,
+                'training_date': entry['training_date'],
+                'accuracy': entry['accuracy'],
+                'features': entry['features'],
+                'is_active': entry['model_id'] == self.active_id
+            } for entry in entries]
+    
+    def stats(self):
+        """
+        Registry statistics.
+        
+        Returns:
+            dict: Active model, indexed models, activations and load errors
+        """
+        with self._lock:
+            return {
+                'active_model': self.active_id,
+                'indexed_models': len(self._entries),
+                'watching': self._thread is not None and self._thread.is_alive(),
+                'activations': self.activations,
+                'load_errors': {model_id: error for model_id, (_, error) in self.errors.items()}
+            }
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Trade AI Model Router
+This module dispatches prediction requests to models specialised for a
+segment of the data (e.g. one product category), falling back to the global
+model for segments without one.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class ModelRouter:
+    """
+    Routes predictions to per-segment models by a routing column.
+    
+    Routed models are saved like any other model with a `route` of
+    {'column': ..., 'value': ...} and indexed by the ModelRegistry. Each
+    request's routing value (e.g. its product_category) picks the newest
+    routed model for that value; requests without one use the fallback
+    (global) model. Routed models are loaded on first use and kept in LRU
+    order, evicting the least recently used once the model files they
+    loaded exceed the memory budget.
+    
+    The router has the prediction interface of TradeAIPredictionModel, so it
+    can be used wherever a model is scored (e.g. by the PredictionBatcher).
+    """
+    
+    def __init__(self, registry, route_by=None, memory_budget_mb=1024, fallback=None):
+        """
+        Initialize the router.
+        
+        Args:
+            registry (ModelRegistry): Index of the saved models
+            route_by (str): Routing column ("product_category", "promo_type",
+                "region" or "channel"); None routes everything to the
+                fallback model
+            memory_budget_mb (float): Size of the model files loaded by
+                the routed models kept loaded
+            fallback (callable): Returns the global model
+        """
+        self.registry = registry
+        self.route_by = route_by or None
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.fallback = fallback or (lambda: registry.active)
+        self.loads = 0
+        self.evictions = 0
+        self.routed_requests = 0
+        self.fallback_requests = 0
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+    
+    def route_value(self, product_data, promotion_details):
+        """
+        Routing value of a request.
+        
+        Args:
+            product_data (dict): Product data
+            promotion_details (dict): Details of the promotion
+        
+        Returns:
+            str: Value of the routing column, or None
+        """
+        if self.route_by is None:
+            return None
+        for source in (product_data, promotion_details):
+            value = source.get(self.route_by)
+            if value is not None:
+                return value
+        return None
+    
+    def model_for(self, value):
+        """
+        Model serving a routing value, loading it if needed.
+        
+        Args:
+            value (str): Routing value
+        
+        Returns:
+            TradeAIPredictionModel: The routed model, or the fallback model
+                if the value has none (or it failed to load)
+        """
+        if value is None:
+            return self.fallback()
+        entry = self.registry.routes(self.route_by).get(value)
+        if entry is None:
+            return self.fallback()
+        
+        model = self._get(entry['model_id'])
+        if model is not None:
+            return model
+        
+        # Load one model at a time; another thread may have loaded it
+        with self._load_lock:
+            model = self._get(entry['model_id'])
+            if model is not None:
+                return model
+            try:
+                model = self.registry.load(entry)
+            except Exception as e:
+                self.registry.record_error(entry, e)
+                return self.fallback()
+            self._add(value, entry, model)
+        return model
+    
+    def _get(self, model_id):
+        """Loaded model by ID, marking it recently used"""
+        with self._lock:
+            loaded = self._models.get(model_id)
+            if loaded is None:
+                return None
+            self._models.move_to_end(model_id)
+            return loaded[1]
+    
+    def _add(self, value, entry, model):
+        """Keep a loaded model, replacing older versions and evicting over budget"""
+        with self._lock:
+            for model_id, (loaded_value, _, _) in list(self._models.items()):
+                if loaded_value == value:
+                    del self._models[model_id]
+            self._models[entry['model_id']] = (value, model, entry['size'])
+            self.loads += 1
+            
+            # The model just loaded stays even if it alone exceeds the budget
+            while len(self._models) > 1 and self._memory() > self.memory_budget:
+                self._models.popitem(last=False)
+                self.evictions += 1
+    
+    def _memory(self):
+        """Size of the model files loaded by the routed models (lock held)"""
+        return sum(size for _, _, size in self._models.values())
+    
+    def predict_promotion_impact(self, product_data, promotion_details):
+        """
+        Predict the impact of a promotion on sales with the routed model.
+        
+        Args:
+            product_data (dict): Product data including historical sales
+            promotion_details (dict): Details of the promotion
+        
+        Returns:
+            dict: Prediction results including lift and ROI
+        """
+        return self.predict_promotion_impact_batch([product_data], promotion_details)[0]
+    
+    def predict_promotion_impact_batch(self, products, promotions, cache=None):
+        """
+        Predict the impact of promotions on many products, grouping them by
+        model so each model scores its products with one batch call.
+        
+        Args:
+            products (list): Product data dicts
+            promotions (dict or list): Promotion details applied to every
+                product, or a list with one promotion per product
+            cache (PredictionCache): Cache of model outputs by encoded input
+        
+        Returns:
+            list: Prediction result dicts including lift and ROI, in product order
+        """
+        if isinstance(promotions, dict):
+            promotions = [promotions] * len(products)
+        elif len(promotions) != len(products):
+            raise ValueError("Expected one promotion per product")
+        
+        # Resolve each distinct routing value once, then group by model
+        models = {}
+        groups = OrderedDict()
+        for i, (product_data, promotion_details) in enumerate(zip(products, promotions)):
+            value = self.route_value(product_data, promotion_details)
+            if value not in models:
+                models[value] = self.model_for(value)
+            model = models[value]
+            if model is None:
+                raise ValueError("Prediction model not available")
+            groups.setdefault(id(model), (model, []))[1].append(i)
+        
+        fallback = self.fallback()
+        results = [None] * len(products)
+        for model, rows in groups.values():
+            if model is fallback:
+                self.fallback_requests += len(rows)
+            else:
+                self.routed_requests += len(rows)
+            scored = model.predict_promotion_impact_batch(
+                [products[i] for i in rows], [promotions[i] for i in rows], cache
+            )
+            for i, result in zip(rows, scored):
+                results[i] = result
+        return results
+    
+    def stats(self):
+        """
+        Routing statistics.
+        
+        Returns:
+            dict: Routing column, available and loaded routes, memory use,
+                loads, evictions and request counts
+        """
+        routes = self.registry.routes(self.route_by) if self.route_by else {}
+        with self._lock:
+            return {
+                'route_by': self.route_by,
+                'routes': sorted(str(value) for value in routes),
+                'loaded_models': list(self._models),
+                'memory_mb': self._memory() / 1024 / 1024,
+                'memory_budget_mb': self.memory_budget / 1024 / 1024,
+                'loads': self.loads,
+                'evictions': self.evictions,
+                'routed_requests': self.routed_requests,
+                'fallback_requests': self.fallback_requests
+            }
@@ -6,22 +6,24 @@ This module provides a FastAPI service for making predictions using the Trade AI
 
 import os
 import sys
-import json
-import glob
-import joblib
-import pandas as pd
-import numpy as np
+import asyncio
+from collections import deque
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from fastapi import FastAPI, HTTPException, Query, Body
 from pydantic import BaseModel, Field
-import uvicorn
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from src.prediction_model import TradeAIPredictionModel
-from utils.data_processor import TradeAIDataProcessor
-from config import get_model_config, validate_config
+from src.model_registry import ModelRegistry
+from src.model_router import ModelRouter
+from src.training_jobs import TrainingJobManager
+from utils.prediction_cache import PredictionCache
+from utils.model_search import SEARCH_STRATEGIES, DEFAULT_SEARCH
+from config import get_model_config, report_config, AVAILABLE_MODELS, PREDICTION_CONFIG, TRAINING_CONFIG
+
+# pandas, sklearn and the data processor are imported on first use: a
+# serve-only API loads model artifacts without them (see PREDICTION_SERVE_ONLY)
 
 # Define API models
 class ProductData(BaseModel):
@@ -72,11 +74,183 @@ class ModelInfo(BaseModel):
     """Model information"""
     model_id: str
     model_type: str
+    route: Optional[str] = None
     training_date: str
     accuracy: float
     features: List[str]
     is_active: bool
 
+class TrainingRequest(BaseModel):
+    """Request for training a model"""
+    model_type: str = Field("ensemble", description="Type of model to train")
+    optimize: bool = Field(False, description="Whether to perform hyperparameter optimization")
+    search: str = Field(DEFAULT_SEARCH, description="Hyperparameter search (halving, random or grid)")
+
+class TrainingJob(BaseModel):
+    """Training job status"""
+    job_id: str
+    status: str = Field(..., description="queued, running, completed or failed")
+    stage: str = Field(..., description="Current stage of the job")
+    progress: float = Field(..., description="Progress (0-1)")
+    model_type: str
+    optimize: bool
+    search: str
+    created: str
+    started: Optional[str] = None
+    finished: Optional[str] = None
+    model_id: Optional[str] = None
+    metrics: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent single-product predictions into batches.
+    
+    Requests are queued with a future. A worker task takes the queued
+    requests, waits up to `window` seconds after the first one for more (or
+    until max_batch_size requests are gathered), scores them with one
+    predict_promotion_impact_batch call in a worker thread and resolves each
+    request's future with its result. The event loop keeps accepting
+    requests while a batch is scored; they form the next batch.
+    """
+    
+    def __init__(self, window=0.002, max_batch_size=64, cache=None):
+        """
+        Initialize the batcher.
+        
+        Args:
+            window (float): Seconds to wait for more requests after the first
+            max_batch_size (int): Largest number of requests per batch
+            cache (PredictionCache): Cache of model outputs used when scoring
+        """
+        self.window = window
+        self.max_batch_size = max(1, max_batch_size)
+        self.cache = cache
+        self.batches = 0
+        self.requests = 0
+        self._pending = deque()
+        self._arrived = None
+        self._task = None
+        self._loop = None
+    
+    def _ensure_worker(self):
+        """Start the worker task on the running event loop if needed"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._arrived = asyncio.Event()
+            self._task = loop.create_task(self._run())
+    
+    async def predict(self, model, product_data, promotion_details):
+        """
+        Predict the impact of a promotion on one product as part of a batch.
+        
+        Args:
+            model (TradeAIPredictionModel): Model to score with
+            product_data (dict): Product data
+            promotion_details (dict): Details of the promotion
+            
+        Returns:
+            dict: Prediction results including lift and ROI
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._pending.append((model, product_data, promotion_details, future))
+        self._arrived.set()
+        return await future
+    
+    async def _run(self):
+        """Gather and score batches until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            while not self._pending:
+                self._arrived.clear()
+                await self._arrived.wait()
+            
+            batch = []
+            deadline = loop.time() + self.window
+            while True:
+                while self._pending and len(batch) < self.max_batch_size:
+                    batch.append(self._pending.popleft())
+                remaining = deadline - loop.time()
+                if len(batch) >= self.max_batch_size or remaining <= 0:
+                    break
+                self._arrived.clear()
+                try:
+                    await asyncio.wait_for(self._arrived.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            
+            # Requests whose caller went away are dropped
+            batch = [item for item in batch if not item[3].done()]
+            if batch:
+                await self._score(batch)
+    
+    async def _score(self, batch):
+        """Score a batch in a worker thread and resolve its futures"""
+        self.batches += 1
+        self.requests += len(batch)
+        
+        # The active model may be replaced between requests
+        by_model = {}
+        for item in batch:
+            by_model.setdefault(id(item[0]), []).append(item)
+        
+        for items in by_model.values():
+            model = items[0][0]
+            products = [item[1] for item in items]
+            promotions = [item[2] for item in items]
+            try:
+                results = await asyncio.to_thread(
+                    model.predict_promotion_impact_batch, products, promotions, self.cache
+                )
+            except Exception:
+                # Score one by one so a bad request only fails itself
+                results = []
+                for product_data, promotion_details in zip(products, promotions):
+                    try:
+                        results.append(await asyncio.to_thread(
+                            model.predict_promotion_impact, product_data, promotion_details
+                        ))
+                    except Exception as e:
+                        results.append(e)
+            
+            for (_, _, _, future), result in zip(items, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+    
+    def stats(self):
+        """
+        Batching statistics.
+        
+        Returns:
+            dict: batches, requests and mean batch size
+        """
+        return {
+            'batches': self.batches,
+            'requests': self.requests,
+            'mean_batch_size': self.requests / self.batches if self.batches else 0.0
+        }
+    
+    async def stop(self):
+        """Stop the worker task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        while self._pending:
+            future = self._pending.popleft()[3]
+            if not future.done():
+                future.set_exception(RuntimeError("Prediction service is shutting down"))
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Trade AI Prediction API",
@@ -85,58 +259,111 @@ app = FastAPI(
 )
 
 # Global variables
-MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "test_data")
+MODEL_DIR = os.getenv('MODEL_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models"))
+DATA_DIR = os.getenv('DATA_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "test_data"))
 
 # Load models on startup
 prediction_model = None
 data_processor = None
 
-@app.on_event("startup")
-async def startup_event():
-    """Load models on startup"""
-    global prediction_model, data_processor
+# Model outputs of recently requested product/promotion combinations
+prediction_cache = PredictionCache(
+    max_size=PREDICTION_CONFIG['cache_size'],
+    ttl=PREDICTION_CONFIG['cache_ttl_seconds']
+)
+
+# Coalesces concurrent /predict/promotion requests
+prediction_batcher = PredictionBatcher(
+    window=PREDICTION_CONFIG['batch_window_ms'] / 1000,
+    max_batch_size=PREDICTION_CONFIG['max_batch_size'],
+    cache=prediction_cache
+)
+
+def set_active_model(model):
+    """Serve new requests with a model; requests in flight keep theirs"""
+    global prediction_model
+    prediction_model = model
+    prediction_cache.invalidate()
+
+# Index of saved models; loads newly saved models in the background
+model_registry = ModelRegistry(
+    MODEL_DIR,
+    poll_interval=PREDICTION_CONFIG['model_poll_seconds'],
+    compiled=PREDICTION_CONFIG['compiled_inference'],
+    serve_only=PREDICTION_CONFIG['serve_only'],
+    on_activate=set_active_model
+)
+
+# Dispatches predictions to per-segment models, or the active model
+model_router = ModelRouter(
+    model_registry,
+    route_by=PREDICTION_CONFIG['route_by'],
+    memory_budget_mb=PREDICTION_CONFIG['routed_models_memory_mb'],
+    fallback=lambda: prediction_model
+)
+
+# Trains models in a background process; completed models are activated
+# through the registry
+training_jobs = TrainingJobManager(
+    MODEL_DIR,
+    DATA_DIR,
+    niceness=TRAINING_CONFIG['job_niceness'],
+    on_complete=lambda job: model_registry.refresh()
+)
+
+def model_unavailable():
+    """503 for requests arriving before a model is loaded"""
+    if training_jobs.pending():
+        retry_after = training_jobs.retry_after(TRAINING_CONFIG['retry_after_seconds'])
+        return HTTPException(
+            status_code=503,
+            detail="Prediction model is being trained",
+            headers={"Retry-After": str(retry_after)}
+        )
+    return HTTPException(status_code=503, detail="Prediction model not available")
+
+def load_data():
+    """Load the training data (in a worker thread, after startup)"""
+    global data_processor
+    from utils.data_processor import TradeAIDataProcessor
     
-    # Initialize data processor
-    data_processor = TradeAIDataProcessor(data_path=DATA_DIR)
-    if not data_processor.load_data():
+    processor = TradeAIDataProcessor(data_path=DATA_DIR)
+    if not processor.load_data():
         print("Warning: Failed to load data. Some functionality may be limited.")
+    data_processor = processor
+
+@app.on_event("startup")
+async def startup_event():
+    """Load the latest model on startup"""
+    report_config()
     
     # Load the latest model
     try:
-        model_files = glob.glob(os.path.join(MODEL_DIR, "*_model_*.joblib"))
-        if model_files:
-            latest_model = max(model_files, key=os.path.getctime)
-            prediction_model = TradeAIPredictionModel()
-            prediction_model.load_model(latest_model)
-            print(f"Loaded model from {latest_model}")
-        else:
-            # If no model file exists, create a default model
-            print("No existing model found. Creating a default model.")
-            prediction_model = TradeAIPredictionModel(model_type="ensemble")
-            
-            # If data is available, train a simple model
-            if data_processor and hasattr(data_processor, 'sales_df') and data_processor.sales_df is not None:
-                try:
-                    # Prepare features
-                    df = data_processor.prepare_features_for_model()
-                    
-                    # Drop non-feature columns
-                    X = df.drop(['quantity_sold', 'product_name', 'date'], axis=1)
-                    y = df['quantity_sold']
-                    
-                    # Train a simple model
-                    prediction_model.train(X, y, optimize=False)
-                    
-                    # Save the model
-                    os.makedirs(MODEL_DIR, exist_ok=True)
-                    model_path = os.path.join(MODEL_DIR, f"default_model_{datetime.now().strftime('%Y%m%d_%H%M%S')}.joblib")
-                    prediction_model.save_model(model_path)
-                    print(f"Trained and saved default model to {model_path}")
-                except Exception as e:
-                    print(f"Error training default model: {e}")
+        model_registry.refresh()
+        if model_registry.active is None:
+            if PREDICTION_CONFIG['serve_only']:
+                print("No existing model found. Serving once a model is saved.")
+            else:
+                # If no model file exists, train a default model in the
+                # background; predictions return 503 until it is activated
+                job = training_jobs.submit(model_type="ensemble", optimize=False)
+                print(f"No existing model found. Training a default model (job {job['job_id']}).")
     except Exception as e:
         print(f"Error loading model: {e}")
+    
+    # Pick up models saved while the API runs
+    model_registry.start()
+    
+    # Predictions never use the data; load it without delaying startup
+    if not PREDICTION_CONFIG['serve_only']:
+        asyncio.get_running_loop().run_in_executor(None, load_data)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the prediction batcher, the model registry and training jobs"""
+    await prediction_batcher.stop()
+    await asyncio.to_thread(model_registry.stop)
+    await asyncio.to_thread(training_jobs.stop)
 
 @app.get("/")
 async def root():
@@ -152,64 +379,22 @@ async def root():
 @app.get("/models", response_model=List[ModelInfo])
 async def get_models():
     """Get information about available models"""
-    try:
-        model_files = glob.glob(os.path.join(MODEL_DIR, "*_model_*.joblib"))
-        metadata_files = glob.glob(os.path.join(MODEL_DIR, "*_metadata_*.json"))
-        
-        models = []
-        for model_file in model_files:
-            model_id = os.path.basename(model_file).replace(".joblib", "")
-            
-            # Find corresponding metadata file
-            metadata_file = next((f for f in metadata_files if model_id.replace("_model_", "_metadata_") in f), None)
-            
-            if metadata_file:
-                with open(metadata_file, 'r') as f:
-                    metadata = json.load(f)
-                
-                # Check if this is the active model
-                is_active = False
-                if prediction_model and hasattr(prediction_model, 'model'):
-                    # Compare creation time as a simple way to check if it's the same model
-                    model_time = os.path.getctime(model_file)
-                    is_active = model_file == max(model_files, key=os.path.getctime)
-                
-                models.append(ModelInfo(
-                    model_id=model_id,
-                    model_type=metadata.get('model_type', 'unknown'),
-                    training_date=metadata.get('training_date', ''),
-                    accuracy=metadata.get('test_metrics', {}).get('r2', 0.0),
-                    features=list(metadata.get('feature_importance', {}).keys())[:5],
-                    is_active=is_active
-                ))
-            else:
-                # Basic info if metadata not available
-                models.append(ModelInfo(
-                    model_id=model_id,
-                    model_type="unknown",
-                    training_date=datetime.fromtimestamp(os.path.getctime(model_file)).isoformat(),
-                    accuracy=0.0,
-                    features=[],
-                    is_active=False
-                ))
-        
-        return models
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error retrieving models: {str(e)}")
+    return [ModelInfo(**info) for info in model_registry.models()]
 
 @app.post("/predict/promotion", response_model=PromotionResponse)
 async def predict_promotion_impact(request: PromotionRequest):
     """Predict the impact of a promotion on sales"""
     if prediction_model is None:
-        raise HTTPException(status_code=503, detail="Prediction model not available")
+        raise model_unavailable()
     
     try:
         # Convert request to the format expected by the model
         product_data = request.product.dict()
         promotion_details = request.promotion.dict()
         
-        # Make prediction
-        result = prediction_model.predict_promotion_impact(product_data, promotion_details)
+        # Make prediction with the request's routed model, batched with
+        # concurrent requests
+        result = await prediction_batcher.predict(model_router, product_data, promotion_details)
         
         # Add timestamp
         result['timestamp'] = datetime.now().isoformat()
@@ -222,27 +407,55 @@ async def predict_promotion_impact(request: PromotionRequest):
 async def predict_bulk_promotion_impact(request: BulkPromotionRequest):
     """Predict the impact of a promotion on multiple products"""
     if prediction_model is None:
-        raise HTTPException(status_code=503, detail="Prediction model not available")
+        raise model_unavailable()
     
     try:
-        results = []
         promotion_details = request.promotion.dict()
+        products = [product.dict() for product in request.products]
         
-        for product in request.products:
-            product_data = product.dict()
-            result = prediction_model.predict_promotion_impact(product_data, promotion_details)
-            result['timestamp'] = datetime.now().isoformat()
-            results.append(result)
+        # Score the products with one call per routed model, off the event loop
+        results = await asyncio.to_thread(
+            model_router.predict_promotion_impact_batch, products, promotion_details,
+            prediction_cache
+        )
+        
+        timestamp = datetime.now().isoformat()
+        for result in results:
+            result['timestamp'] = timestamp
         
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Bulk prediction error: {str(e)}")
 
+@app.post("/train", response_model=TrainingJob, status_code=202)
+async def train_model(request: TrainingRequest):
+    """Queue a training job; its model is activated when it completes"""
+    if request.model_type not in AVAILABLE_MODELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown model type '{request.model_type}'. Available: {list(AVAILABLE_MODELS.keys())}"
+        )
+    if request.search not in SEARCH_STRATEGIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown search strategy '{request.search}'. Available: {list(SEARCH_STRATEGIES)}"
+        )
+    return training_jobs.submit(model_type=request.model_type, optimize=request.optimize,
+                                search=request.search)
+
+@app.get("/train/{job_id}", response_model=TrainingJob)
+async def get_training_job(job_id: str):
+    """Get the status and progress of a training job"""
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    return job
+
 @app.get("/features/importance")
 async def get_feature_importance():
     """Get feature importance from the model"""
     if prediction_model is None:
-        raise HTTPException(status_code=503, detail="Prediction model not available")
+        raise model_unavailable()
     
     try:
         importance_report = prediction_model.generate_feature_importance_report()
@@ -257,11 +470,18 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "model_loaded": prediction_model is not None,
-        "data_loaded": data_processor is not None and hasattr(data_processor, 'sales_df') and data_processor.sales_df is not None
+        "data_loaded": data_processor is not None and hasattr(data_processor, 'sales_df') and data_processor.sales_df is not None,
+        "prediction_batching": prediction_batcher.stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "model_registry": model_registry.stats(),
+        "model_routing": model_router.stats(),
+        "training_jobs": training_jobs.stats()
     }
 
 def start_server(host="0.0.0.0", port=8000):
     """Start the API server"""
+    import uvicorn
+    
     uvicorn.run("prediction_api:app", host=host, port=port, reload=True)
 
 if __name__ == "__main__":
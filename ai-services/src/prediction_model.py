@@ -1,15 +1,39 @@
 import os
+import sys
 import json
 import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.linear_model import ElasticNet
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.pipeline import Pipeline
-from sklearn.compose import ColumnTransformer
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.compiled_forest import CompiledForest
+from utils.compiled_preprocessor import CompiledPreprocessor
+from utils.model_artifact import (ARTIFACT_SUFFIX, is_artifact, write_artifact, read_artifact,
+                                  read_preprocessor, read_metadata, read_pipeline)
+from utils.model_search import HyperparameterSearch, DEFAULT_SEARCH
+
+# sklearn and pandas are imported where they are used, so a serving process
+# that loads a model artifact serve-only never imports them
+
+# Hyperparameters searched by train(optimize=True)
+PARAM_GRID = {
+    'model__n_estimators': [50, 100, 200],
+    'model__max_depth': [5, 10, 15, 20],
+    'model__min_samples_split': [2, 5, 10],
+    'model__min_samples_leaf': [1, 2, 4]
+}
+
+# Thresholds of full_refit_reason: RMSE on the new data relative to the
+# model's validation RMSE, shift of a numerical feature's mean in training
+# standard deviations, incremental updates since the last full fit, and most
+# boosting stages of an updated model
+DRIFT_RMSE_RATIO = 1.5
+DRIFT_MEAN_SHIFT = 1.0
+MAX_INCREMENTS = 7
+MAX_BOOSTING_STAGES = 500
+
+# Values of the promotion features that requests and datasets may omit
+PROMOTION_DEFAULTS = {'region': 'National', 'channel': 'Retail'}
 
 class TradeAIPredictionModel:
     """
@@ -17,30 +41,85 @@ class TradeAIPredictionModel:
     to forecast sales and promotional effectiveness.
     """
     
-    def __init__(self, model_type="ensemble"):
+    @property
+    def model(self):
+        """
+        Fitted preprocessor + model pipeline.
+        
+        Models loaded serve-only (see load_model) score requests with their
+        compiled preprocessor and forest; their pipeline is built from the
+        artifact's sklearn preprocessor on first use.
+        """
+        if self._model is None and self._deferred_pipeline is not None:
+            from sklearn.pipeline import Pipeline
+            
+            filepath, estimator = self._deferred_pipeline
+            self._model = Pipeline(steps=[
+                ('preprocessor', read_preprocessor(filepath)),
+                ('model', estimator)
+            ])
+            self._deferred_pipeline = None
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._deferred_pipeline = None
+    
+    def __init__(self, model_type="ensemble", n_jobs=None):
         """
         Initialize the prediction model.
         
         Args:
             model_type (str): Type of model to use. Options: "ensemble", "random_forest", 
                              "gradient_boosting", "elastic_net"
+            n_jobs (int): Cores used to train forests and hyperparameter
+                searches (None: one for forests, all for searches)
         """
         self.model_type = model_type
-        self.model = None
+        self.n_jobs = n_jobs
+        self._model = None
+        self._deferred_pipeline = None
+        self.model_id = None
+        # Segment a routed model serves ({'column': ..., 'value': ...}); None
+        # for a global model
+        self.route = None
+        # Last date of the training data (set by the trainer), samples trained
+        # on and incremental updates since the last full fit
+        self.trained_through = None
+        self.training_samples = None
+        self.increments = 0
         self.feature_importance = {}
         self.metrics = {}
         self.preprocessor = None
+        self.compiled_forest = None
+        self.compiled_preprocessor = None
+        self.categories = {}
         self.categorical_features = ['product_category', 'promo_type', 'region', 'channel']
         self.numerical_features = ['base_price', 'discount_percentage', 'avg_monthly_sales', 
                                   'sales_volatility', 'seasonality_index', 'competitor_intensity']
         
     def _create_preprocessor(self):
-        """Create a preprocessor for the data"""
+        """
+        Create a preprocessor for the data.
+        
+        Categorical features (pandas categoricals or strings) are mapped to
+        integer codes into the vocabulary seen in training before one-hot
+        encoding, so the encoder never compares strings. The output is
+        always dense, so the model gets the same array type whatever the
+        share of one-hot columns.
+        """
+        from sklearn.pipeline import Pipeline
+        from sklearn.compose import ColumnTransformer
+        from sklearn.preprocessing import StandardScaler, OneHotEncoder
+        from utils.categorical import CategoryCodes
+        
         numerical_transformer = Pipeline(steps=[
             ('scaler', StandardScaler())
         ])
         
         categorical_transformer = Pipeline(steps=[
+            ('codes', CategoryCodes()),
             ('onehot', OneHotEncoder(handle_unknown='ignore'))
         ])
         
@@ -48,17 +127,22 @@ class TradeAIPredictionModel:
             transformers=[
                 ('num', numerical_transformer, self.numerical_features),
                 ('cat', categorical_transformer, self.categorical_features)
-            ])
+            ],
+            sparse_threshold=0)
     
     def _create_model(self):
         """Create the prediction model based on model_type"""
+        from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+        from sklearn.linear_model import ElasticNet
+        
         if self.model_type == "random_forest":
             return RandomForestRegressor(
                 n_estimators=100, 
                 max_depth=15,
                 min_samples_split=5,
                 min_samples_leaf=2,
-                random_state=42
+                random_state=42,
+                n_jobs=self.n_jobs
             )
         elif self.model_type == "gradient_boosting":
             return GradientBoostingRegressor(
@@ -79,10 +163,11 @@ class TradeAIPredictionModel:
                 max_depth=20,
                 min_samples_split=5,
                 min_samples_leaf=2,
-                random_state=42
+                random_state=42,
+                n_jobs=self.n_jobs
             )
     
-    def train(self, X, y, optimize=False):
+    def train(self, X, y, optimize=False, search=DEFAULT_SEARCH):
         """
         Train the prediction model.
         
@@ -90,11 +175,22 @@ class TradeAIPredictionModel:
             X (pd.DataFrame): Features dataframe
             y (pd.Series): Target variable
             optimize (bool): Whether to perform hyperparameter optimization
+            search (str): Hyperparameter search strategy: "halving"
+                (successive halving with trees as the resource), "random"
+                (random search with early stopping) or "grid" (exhaustive);
+                see utils/model_search.py
             
         Returns:
             dict: Training metrics
         """
+        from sklearn.pipeline import Pipeline
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+        
         # Create preprocessor and model
+        self.model_id = f"{self.model_type}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        self.compiled_forest = None
+        self.increments = 0
         self.preprocessor = self._create_preprocessor()
         base_model = self._create_model()
         
@@ -106,27 +202,23 @@ class TradeAIPredictionModel:
         
         # Split data for training and validation
         X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+        self.training_samples = len(X_train)
         
         # Hyperparameter optimization if requested
         if optimize and self.model_type != "elastic_net":
-            param_grid = {
-                'model__n_estimators': [50, 100, 200],
-                'model__max_depth': [5, 10, 15, 20],
-                'model__min_samples_split': [2, 5, 10],
-                'model__min_samples_leaf': [1, 2, 4]
-            }
-            
-            grid_search = GridSearchCV(
+            hyperparameter_search = HyperparameterSearch(
                 self.model,
-                param_grid,
+                PARAM_GRID,
+                strategy=search,
                 cv=5,
-                scoring='neg_mean_squared_error',
-                n_jobs=-1
+                random_state=42,
+                n_jobs=self.n_jobs or -1
             )
             
-            grid_search.fit(X_train, y_train)
-            self.model = grid_search.best_estimator_
-            print(f"Best parameters: {grid_search.best_params_}")
+            hyperparameter_search.fit(X_train, y_train)
+            self.model = hyperparameter_search.best_estimator_
+            print(f"Best parameters: {hyperparameter_search.best_params_} "
+                  f"({hyperparameter_search.n_fits_} fits, {search} search)")
         else:
             # Train the model
             self.model.fit(X_train, y_train)
@@ -141,15 +233,342 @@ class TradeAIPredictionModel:
             'r2': r2_score(y_val, y_pred)
         }
         
-        # Extract feature importance if available
+        # Training cores are not kept for serving
+        self._reset_n_jobs()
+        
+        # Vocabulary of the categorical features, in code order
+        self.preprocessor = self.model.named_steps['preprocessor']
+        categorical_transformer = self.preprocessor.named_transformers_['cat']
+        self.categories = categorical_transformer.named_steps['codes'].vocabulary()
+        self._compile_preprocessor()
+        self._extract_feature_importance()
+        
+        return self.metrics
+    
+    def full_refit_reason(self, X, y, new_trees=None, drift_rmse_ratio=DRIFT_RMSE_RATIO,
+                          drift_mean_shift=DRIFT_MEAN_SHIFT, max_increments=MAX_INCREMENTS,
+                          max_stages=MAX_BOOSTING_STAGES):
+        """
+        Why new data needs a full refit instead of train_incremental.
+        
+        A full refit is forced when the model cannot be updated (no fitted
+        pipeline, an elastic net, or a model saved before training samples
+        were recorded), on a schema change (missing feature
+        columns, or categorical values outside the training vocabulary,
+        which the fitted encoder cannot represent), on drift (RMSE on the
+        new data above drift_rmse_ratio times the validation RMSE, or a
+        numerical feature's mean shifted by more than drift_mean_shift
+        training standard deviations), after max_increments updates in a
+        row (updates only see recent data, so their error slowly adds up),
+        and when a gradient boosting model would exceed max_stages.
+        
+        Args:
+            X (pd.DataFrame): Features of the new data
+            y (pd.Series): Target of the new data
+            new_trees (int): Trees (or boosting stages) the update would add
+                (see train_incremental)
+            drift_rmse_ratio (float): Largest RMSE ratio of an update
+            drift_mean_shift (float): Largest mean shift of an update
+            max_increments (int): Most updates since the last full fit
+            max_stages (int): Most boosting stages of an updated model
+            
+        Returns:
+            str: The reason, or None if the model can be updated
+        """
+        from sklearn.ensemble import GradientBoostingRegressor
+        from sklearn.metrics import mean_squared_error
+        
+        if self.model is None:
+            return "no trained model"
+        if self.model_type == "elastic_net":
+            return "elastic_net models are always refitted in full"
+        if not self.training_samples:
+            return "the model does not record its training samples"
+        if self.increments >= max_increments:
+            return f"{self.increments} incremental updates since the last full fit"
+        
+        missing = [col for col in self.numerical_features + self.categorical_features
+                   if col not in X.columns]
+        if missing:
+            return f"schema change: missing columns {missing}"
+        if not self.categories:
+            return "schema change: the model has no saved category vocabulary"
+        for feature in self.categorical_features:
+            vocabulary = set(self.categories.get(feature, []))
+            unseen = [value for value in X[feature].dropna().unique() if value not in vocabulary]
+            if unseen:
+                return f"schema change: new {feature} values {unseen[:5]}"
+        
+        scaler = self.model.named_steps['preprocessor'].named_transformers_['num'].named_steps['scaler']
+        shift = np.abs(X[self.numerical_features].mean().to_numpy(dtype=float) - scaler.mean_) / scaler.scale_
+        if np.nanmax(shift) > drift_mean_shift:
+            feature = self.numerical_features[int(np.nanargmax(shift))]
+            return f"drift: mean of {feature} shifted by {np.nanmax(shift):.2f} standard deviations"
+        
+        rmse = np.sqrt(mean_squared_error(y, self.predict(X)))
+        if self.metrics.get('rmse') and rmse > drift_rmse_ratio * self.metrics['rmse']:
+            return f"drift: RMSE on new data {rmse:.2f} vs {self.metrics['rmse']:.2f} in validation"
+        
+        estimator = self.model.named_steps['model']
+        if (isinstance(estimator, GradientBoostingRegressor) and
+                estimator.n_estimators_ + (new_trees or self._new_trees(len(X))) > max_stages):
+            return f"boosting stages would exceed {max_stages}"
+        
+        return None
+    
+    def train_incremental(self, X, y, new_trees=None, max_trees=None):
+        """
+        Update the trained model with new data, at a cost that scales with
+        the new data instead of the full history.
+        
+        Forest models fit new_trees trees on the new data (warm start) and
+        retire the oldest trees beyond max_trees; gradient boosting continues
+        boosting from the fitted stages for new_trees more stages. By
+        default new_trees is proportional to the new data's share of all
+        samples trained on, so a day of data does not outweigh the history.
+        The fitted preprocessor is kept. Check full_refit_reason first: it
+        tells when the new data needs a full refit with train() instead.
+        
+        The update is fitted on all new rows, since callers mark them as
+        trained through. The new data is scored before the update, while
+        the model has not seen it; self.metrics keeps the validation metrics
+        of the last full fit, the baseline of the drift check.
+        
+        Args:
+            X (pd.DataFrame): Features of the new data
+            y (pd.Series): Target of the new data
+            new_trees (int): Trees (or boosting stages) to add
+            max_trees (int): Most trees of a forest (defaults to its
+                current number of trees)
+            
+        Returns:
+            dict: Metrics of the model before the update on the new data
+        """
+        from sklearn.ensemble import GradientBoostingRegressor
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+        
+        if self.model is None:
+            raise ValueError("Model has not been trained yet. Call train() first.")
+        estimator = self.model.named_steps['model']
+        if isinstance(estimator, CompiledForest):
+            raise ValueError("Model was loaded for serving; load it with for_training=True to update it")
+        if self.model_type == "elastic_net":
+            raise ValueError("Elastic net models can only be refitted in full. Call train().")
+        
+        new_trees = new_trees or self._new_trees(len(X))
+        y_pred = self.model.predict(X)
+        metrics = {
+            'mae': mean_absolute_error(y, y_pred),
+            'rmse': np.sqrt(mean_squared_error(y, y_pred)),
+            'r2': r2_score(y, y_pred)
+        }
+        X_model = self.model.named_steps['preprocessor'].transform(X)
+        
+        if isinstance(estimator, GradientBoostingRegressor):
+            # Continue boosting from the fitted stages
+            estimator.set_params(warm_start=True, n_estimators=estimator.n_estimators_ + new_trees)
+            estimator.fit(X_model, y)
+        else:
+            # Add trees fitted on the new data, then retire the oldest. The
+            # forest keeps its size, so a fixed seed would give every update's
+            # new trees the same seeds; derive one from the update count
+            max_trees = max_trees or len(estimator.estimators_)
+            estimator.set_params(warm_start=True, n_estimators=len(estimator.estimators_) + new_trees,
+                                 random_state=42 + self.increments + 1)
+            estimator.fit(X_model, y)
+            estimator.estimators_ = estimator.estimators_[-max_trees:]
+            estimator.n_estimators = len(estimator.estimators_)
+        estimator.set_params(warm_start=False)
+        
+        self.model_id = f"{self.model_type}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        self.training_samples += len(X)
+        self.increments += 1
+        if self.compiled_forest is not None:
+            self.compile_inference()
+        self._extract_feature_importance()
+        
+        return metrics
+    
+    def train_shards(self, shards, train, validation, target='quantity_sold', n_epochs=5):
+        """
+        Train the prediction model out of core, from on-disk feature shards.
+        
+        Shards are read one at a time (see utils/feature_shards.py), so
+        memory holds one shard of features instead of the full dataset and
+        its split copies. A first pass learns the preprocessor: the scaler's
+        statistics accumulated over all training shards and the vocabulary
+        of each categorical feature, giving the same preprocessor as fitting
+        on all training rows at once. Then:
+        
+        - random forest models ("ensemble", "random_forest") fit one
+          subforest per shard, with trees in proportion to the shard's rows,
+          and merge them into one forest
+        - "elastic_net" trains an SGDRegressor with the same elastic net
+          penalty from shuffled shards with partial_fit, for n_epochs passes
+        
+        Gradient boosting fits every stage on all rows and cannot be trained
+        from shards.
+        
+        Args:
+            shards (FeatureShards): Feature dataset
+            train (list): Indices of the training shards
+            validation (list): Indices of the validation shards
+            target (str): Target column
+            n_epochs (int): Passes over the training shards (elastic_net)
+            
+        Returns:
+            dict: Metrics on the validation shards
+        """
+        import pandas as pd
+        from sklearn.base import clone
+        from sklearn.pipeline import Pipeline
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.linear_model import SGDRegressor
+        from sklearn.preprocessing import StandardScaler
+        
+        base_model = self._create_model()
+        if self.model_type == "gradient_boosting":
+            raise ValueError("Gradient boosting cannot be trained from shards. "
+                             "Use random_forest, ensemble or elastic_net, or train in memory.")
+        if not train:
+            raise ValueError("No training shards")
+        
+        features = self.numerical_features + self.categorical_features
+        self.model_id = f"{self.model_type}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        self.compiled_forest = None
+        self.training_samples = shards.rows(train)
+        self.increments = 0
+        
+        # First pass: scaler statistics and categorical values of all shards
+        scaler = StandardScaler()
+        values = {feature: set() for feature in self.categorical_features}
+        missing = set()
+        for shard in shards.iter(train, columns=features):
+            scaler.partial_fit(shard[self.numerical_features])
+            for feature in self.categorical_features:
+                values[feature].update(shard[feature].dropna().unique())
+                if shard[feature].isna().any():
+                    missing.add(feature)
+        
+        # Fit the preprocessor on rows covering every categorical value, then
+        # give it the scaler statistics of all rows
+        vocabularies = {
+            feature: sorted(values[feature]) + ([None] if feature in missing else [])
+            for feature in self.categorical_features
+        }
+        n_rows = max(len(vocabulary) for vocabulary in vocabularies.values())
+        frame = pd.DataFrame(dict(
+            {feature: np.zeros(n_rows) for feature in self.numerical_features},
+            **{feature: [vocabulary[i % len(vocabulary)] for i in range(n_rows)]
+               for feature, vocabulary in vocabularies.items()}
+        ))
+        self.preprocessor = self._create_preprocessor().fit(frame)
+        fitted_scaler = self.preprocessor.named_transformers_['num'].named_steps['scaler']
+        for attribute in ('mean_', 'var_', 'scale_', 'n_samples_seen_'):
+            setattr(fitted_scaler, attribute, getattr(scaler, attribute))
+        
+        # Second pass: the model
+        columns = features + [target]
+        if isinstance(base_model, RandomForestRegressor):
+            model = None
+            for index, shard in zip(train, shards.iter(train, columns=columns)):
+                n_trees = max(1, int(round(
+                    base_model.n_estimators * shards.n_rows[index] / self.training_samples
+                )))
+                subforest = clone(base_model).set_params(
+                    n_estimators=n_trees, random_state=base_model.random_state + index
+                )
+                subforest.fit(self.preprocessor.transform(shard[features]), shard[target])
+                if model is None:
+                    model = subforest
+                else:
+                    model.estimators_ += subforest.estimators_
+            model.n_estimators = len(model.estimators_)
+        else:
+            model = SGDRegressor(penalty='elasticnet', alpha=base_model.alpha,
+                                 l1_ratio=base_model.l1_ratio, random_state=42)
+            rng = np.random.RandomState(42)
+            for _ in range(n_epochs):
+                for index in rng.permutation(train):
+                    shard = shards.read(index, columns=columns)
+                    order = rng.permutation(len(shard))
+                    model.partial_fit(self.preprocessor.transform(shard[features])[order],
+                                      shard[target].to_numpy()[order])
+        
+        self.model = Pipeline(steps=[
+            ('preprocessor', self.preprocessor),
+            ('model', model)
+        ])
+        self.metrics = self.evaluate_shards(shards, validation, target=target)
+        self._reset_n_jobs()
+        
+        # Vocabulary of the categorical features, in code order
+        categorical_transformer = self.preprocessor.named_transformers_['cat']
+        self.categories = categorical_transformer.named_steps['codes'].vocabulary()
+        self._compile_preprocessor()
+        self._extract_feature_importance()
+        
+        return self.metrics
+    
+    def evaluate_shards(self, shards, indices, target='quantity_sold'):
+        """
+        Metrics of the model on feature shards, read one at a time.
+        
+        Args:
+            shards (FeatureShards): Feature dataset
+            indices (list): Indices of the shards to evaluate on
+            target (str): Target column
+            
+        Returns:
+            dict: MAE, RMSE and R² over all rows of the shards (empty if
+                there are no rows)
+        """
+        features = self.numerical_features + self.categorical_features
+        n = abs_error = squared_error = y_sum = y_squared = 0.0
+        for shard in shards.iter(indices, columns=features + [target]):
+            y = shard[target].to_numpy(dtype=float)
+            error = y - self.predict(shard[features])
+            n += len(y)
+            abs_error += np.abs(error).sum()
+            squared_error += np.square(error).sum()
+            y_sum += y.sum()
+            y_squared += np.square(y).sum()
+        if not n:
+            return {}
+        
+        total = y_squared - y_sum ** 2 / n
+        return {
+            'mae': float(abs_error / n),
+            'rmse': float(np.sqrt(squared_error / n)),
+            'r2': float(1 - squared_error / total) if total > 0 else 0.0
+        }
+    
+    def _reset_n_jobs(self):
+        """Make the fitted model predict on one core, as loaded models do"""
+        estimator = self.model.named_steps['model']
+        if 'n_jobs' in estimator.get_params():
+            estimator.set_params(n_jobs=None)
+    
+    def _new_trees(self, n_samples):
+        """Trees (or stages) for new data in proportion to its share of all samples"""
+        estimator = self.model.named_steps['model']
+        n_trees = getattr(estimator, 'n_estimators_', None) or len(estimator.estimators_)
+        return max(1, int(round(n_trees * n_samples / (self.training_samples + n_samples))))
+    
+    def _extract_feature_importance(self):
+        """Map the fitted model's feature importances to feature names"""
         if hasattr(self.model.named_steps['model'], 'feature_importances_'):
-            # Get feature names from preprocessor
-            feature_names = (
-                self.numerical_features +
-                self.preprocessor.named_transformers_['cat'].named_steps['onehot'].get_feature_names_out(
-                    self.categorical_features
-                ).tolist()
-            )
+            preprocessor = self.model.named_steps['preprocessor']
+            categorical_transformer = preprocessor.named_transformers_['cat']
+            
+            # Get feature names from preprocessor, one per vocabulary entry
+            encoded_categories = categorical_transformer.named_steps['onehot'].categories_
+            feature_names = list(self.numerical_features)
+            for feature, codes in zip(self.categorical_features, encoded_categories):
+                vocabulary = self.categories[feature]
+                feature_names += [
+                    f"{feature}_{vocabulary[code] if code >= 0 else 'nan'}" for code in codes
+                ]
             
             # Map importances to feature names
             importances = self.model.named_steps['model'].feature_importances_
@@ -161,8 +580,6 @@ class TradeAIPredictionModel:
                 key=lambda item: item[1], 
                 reverse=True
             )}
-        
-        return self.metrics
     
     def predict(self, X):
         """
@@ -177,8 +594,63 @@ class TradeAIPredictionModel:
         if self.model is None:
             raise ValueError("Model has not been trained yet. Call train() first.")
         
+        if self.compiled_forest is not None:
+            X_model = self.model.named_steps['preprocessor'].transform(X)
+            return self.compiled_forest.predict(X_model)
+        
         return self.model.predict(X)
     
+    def compile_inference(self, backend='auto'):
+        """
+        Switch predictions to the compiled tree-ensemble engine (see
+        utils/compiled_forest.py), which gives the same predictions as the
+        fitted forest with much lower per-call overhead.
+        
+        Only random forest models (the "ensemble" and "random_forest" model
+        types) can be compiled; other models keep using sklearn.
+        
+        Args:
+            backend (str): "auto", "numpy" or "numba"
+            
+        Returns:
+            bool: True if predictions now use the compiled engine
+        """
+        if self.model is None:
+            raise ValueError("Model has not been trained yet. Call train() first.")
+        
+        forest = self.model.named_steps['model']
+        if isinstance(forest, CompiledForest):
+            # Loaded compiled from a model artifact
+            self.compiled_forest = forest
+            return True
+        if not CompiledForest.supports(forest):
+            self.compiled_forest = None
+            return False
+        
+        self.compiled_forest = CompiledForest(forest, backend=backend)
+        return True
+    
+    def _compile_preprocessor(self):
+        """
+        Export the fitted preprocessor as a CompiledPreprocessor (see
+        utils/compiled_preprocessor.py), used to encode request payloads
+        without building a dataframe. Models saved before categorical codes
+        were introduced keep using the ColumnTransformer.
+        """
+        from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+        
+        preprocessor = self.model.named_steps['preprocessor']
+        if not CompiledPreprocessor.supports(preprocessor):
+            self.compiled_preprocessor = None
+            return
+        
+        # Tree models compare float32 inputs; the other models need float64
+        tree_model = isinstance(self.model.named_steps['model'],
+                                (RandomForestRegressor, GradientBoostingRegressor, CompiledForest))
+        self.compiled_preprocessor = CompiledPreprocessor(
+            preprocessor, dtype=np.float32 if tree_model else np.float64
+        )
+    
     def predict_promotion_impact(self, product_data, promotion_details):
         """
         Predict the impact of a promotion on sales.
@@ -190,50 +662,181 @@ class TradeAIPredictionModel:
         Returns:
             dict: Prediction results including lift and ROI
         """
-        # Extract features
-        base_price = product_data.get('base_price', 0)
-        avg_monthly_sales = product_data.get('avg_monthly_sales', 0)
-        discount_percentage = promotion_details.get('discount_percentage', 0)
-        promo_type = promotion_details.get('promo_type', 'Discount')
-        
-        # Create feature dataframe
-        X_pred = pd.DataFrame({
-            'base_price': [base_price],
-            'discount_percentage': [discount_percentage],
-            'avg_monthly_sales': [avg_monthly_sales],
-            'sales_volatility': [product_data.get('sales_volatility', avg_monthly_sales * 0.2)],
-            'seasonality_index': [product_data.get('seasonality_index', 1.0)],
-            'competitor_intensity': [product_data.get('competitor_intensity', 0.5)],
-            'product_category': [product_data.get('product_category', 'Unknown')],
-            'promo_type': [promo_type],
-            'region': [promotion_details.get('region', 'National')],
-            'channel': [promotion_details.get('channel', 'Retail')]
+        return self.predict_promotion_impact_batch([product_data], promotion_details)[0]
+    
+    def predict_promotion_impact_batch(self, products, promotions, cache=None):
+        """
+        Predict the impact of promotions on many products at once.
+        
+        The model input of all products is encoded together and scored with a
+        single model call; lift, ROI and confidence are computed as array
+        operations. Each result equals predict_promotion_impact for its
+        product and promotion.
+        
+        Args:
+            products (list): Product data dicts, as for predict_promotion_impact
+            promotions (dict or list): Promotion details applied to every
+                product, or a list with one promotion per product
+            cache (PredictionCache): Cache of model outputs by encoded input;
+                only rows not in it are scored
+            
+        Returns:
+            list: Prediction result dicts including lift and ROI, in product order
+        """
+        if isinstance(promotions, dict):
+            promotions = [promotions] * len(products)
+        elif len(promotions) != len(products):
+            raise ValueError("Expected one promotion per product")
+        
+        if not products:
+            return []
+        
+        # Models loaded serve-only are ready without their pipeline
+        if self.compiled_forest is None and self.model is None:
+            raise ValueError("Model has not been trained yet. Call train() first.")
+        
+        columns = self._promotion_columns(products, promotions)
+        X_model = self._encode(columns)
+        
+        # Make predictions with a single model call
+        if cache is None:
+            predicted_sales = np.asarray(self._predict_encoded(X_model), dtype=np.float64)
+        else:
+            predicted_sales = cache.predict(self.model_id, X_model, self._predict_encoded)
+        
+        return self._promotion_results(products, promotions, predicted_sales,
+                                       self._calculate_confidence(columns))
+    
+    def _encode(self, columns):
+        """
+        Encode _promotion_columns values as model input, directly when the
+        preprocessor is compiled and otherwise with the ColumnTransformer.
+        
+        Args:
+            columns (dict): Feature name to its values
+            
+        Returns:
+            np.ndarray: Dense model input, one row per pair
+        """
+        if self.compiled_preprocessor is not None:
+            return self.compiled_preprocessor.transform(columns)
+        
+        X_model = self.model.named_steps['preprocessor'].transform(self._promotion_features(columns))
+        return X_model.toarray() if hasattr(X_model, 'toarray') else np.asarray(X_model)
+    
+    def _predict_encoded(self, X_model):
+        """
+        Predict from encoded model input.
+        
+        Args:
+            X_model (np.ndarray): Model input, as returned by _encode
+            
+        Returns:
+            np.array: Predictions
+        """
+        estimator = self.compiled_forest or self.model.named_steps['model']
+        return estimator.predict(X_model)
+    
+    def _promotion_columns(self, products, promotions):
+        """
+        Collect the model input values of (product, promotion) pairs.
+        
+        Args:
+            products (list): Product data dicts
+            promotions (list): Promotion details dicts, one per product
+            
+        Returns:
+            dict: Feature name to its values, one per pair (float arrays for
+                numeric features, lists of labels for categorical features)
+        """
+        avg_monthly_sales = [product.get('avg_monthly_sales', 0) for product in products]
+        
+        def numeric(records, key, default):
+            return np.array([record.get(key, default) for record in records], dtype=np.float64)
+        
+        def labels(records, key, default):
+            return [record.get(key, default) for record in records]
+        
+        return {
+            'base_price': numeric(products, 'base_price', 0),
+            'discount_percentage': numeric(promotions, 'discount_percentage', 0),
+            'avg_monthly_sales': np.array(avg_monthly_sales, dtype=np.float64),
+            'sales_volatility': np.array([
+                product.get('sales_volatility', sales * 0.2)
+                for product, sales in zip(products, avg_monthly_sales)
+            ], dtype=np.float64),
+            'seasonality_index': numeric(products, 'seasonality_index', 1.0),
+            'competitor_intensity': numeric(products, 'competitor_intensity', 0.5),
+            'product_category': labels(products, 'product_category', 'Unknown'),
+            'promo_type': labels(promotions, 'promo_type', 'Discount'),
+            'region': labels(promotions, 'region', PROMOTION_DEFAULTS['region']),
+            'channel': labels(promotions, 'channel', PROMOTION_DEFAULTS['channel'])
+        }
+    
+    def _promotion_features(self, columns):
+        """
+        Build the model input dataframe from _promotion_columns values.
+        
+        Args:
+            columns (dict): Feature name to its values
+            
+        Returns:
+            pd.DataFrame: Feature dataframe, one row per pair
+        """
+        import pandas as pd
+        
+        return pd.DataFrame({
+            feature: pd.Categorical(values) if feature in self.categorical_features else values
+            for feature, values in columns.items()
         })
+    
+    def _promotion_results(self, products, promotions, predicted_sales, confidence):
+        """
+        Calculate lift and ROI of predicted sales.
         
-        # Make prediction
-        predicted_sales = self.predict(X_pred)[0]
+        Args:
+            products (list): Product data dicts
+            promotions (list): Promotion details dicts, one per product
+            predicted_sales (np.ndarray): Predicted sales of each pair
+            confidence (float or np.ndarray): Prediction confidence
+            
+        Returns:
+            list: Prediction result dicts
+        """
+        avg_monthly_sales = np.array([product.get('avg_monthly_sales', 0) for product in products],
+                                     dtype=np.float64)
+        base_price = np.array([product.get('base_price', 0) for product in products], dtype=np.float64)
+        product_margin = np.array([product.get('margin_percentage', 0.3) for product in products],
+                                  dtype=np.float64)
+        promo_cost = np.array([promotion.get('promo_cost', 0) for promotion in promotions],
+                              dtype=np.float64)
         
         # Calculate lift and ROI
         sales_lift = predicted_sales - avg_monthly_sales
-        sales_lift_percentage = (sales_lift / avg_monthly_sales) * 100 if avg_monthly_sales > 0 else 0
+        sales_lift_percentage = np.zeros(len(products))
+        np.divide(sales_lift, avg_monthly_sales, out=sales_lift_percentage,
+                  where=avg_monthly_sales > 0)
+        sales_lift_percentage *= 100
         
-        # Calculate ROI
-        promo_cost = promotion_details.get('promo_cost', 0)
-        product_margin = product_data.get('margin_percentage', 0.3)
         incremental_margin = sales_lift * base_price * product_margin
-        roi = (incremental_margin / promo_cost) * 100 if promo_cost > 0 else 0
+        roi = np.zeros(len(products))
+        np.divide(incremental_margin, promo_cost, out=roi, where=promo_cost > 0)
+        roi *= 100
         
-        return {
-            'product': product_data.get('product_name', 'Unknown'),
-            'baseline_sales': avg_monthly_sales,
-            'predicted_sales': predicted_sales,
-            'sales_lift': sales_lift,
-            'sales_lift_percentage': sales_lift_percentage,
-            'promo_cost': promo_cost,
-            'incremental_margin': incremental_margin,
-            'roi': roi,
-            'confidence': self._calculate_confidence(X_pred)
+        confidence = np.broadcast_to(np.asarray(confidence, dtype=np.float64), len(products))
+        
+        columns = {
+            'product': [product.get('product_name', 'Unknown') for product in products],
+            'baseline_sales': avg_monthly_sales.tolist(),
+            'predicted_sales': predicted_sales.tolist(),
+            'sales_lift': sales_lift.tolist(),
+            'sales_lift_percentage': sales_lift_percentage.tolist(),
+            'promo_cost': promo_cost.tolist(),
+            'incremental_margin': incremental_margin.tolist(),
+            'roi': roi.tolist(),
+            'confidence': confidence.tolist()
         }
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
     
     def _calculate_confidence(self, X):
         """
@@ -241,7 +844,7 @@ class TradeAIPredictionModel:
         This is a simplified implementation.
         
         Args:
-            X (pd.DataFrame): Features for prediction
+            X (pd.DataFrame or dict): Features for prediction
             
         Returns:
             float: Confidence score between 0 and 1
@@ -261,6 +864,11 @@ class TradeAIPredictionModel:
         """
         Save the model to a file.
         
+        Paths ending in ".model" are written as a model artifact directory
+        (see utils/model_artifact.py): metadata as JSON and forest models as
+        memory-mappable node arrays, for fast loading shared across worker
+        processes. Other paths get a single joblib file.
+        
         Args:
             filepath (str): Path to save the model
         """
@@ -268,27 +876,76 @@ class TradeAIPredictionModel:
         
         model_data = {
             'model': self.model,
-            'feature_importance': self.feature_importance,
-            'metrics': self.metrics,
+            'feature_importance': {k: float(v) for k, v in self.feature_importance.items()},
+            'metrics': {k: float(v) for k, v in self.metrics.items()},
             'model_type': self.model_type,
             'categorical_features': self.categorical_features,
             'numerical_features': self.numerical_features,
+            'categories': self.categories,
+            'model_id': self.model_id,
+            'route': self.route,
+            'trained_through': self.trained_through,
+            'training_samples': self.training_samples,
+            'increments': self.increments,
             'timestamp': datetime.now().isoformat()
         }
         
-        joblib.dump(model_data, filepath)
+        if filepath.endswith(ARTIFACT_SUFFIX):
+            forest = self.model.named_steps['model']
+            compiled_forest = self.compiled_forest
+            if compiled_forest is None and CompiledForest.supports(forest):
+                compiled_forest = CompiledForest(forest)
+            metadata = {k: v for k, v in model_data.items() if k != 'model'}
+            write_artifact(filepath, metadata, self.model, compiled_forest, self.compiled_preprocessor)
+            print(f"Model saved to {filepath}")
+            return
+        
+        # Write to a temporary file first so a watching ModelRegistry never
+        # sees a partly written model
+        temp_path = f"{filepath}.tmp"
+        joblib.dump(model_data, temp_path)
+        os.replace(temp_path, filepath)
         print(f"Model saved to {filepath}")
     
-    def load_model(self, filepath):
+    def load_model(self, filepath, compiled=False, serve_only=False, for_training=False):
         """
         Load the model from a file.
         
+        Model artifacts (see save_model) are loaded memory-mapped; their
+        forest models always use compiled inference.
+        
         Args:
             filepath (str): Path to load the model from
+            compiled (bool): Compile forest models for inference (see
+                compile_inference)
+            serve_only (bool): Load an artifact with its compiled
+                preprocessor only; the sklearn preprocessor and pipeline
+                are loaded on first use, so serving a forest model never
+                imports sklearn
+            for_training (bool): Load an artifact's full sklearn pipeline
+                instead of its compiled forest, to update the model with
+                train_incremental
         """
-        import joblib
-        
-        model_data = joblib.load(filepath)
+        deferred_pipeline = None
+        if is_artifact(filepath) and for_training:
+            model_data = dict(read_metadata(filepath), model=read_pipeline(filepath))
+        elif is_artifact(filepath):
+            model_data, preprocessor, estimator = read_artifact(filepath, serve_only=serve_only)
+            if isinstance(preprocessor, CompiledPreprocessor):
+                model_data['model'] = None
+                deferred_pipeline = (filepath, estimator)
+            else:
+                from sklearn.pipeline import Pipeline
+                
+                model_data['model'] = Pipeline(steps=[
+                    ('preprocessor', preprocessor),
+                    ('model', estimator)
+                ])
+            compiled = compiled or isinstance(estimator, CompiledForest)
+        else:
+            import joblib
+            
+            model_data = joblib.load(filepath)
         
         self.model = model_data['model']
         self.feature_importance = model_data['feature_importance']
@@ -296,6 +953,22 @@ class TradeAIPredictionModel:
         self.model_type = model_data['model_type']
         self.categorical_features = model_data['categorical_features']
         self.numerical_features = model_data['numerical_features']
+        self.categories = model_data.get('categories', {})
+        self.model_id = model_data.get('model_id') or os.path.splitext(os.path.basename(filepath))[0]
+        self.route = model_data.get('route')
+        self.trained_through = model_data.get('trained_through')
+        self.training_samples = model_data.get('training_samples')
+        self.increments = model_data.get('increments', 0)
+        
+        if deferred_pipeline is not None:
+            self._deferred_pipeline = deferred_pipeline
+            self.compiled_preprocessor = preprocessor
+            self.compiled_forest = estimator if isinstance(estimator, CompiledForest) else None
+        else:
+            self._compile_preprocessor()
+            self.compiled_forest = None
+            if compiled:
+                self.compile_inference()
         
         print(f"Model loaded from {filepath}")
         
@@ -357,6 +1030,8 @@ class TradeAIPredictionModel:
 
 # Example usage
 if __name__ == "__main__":
+    import pandas as pd
+    
     # Create sample data
     np.random.seed(42)
     
@@ -6,8 +6,12 @@ This script trains and evaluates machine learning models for the Trade AI platfo
 
 import os
 import sys
+import re
 import json
+import time
+import shutil
 import argparse
+import tempfile
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -18,8 +22,23 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from src.prediction_model import TradeAIPredictionModel
+from src.prediction_model import TradeAIPredictionModel, DRIFT_RMSE_RATIO, DRIFT_MEAN_SHIFT, MAX_INCREMENTS
 from utils.data_processor import TradeAIDataProcessor
+from utils.categorical import concat_frames
+from utils.model_artifact import ARTIFACT_SUFFIX
+from utils.model_search import SEARCH_STRATEGIES, DEFAULT_SEARCH
+from utils.feature_shards import FeatureShards
+from utils.shared_arrays import SharedArrays, share_frame, read_frame
+from config import AVAILABLE_MODELS
+
+# Model types whose trees are trained in parallel (n_jobs)
+FOREST_MODELS = ('ensemble', 'random_forest')
+
+# Model types trained out of core by TradeAIPredictionModel.train_shards
+SHARD_MODELS = FOREST_MODELS + ('elastic_net',)
+
+# Options that need the full feature frame in memory
+IN_MEMORY_OPTIONS = ('optimize', 'route_by', 'visualize', 'incremental')
 
 def parse_arguments():
     """Parse command line arguments"""
@@ -30,14 +49,51 @@ def parse_arguments():
     parser.add_argument('--output-path', type=str, default='/workspace/trade-ai-github/ai-services/models',
                         help='Path to save trained models')
     parser.add_argument('--model-type', type=str, default='ensemble',
-                        choices=['ensemble', 'random_forest', 'gradient_boosting', 'elastic_net'],
-                        help='Type of model to train')
+                        choices=list(AVAILABLE_MODELS) + ['all'],
+                        help='Type of model to train, or "all" to compare every model type on the same split')
+    parser.add_argument('--parallel', action='store_true',
+                        help='With --model-type all, train the models concurrently in worker processes')
+    parser.add_argument('--train-jobs', type=int, default=-1,
+                        help='Cores for model training (-1 for all cores), split between the models with --parallel')
     parser.add_argument('--optimize', action='store_true',
                         help='Perform hyperparameter optimization')
+    parser.add_argument('--search', type=str, default=DEFAULT_SEARCH, choices=SEARCH_STRATEGIES,
+                        help='Hyperparameter search: successive halving, early-stopping random search or exhaustive grid')
     parser.add_argument('--test-size', type=float, default=0.2,
                         help='Proportion of data to use for testing')
     parser.add_argument('--visualize', action='store_true',
                         help='Generate visualizations of model performance')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Build features in monthly chunks instead of loading all sales data at once; '
+                             'forest and elastic net models then train out of core from the chunks written as '
+                             'temporary feature shards, other model types and --optimize, --route-by, '
+                             '--visualize or --incremental load all features into memory')
+    parser.add_argument('--n-jobs', type=int, default=1,
+                        help='Worker processes for feature computation (-1 for all cores)')
+    parser.add_argument('--format', type=str, default='artifact', choices=['artifact', 'joblib'],
+                        help='Save a memory-mapped model artifact directory or a single joblib file')
+    parser.add_argument('--route-by', type=str, default=None,
+                        choices=['product_category', 'promo_type', 'region', 'channel'],
+                        help='Also train a specialised model per value of this column for routed serving')
+    parser.add_argument('--min-route-samples', type=int, default=1000,
+                        help='Training samples needed to train a routed model for a value')
+    parser.add_argument('--shards', type=str, default=None,
+                        help='Train out of core from the Parquet feature shards of an export directory, '
+                             'streaming the features into it first if needed')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Update the newest saved model with the data since it was trained, '
+                             'unless a full refit is needed')
+    parser.add_argument('--base-model', type=str, default=None,
+                        help='Model to update with --incremental (defaults to the newest in the output path)')
+    parser.add_argument('--new-trees', type=int, default=None,
+                        help='Trees (or boosting stages) added by an incremental update '
+                             '(default: in proportion to the share of new samples)')
+    parser.add_argument('--drift-rmse-ratio', type=float, default=DRIFT_RMSE_RATIO,
+                        help='Force a full refit when the RMSE on new data exceeds this multiple of the validation RMSE')
+    parser.add_argument('--drift-mean-shift', type=float, default=DRIFT_MEAN_SHIFT,
+                        help='Force a full refit when a feature mean shifts by more standard deviations')
+    parser.add_argument('--max-increments', type=int, default=MAX_INCREMENTS,
+                        help='Force a full refit after this many incremental updates in a row')
     
     return parser.parse_args()
 
@@ -59,18 +115,29 @@ def train_model(args):
         return False
     
     # Initialize data processor
-    processor = TradeAIDataProcessor(data_path=args.data_path)
+    processor = TradeAIDataProcessor(data_path=args.data_path, n_jobs=args.n_jobs)
     
     # Load and process data
     print("Loading and processing data...")
-    if not processor.load_data():
+    if not processor.load_data(load_sales=not args.streaming):
         print("❌ Failed to load data")
         return False
     
     # Prepare features for model
-    df = processor.prepare_features_for_model()
+    if args.streaming:
+        # Only featurization is chunked: the model fit needs the full frame
+        print("Concatenating streamed feature batches in memory for training")
+        df = concat_frames(processor.iter_features_for_model())
+    else:
+        df = processor.prepare_features_for_model()
     print(f"Processed data shape: {df.shape}")
     
+    # Update the saved model with the new data when possible
+    if args.incremental and args.model_type != 'all':
+        updated = update_model(args, df)
+        if updated is not None:
+            return updated
+    
     # Drop non-feature columns
     X = df.drop(['quantity_sold', 'product_name', 'date'], axis=1)
     y = df['quantity_sold']
@@ -83,14 +150,18 @@ def train_model(args):
     print(f"Training data: {X_train.shape[0]} samples")
     print(f"Testing data: {X_test.shape[0]} samples")
     
+    if args.model_type == 'all':
+        return train_all_models(args, X_train, X_test, y_train, y_test, df['date'].max().isoformat())
+    
     # Initialize and train model
-    model = TradeAIPredictionModel(model_type=args.model_type)
+    model = TradeAIPredictionModel(model_type=args.model_type, n_jobs=args.train_jobs)
+    model.trained_through = df['date'].max().isoformat()
     
     print(f"Training {args.model_type} model...")
     if args.optimize:
         print("Performing hyperparameter optimization (this may take a while)...")
     
-    metrics = model.train(X_train, y_train, optimize=args.optimize)
+    metrics = model.train(X_train, y_train, optimize=args.optimize, search=args.search)
     
     print("Training complete!")
     print(f"Model metrics on validation set:")
@@ -121,37 +192,366 @@ def train_model(args):
     
     # Save model
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    model_filename = f"{args.model_type}_model_{timestamp}.joblib"
-    model_path = os.path.join(args.output_path, model_filename)
+    save_trained_model(model, args, timestamp, {
+        'training_samples': X_train.shape[0],
+        'test_samples': X_test.shape[0],
+        'validation_metrics': metrics,
+        'test_metrics': test_metrics,
+        'feature_importance': importance_report['top_features'],
+        'category_importance': importance_report['category_importance']
+    })
     
-    model.save_model(model_path)
+    # Train a specialised model per value of the routing column
+    if args.route_by:
+        train_routed_models(args, X_train, X_test, y_train, y_test, timestamp)
     
-    # Save model metadata
-    metadata = {
-        'model_type': args.model_type,
-        'training_date': datetime.now().isoformat(),
+    # Generate visualizations if requested
+    if args.visualize:
+        generate_visualizations(y_test, y_pred, importance_report, args)
+    
+    return True
+
+def core_budget(model_types, n_jobs, parallel=True):
+    """
+    Split a core budget between models.
+    
+    Models trained concurrently get one core each, and the cores left over
+    go to the forest models' trees (the first forests get the remainder).
+    With fewer cores than models, the models queue for the cores and train
+    on one core each. Trained one after another, each forest gets the whole
+    budget. Gradient boosting and elastic net always train on one core.
+    
+    Returns:
+        tuple: (concurrent workers, cores per model type)
+    """
+    cores = os.cpu_count() if n_jobs is None or n_jobs < 0 else max(1, n_jobs)
+    if not parallel:
+        return 1, {model_type: cores if model_type in FOREST_MODELS else 1 for model_type in model_types}
+    if cores < len(model_types):
+        return cores, {model_type: 1 for model_type in model_types}
+    
+    forests = [model_type for model_type in model_types if model_type in FOREST_MODELS]
+    budget = {model_type: 1 for model_type in model_types}
+    if forests:
+        per_forest, extra = divmod(cores - len(model_types) + len(forests), len(forests))
+        for i, model_type in enumerate(forests):
+            budget[model_type] = per_forest + (1 if i < extra else 0)
+    return len(model_types), budget
+
+def train_and_evaluate(model_type, n_jobs, X_train, X_test, y_train, y_test, args, timestamp,
+                       trained_through):
+    """Train, test and save one model of a comparison; returns its leaderboard entry"""
+    start = time.perf_counter()
+    model = TradeAIPredictionModel(model_type=model_type, n_jobs=n_jobs)
+    metrics = model.train(X_train, y_train, optimize=args.optimize, search=args.search)
+    training_seconds = time.perf_counter() - start
+    model.trained_through = trained_through
+    
+    y_pred = model.predict(X_test)
+    test_metrics = {
+        'mae': mean_absolute_error(y_test, y_pred),
+        'rmse': np.sqrt(mean_squared_error(y_test, y_pred)),
+        'r2': r2_score(y_test, y_pred)
+    }
+    
+    importance_report = model.generate_feature_importance_report()
+    model_args = argparse.Namespace(**dict(vars(args), model_type=model_type))
+    model_file = save_trained_model(model, model_args, timestamp, {
         'training_samples': X_train.shape[0],
         'test_samples': X_test.shape[0],
         'validation_metrics': metrics,
         'test_metrics': test_metrics,
-        'feature_importance': importance_report['top_features'],
-        'category_importance': importance_report['category_importance'],
-        'model_file': model_filename
+        'feature_importance': importance_report.get('top_features', {}),
+        'category_importance': importance_report.get('category_importance', {})
+    })
+    
+    return {
+        'model_type': model_type,
+        'n_jobs': n_jobs,
+        'training_seconds': training_seconds,
+        'validation_metrics': {k: float(v) for k, v in metrics.items()},
+        'test_metrics': {k: float(v) for k, v in test_metrics.items()},
+        'model_file': model_file
     }
+
+def _train_shared_model(task):
+    """Worker process: train a model of a comparison on the shared data"""
+    model_type, n_jobs, frames, args, timestamp, trained_through = task
+    X_train, X_test = read_frame(frames['X_train']), read_frame(frames['X_test'])
+    y_train = read_frame(frames['y_train'])['quantity_sold']
+    y_test = read_frame(frames['y_test'])['quantity_sold']
+    return train_and_evaluate(model_type, n_jobs, X_train, X_test, y_train, y_test, args, timestamp,
+                              trained_through)
+
+def train_all_models(args, X_train, X_test, y_train, y_test, trained_through):
+    """
+    Train every available model type on the same split and write a leaderboard.
+    
+    With --parallel the models train concurrently in worker processes, which
+    read the split from shared memory instead of receiving pickled copies.
+    """
+    from concurrent.futures import ProcessPoolExecutor
     
-    metadata_path = os.path.join(args.output_path, f"{args.model_type}_metadata_{timestamp}.json")
+    for option in ('route_by', 'visualize'):
+        if getattr(args, option):
+            print(f"⚠️ --{option.replace('_', '-')} is not supported with --model-type all; ignored")
+    
+    model_types = list(AVAILABLE_MODELS)
+    workers, budget = core_budget(model_types, args.train_jobs, parallel=args.parallel)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    print(f"Training {', '.join(model_types)} "
+          f"({f'{workers} concurrent workers' if args.parallel else 'one after another'}, "
+          f"cores per model: {budget})...")
+    
+    start = time.perf_counter()
+    if args.parallel:
+        with SharedArrays() as shared:
+            frames = {
+                'X_train': share_frame(shared, X_train),
+                'X_test': share_frame(shared, X_test),
+                'y_train': share_frame(shared, y_train.to_frame('quantity_sold')),
+                'y_test': share_frame(shared, y_test.to_frame('quantity_sold'))
+            }
+            tasks = [(model_type, budget[model_type], frames, args, timestamp, trained_through)
+                     for model_type in model_types]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                entries = list(executor.map(_train_shared_model, tasks))
+    else:
+        entries = [train_and_evaluate(model_type, budget[model_type], X_train, X_test, y_train, y_test,
+                                      args, timestamp, trained_through)
+                   for model_type in model_types]
+    elapsed = time.perf_counter() - start
+    
+    # Rank by test RMSE
+    leaderboard = sorted(entries, key=lambda entry: entry['test_metrics']['rmse'])
+    for rank, entry in enumerate(leaderboard, 1):
+        entry['rank'] = rank
+    
+    print(f"\nLeaderboard (test set, {elapsed:.1f}s total):")
+    for entry in leaderboard:
+        print(f"  {entry['rank']}. {entry['model_type']:<18} RMSE {entry['test_metrics']['rmse']:10.2f}  "
+              f"MAE {entry['test_metrics']['mae']:10.2f}  R² {entry['test_metrics']['r2']:.4f}  "
+              f"{entry['training_seconds']:7.1f}s on {entry['n_jobs']} cores")
+    
+    metadata_path = os.path.join(args.output_path, f"all_metadata_{timestamp}.json")
     with open(metadata_path, 'w') as f:
-        json.dump(metadata, f, indent=2)
+        json.dump({
+            'model_types': model_types,
+            'training_date': datetime.now().isoformat(),
+            'trained_through': trained_through,
+            'training_samples': X_train.shape[0],
+            'test_samples': X_test.shape[0],
+            'parallel': args.parallel,
+            'wall_clock_seconds': elapsed,
+            'leaderboard': leaderboard
+        }, f, indent=2)
+    print(f"Leaderboard saved to {metadata_path}")
+    return True
+
+def find_base_model(args):
+    """Newest saved global model of the model type in the output path"""
+    pattern = re.compile(
+        rf"^{re.escape(args.model_type)}_model_\d{{8}}_\d{{6}}({re.escape(ARTIFACT_SUFFIX)}|\.joblib)$"
+    )
+    names = sorted(name for name in os.listdir(args.output_path) if pattern.match(name))
+    return os.path.join(args.output_path, names[-1]) if names else None
+
+def update_model(args, df):
+    """
+    Update the newest saved model with the data since it was trained.
+    
+    Returns:
+        bool: Whether the update succeeded, or None if a full refit is needed
+    """
+    base_path = args.base_model or find_base_model(args)
+    if base_path is None:
+        print("No saved model to update; training in full")
+        return None
     
-    print(f"Model saved to {model_path}")
-    print(f"Metadata saved to {metadata_path}")
+    model = TradeAIPredictionModel(model_type=args.model_type)
+    model.load_model(base_path, for_training=True)
+    if model.model_type != args.model_type:
+        print(f"Full refit: base model is a {model.model_type} model")
+        return None
+    if model.trained_through is None:
+        print("Full refit: base model does not record the date it was trained through")
+        return None
+    
+    new_rows = (df['date'] > pd.Timestamp(model.trained_through)).to_numpy()
+    if not new_rows.any():
+        print(f"No data since {model.trained_through}; {os.path.basename(base_path)} is up to date")
+        return True
     
-    # Generate visualizations if requested
-    if args.visualize:
-        generate_visualizations(y_test, y_pred, importance_report, args)
+    X_new = df.loc[new_rows].drop(['quantity_sold', 'product_name', 'date'], axis=1)
+    y_new = df.loc[new_rows, 'quantity_sold']
+    reason = model.full_refit_reason(X_new, y_new, new_trees=args.new_trees,
+                                     drift_rmse_ratio=args.drift_rmse_ratio,
+                                     drift_mean_shift=args.drift_mean_shift,
+                                     max_increments=args.max_increments)
+    if reason is not None:
+        print(f"Full refit: {reason}")
+        return None
+    
+    print(f"Updating {os.path.basename(base_path)} with {new_rows.sum()} samples since "
+          f"{model.trained_through}...")
+    metrics = model.train_incremental(X_new, y_new, new_trees=args.new_trees)
+    model.trained_through = df['date'].max().isoformat()
+    
+    print("Incremental training complete!")
+    print(f"Metrics of the base model on the new data, before the update:")
+    print(f"  MAE: {metrics['mae']:.2f}")
+    print(f"  RMSE: {metrics['rmse']:.2f}")
+    print(f"  R²: {metrics['r2']:.4f}")
     
+    save_trained_model(model, args, datetime.now().strftime("%Y%m%d_%H%M%S"), {
+        'training_samples': int(new_rows.sum()),
+        'incremental': True,
+        'base_model': os.path.basename(base_path),
+        'increments': model.increments,
+        'new_data_metrics': metrics,
+        'feature_importance': dict(list(model.feature_importance.items())[:10])
+    })
     return True
 
+def streams_out_of_core(args):
+    """Whether --streaming can train from the streamed batches out of core"""
+    return (args.streaming and args.model_type in SHARD_MODELS and
+            not any(getattr(args, option) for option in IN_MEMORY_OPTIONS))
+
+def train_streaming(args):
+    """Write the streamed feature batches as temporary shards and train from them"""
+    shards_dir = tempfile.mkdtemp(prefix='trade_ai_shards_')
+    try:
+        return train_from_shards(args, shards_dir)
+    finally:
+        shutil.rmtree(shards_dir, ignore_errors=True)
+
+def train_from_shards(args, shards_dir):
+    """Train out of core from on-disk feature shards"""
+    print(f"🚀 Starting out-of-core training with {args.model_type} model type")
+    if args.model_type == 'all':
+        print("❌ --model-type all is not supported with --shards")
+        return False
+    
+    if not create_output_directory(args.output_path):
+        return False
+    
+    # Shards are the feature files of a Parquet export (one per month)
+    shards_path = os.path.join(shards_dir, 'processed_data')
+    if not os.path.isdir(shards_path):
+        print(f"Streaming features into {shards_path}...")
+        processor = TradeAIDataProcessor(data_path=args.data_path, n_jobs=args.n_jobs)
+        if not processor.load_data(load_sales=False):
+            print("❌ Failed to load data")
+            return False
+        if not processor.export_processed_data(shards_dir, streaming=True, format='parquet'):
+            print("❌ Failed to write feature shards")
+            return False
+    
+    shards = FeatureShards(shards_path)
+    train, validation, test = shards.split(test_size=args.test_size, validation_size=0.2)
+    print(f"Training data: {shards.rows(train)} samples in {len(train)} shards")
+    print(f"Validation data: {shards.rows(validation)} samples in {len(validation)} shards")
+    print(f"Testing data: {shards.rows(test)} samples in {len(test)} shards")
+    for option in IN_MEMORY_OPTIONS:
+        if getattr(args, option):
+            print(f"⚠️ --{option.replace('_', '-')} is not supported with --shards; ignored")
+    
+    model = TradeAIPredictionModel(model_type=args.model_type, n_jobs=args.train_jobs)
+    print(f"Training {args.model_type} model from shards...")
+    try:
+        metrics = model.train_shards(shards, train, validation)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+    model.trained_through = max(
+        shards.read(index, columns=['date'])['date'].max() for index in range(len(shards))
+    ).isoformat()
+    
+    test_metrics = model.evaluate_shards(shards, test)
+    print("Training complete!")
+    for label, values in [('validation', metrics), ('test', test_metrics)]:
+        if values:
+            print(f"Model metrics on {label} shards:")
+            print(f"  MAE: {values['mae']:.2f}")
+            print(f"  RMSE: {values['rmse']:.2f}")
+            print(f"  R²: {values['r2']:.4f}")
+    
+    importance_report = model.generate_feature_importance_report()
+    save_trained_model(model, args, datetime.now().strftime("%Y%m%d_%H%M%S"), {
+        'training_samples': shards.rows(train),
+        'test_samples': shards.rows(test),
+        'shards': {'train': train, 'validation': validation, 'test': test},
+        'validation_metrics': metrics,
+        'test_metrics': test_metrics,
+        'feature_importance': importance_report.get('top_features', {}),
+        'category_importance': importance_report.get('category_importance', {})
+    })
+    return True
+
+def save_trained_model(model, args, timestamp, metadata, name_suffix=""):
+    """Save a trained model and its metadata"""
+    extension = ARTIFACT_SUFFIX if args.format == 'artifact' else '.joblib'
+    model_filename = f"{args.model_type}_model_{timestamp}{name_suffix}{extension}"
+    model_path = os.path.join(args.output_path, model_filename)
+    
+    model.save_model(model_path)
+    
+    # Save model metadata
+    metadata = dict({
+        'model_type': args.model_type,
+        'route': model.route,
+        'trained_through': model.trained_through,
+        'training_date': datetime.now().isoformat()
+    }, **metadata, model_file=model_filename)
+    
+    metadata_path = os.path.join(args.output_path, f"{args.model_type}_metadata_{timestamp}{name_suffix}.json")
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    
+    print(f"Model saved to {model_path}")
+    print(f"Metadata saved to {metadata_path}")
+    return model_filename
+
+def train_routed_models(args, X_train, X_test, y_train, y_test, timestamp):
+    """Train and save one model per value of the routing column"""
+    if args.route_by not in X_train.columns:
+        print(f"⚠️ Routing column {args.route_by} is not a model feature; no routed models trained")
+        return
+    
+    for value, count in X_train[args.route_by].value_counts().items():
+        if count < args.min_route_samples:
+            print(f"Skipping {args.route_by}={value}: {count} training samples")
+            continue
+        
+        train_rows = (X_train[args.route_by] == value).to_numpy()
+        test_rows = (X_test[args.route_by] == value).to_numpy()
+        
+        print(f"Training {args.model_type} model for {args.route_by}={value} ({count} samples)...")
+        model = TradeAIPredictionModel(model_type=args.model_type, n_jobs=args.train_jobs)
+        model.route = {'column': args.route_by, 'value': str(value)}
+        metrics = model.train(X_train[train_rows], y_train[train_rows], optimize=args.optimize,
+                              search=args.search)
+        
+        test_metrics = {}
+        if test_rows.any():
+            y_pred = model.predict(X_test[test_rows])
+            test_metrics = {
+                'mae': mean_absolute_error(y_test[test_rows], y_pred),
+                'rmse': np.sqrt(mean_squared_error(y_test[test_rows], y_pred)),
+                'r2': r2_score(y_test[test_rows], y_pred)
+            }
+            print(f"  Test R²: {test_metrics['r2']:.4f}")
+        
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', str(value)).strip('-').lower()
+        save_trained_model(model, args, timestamp, {
+            'training_samples': int(train_rows.sum()),
+            'test_samples': int(test_rows.sum()),
+            'validation_metrics': metrics,
+            'test_metrics': test_metrics,
+            'feature_importance': dict(list(model.feature_importance.items())[:10])
+        }, name_suffix=f"_{args.route_by}-{slug}")
+
 def generate_visualizations(y_true, y_pred, importance_report, args):
     """Generate visualizations of model performance"""
     print("Generating visualizations...")
@@ -228,10 +628,16 @@ def main():
     print(f"Model Type: {args.model_type}")
     print(f"Data Path: {args.data_path}")
     print(f"Output Path: {args.output_path}")
-    print(f"Hyperparameter Optimization: {'Enabled' if args.optimize else 'Disabled'}")
+    print(f"Hyperparameter Optimization: {f'Enabled ({args.search} search)' if args.optimize else 'Disabled'}")
+    print(f"Incremental: {'Enabled' if args.incremental else 'Disabled'}")
     print("=" * 80)
     
-    success = train_model(args)
+    if args.shards:
+        success = train_from_shards(args, args.shards)
+    elif streams_out_of_core(args):
+        success = train_streaming(args)
+    else:
+        success = train_model(args)
     
     if success:
         print("\n✅ Model training completed successfully!")
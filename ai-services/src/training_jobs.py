@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Trade AI Training Jobs
+This module runs model training for the prediction service as background
+jobs in a separate process, so training never blocks the API's event loop
+or competes with prediction threads for the interpreter lock.
+"""
+
+import os
+import sys
+import uuid
+import queue
+import threading
+import multiprocessing as mp
+from collections import deque, OrderedDict
+from datetime import datetime
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.model_artifact import ARTIFACT_SUFFIX
+from utils.model_search import DEFAULT_SEARCH
+
+# Columns of the prepared features holding the target and the other
+# non-feature columns
+TARGET_COLUMN = 'quantity_sold'
+NON_FEATURE_COLUMNS = [TARGET_COLUMN, 'product_name', 'date']
+
+# Progress reported at the start of each stage of a training job
+STAGE_PROGRESS = {
+    'queued': 0.0,
+    'loading_data': 0.05,
+    'preparing_features': 0.15,
+    'training': 0.3,
+    'saving': 0.9,
+    'completed': 1.0
+}
+
+
+def _train(job, model_dir, data_path, niceness, messages):
+    """
+    Train and save a model (runs in the training process).
+    
+    Progress is reported to the service as (job_id, updates) messages.
+    """
+    def report(stage, **updates):
+        messages.put((job['job_id'], dict(updates, stage=stage, progress=STAGE_PROGRESS[stage])))
+    
+    try:
+        # Prediction traffic gets the CPU first
+        if niceness:
+            os.nice(niceness)
+        
+        from src.prediction_model import TradeAIPredictionModel, PROMOTION_DEFAULTS
+        from utils.data_processor import TradeAIDataProcessor
+        
+        report('loading_data')
+        data_processor = TradeAIDataProcessor(data_path=data_path)
+        if not data_processor.load_data():
+            raise ValueError(f"Failed to load training data from {data_path}")
+        
+        report('preparing_features')
+        df = data_processor.prepare_features_for_model()
+        X = df.drop(NON_FEATURE_COLUMNS, axis=1)
+        y = df[TARGET_COLUMN]
+        # The sales history has no region or channel; train on the values
+        # serving assumes when a request omits them
+        X = X.assign(**{column: value for column, value in PROMOTION_DEFAULTS.items()
+                        if column not in X.columns})
+        
+        report('training')
+        model = TradeAIPredictionModel(model_type=job['model_type'])
+        metrics = model.train(X, y, optimize=job['optimize'], search=job['search'])
+        
+        report('saving')
+        os.makedirs(model_dir, exist_ok=True)
+        model_path = os.path.join(
+            model_dir,
+            f"{job['model_type']}_model_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ARTIFACT_SUFFIX}"
+        )
+        model.save_model(model_path)
+        
+        report('completed', status='completed', model_path=model_path, model_id=model.model_id,
+               metrics={k: float(v) for k, v in metrics.items()})
+    except Exception as e:
+        messages.put((job['job_id'], {'status': 'failed', 'error': str(e)}))
+
+
+class TrainingJobManager:
+    """
+    Queue of model training jobs run in a background process.
+    
+    Jobs run one at a time, each in a fresh (spawned) process with a lower
+    CPU priority than the service, which reports its progress through a
+    queue. A thread of the service starts the jobs and applies their
+    progress; submitting and polling jobs only touches in-memory state, so
+    both are safe to call from the event loop. A completed job's model is
+    saved to the model directory and handed to `on_complete`, e.g. to
+    activate it through the ModelRegistry.
+    """
+    
+    def __init__(self, model_dir, data_path, niceness=10, max_jobs=100, on_complete=None):
+        """
+        Initialize the job manager.
+        
+        Args:
+            model_dir (str): Directory the trained models are saved to
+            data_path (str): Directory of the training data
+            niceness (int): Increment of the training process's niceness
+            max_jobs (int): Finished jobs kept for progress queries
+            on_complete (callable): Called with each completed job
+        """
+        self.model_dir = model_dir
+        self.data_path = data_path
+        self.niceness = niceness
+        self.max_jobs = max_jobs
+        self.on_complete = on_complete
+        self._jobs = OrderedDict()
+        self._queued = deque()
+        self._process = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def submit(self, model_type="ensemble", optimize=False, search=DEFAULT_SEARCH):
+        """
+        Queue a training job.
+        
+        Args:
+            model_type (str): Type of model to train
+            optimize (bool): Whether to perform hyperparameter optimization
+            search (str): Hyperparameter search strategy
+        
+        Returns:
+            dict: The job
+        """
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'status': 'queued',
+            'stage': 'queued',
+            'progress': 0.0,
+            'model_type': model_type,
+            'optimize': optimize,
+            'search': search,
+            'created': datetime.now().isoformat(),
+            'started': None,
+            'finished': None,
+            'model_path': None,
+            'model_id': None,
+            'metrics': None,
+            'error': None
+        }
+        with self._lock:
+            self._jobs[job['job_id']] = job
+            self._queued.append(job['job_id'])
+            self._prune()
+        self._start()
+        self._wakeup.set()
+        return dict(job)
+    
+    def _prune(self):
+        """Forget the oldest finished jobs beyond max_jobs (lock held)"""
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job['status'] in ('completed', 'failed')]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+    
+    def get(self, job_id):
+        """
+        A job by ID.
+        
+        Args:
+            job_id (str): Job ID
+        
+        Returns:
+            dict: The job, or None if unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+    
+    def jobs(self):
+        """
+        Known jobs, newest first.
+        
+        Returns:
+            list: Job dicts
+        """
+        with self._lock:
+            return [dict(job) for job in reversed(self._jobs.values())]
+    
+    def pending(self):
+        """Whether a job is queued or running"""
+        with self._lock:
+            return any(job['status'] in ('queued', 'running') for job in self._jobs.values())
+    
+    def retry_after(self, default=30):
+        """
+        Seconds until the pending jobs are expected to finish, estimated
+        from the duration of the last completed job.
+        
+        Args:
+            default (int): Estimate when no job has completed yet
+        
+        Returns:
+            int: Seconds
+        """
+        with self._lock:
+            durations = [
+                (datetime.fromisoformat(job['finished']) - datetime.fromisoformat(job['started'])).total_seconds()
+                for job in self._jobs.values() if job['status'] == 'completed'
+            ]
+            running = [job for job in self._jobs.values() if job['status'] == 'running']
+            estimate = durations[-1] if durations else default
+            remaining = estimate * len(self._queued)
+            for job in running:
+                elapsed = (datetime.now() - datetime.fromisoformat(job['started'])).total_seconds()
+                remaining += max(estimate - elapsed, 0)
+        return max(1, int(round(remaining)))
+    
+    def _update(self, job_id, updates):
+        """Apply a progress message to a job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.update(updates)
+            if job['status'] in ('completed', 'failed') and job['finished'] is None:
+                job['finished'] = datetime.now().isoformat()
+            return dict(job)
+    
+    def _run_job(self, job_id):
+        """Run one job in a training process and follow its progress"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(status='running', started=datetime.now().isoformat())
+            job = dict(job)
+        
+        context = mp.get_context('spawn')
+        messages = context.Queue()
+        process = context.Process(
+            target=_train,
+            args=(job, self.model_dir, self.data_path, self.niceness, messages),
+            name=f"training-{job_id}",
+            daemon=True
+        )
+        self._process = process
+        process.start()
+        
+        finished = None
+        while finished is None:
+            try:
+                _, updates = messages.get(timeout=0.5)
+            except queue.Empty:
+                if not process.is_alive():
+                    # Exited without reporting (e.g. killed)
+                    finished = self._update(job_id, {
+                        'status': 'failed',
+                        'error': f"Training process exited with code {process.exitcode}"
+                    })
+                continue
+            job = self._update(job_id, updates)
+            if updates.get('status') in ('completed', 'failed'):
+                finished = job
+        process.join()
+        self._process = None
+        
+        if finished['status'] == 'completed':
+            print(f"Training job {job_id} saved model {finished['model_path']}")
+            if self.on_complete is not None:
+                try:
+                    self.on_complete(finished)
+                except Exception as e:
+                    print(f"Error activating model of training job {job_id}: {e}")
+        else:
+            print(f"Training job {job_id} failed: {finished['error']}")
+    
+    def _work(self):
+        """Run queued jobs until stopped"""
+        while not self._stop.is_set():
+            with self._lock:
+                job_id = self._queued.popleft() if self._queued else None
+                if job_id is None:
+                    self._wakeup.clear()
+            if job_id is None:
+                self._wakeup.wait()
+                continue
+            self._run_job(job_id)
+    
+    def _start(self):
+        """Start the worker thread if needed"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._work, name="training-jobs", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """Stop the worker thread, terminating a running training process"""
+        self._stop.set()
+        self._wakeup.set()
+        process = self._process
+        if process is not None and process.is_alive():
+            process.terminate()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        
+        with self._lock:
+            self._queued.clear()
+            for job in self._jobs.values():
+                if job['status'] in ('queued', 'running'):
+                    job.update(status='failed', error="Training service is shutting down",
+                               finished=datetime.now().isoformat())
+    
+    def stats(self):
+        """
+        Job statistics.
+        
+        Returns:
+            dict: Number of jobs by status and the running job
+        """
+        with self._lock:
+            counts = {status: 0 for status in ('queued', 'running', 'completed', 'failed')}
+            running = None
+            for job in self._jobs.values():
+                counts[job['status']] += 1
+                if job['status'] == 'running':
+                    running = {k: job[k] for k in ('job_id', 'stage', 'progress')}
+            return dict(counts, running_job=running)
@@ -0,0 +1,164 @@
+"""
+Dictionary-encoded categorical columns for the Trade AI platform.
+Product names, product categories and promotion types are held as pandas
+categoricals (integer codes into a vocabulary of distinct values) from
+ingestion through to the model's one-hot encoding, so merges and groupbys
+work on integer codes instead of hashing strings.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+# Columns held as categoricals by TradeAIDataProcessor
+CATEGORICAL_COLUMNS = ('product_name', 'product_category', 'promo_type')
+
+
+def as_categorical(df, columns=CATEGORICAL_COLUMNS):
+    """
+    Convert string columns to categoricals.
+
+    Args:
+        df (pd.DataFrame): Input dataframe
+        columns (tuple): Columns to convert; missing and already categorical
+            columns are left as they are
+
+    Returns:
+        pd.DataFrame: Dataframe with the columns as categoricals
+    """
+    converted = {
+        col: df[col].astype('category') for col in columns
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype)
+    }
+    return df.assign(**converted) if converted else df
+
+
+def lookup_codes(values, index):
+    """
+    Position of each value in an index.
+
+    Distinct values are looked up once; for categorical input that is one
+    lookup per category.
+
+    Args:
+        values (pd.Series): Values to look up
+        index (pd.Index): Index of distinct values
+
+    Returns:
+        np.ndarray: Positions in the index, -1 for missing or unknown values
+    """
+    record_codes, uniques = pd.factorize(values)
+    return np.append(index.get_indexer(uniques), -1)[record_codes]
+
+
+def fill_missing(values, fill_value):
+    """
+    Replace missing values, adding the fill value to a categorical's
+    vocabulary when needed.
+
+    Args:
+        values (pd.Series): Input values
+        fill_value: Replacement of missing values
+
+    Returns:
+        pd.Series: Values without missing values
+    """
+    if not values.hasnans:
+        return values
+    if isinstance(values.dtype, pd.CategoricalDtype) and fill_value not in values.cat.categories:
+        values = values.cat.add_categories([fill_value])
+    return values.fillna(fill_value)
+
+
+def concat_frames(frames):
+    """
+    Concatenate dataframes, keeping categorical columns categorical.
+
+    pd.concat turns categorical columns into object columns when their
+    vocabularies differ (e.g. batches read separately); their vocabularies
+    are merged first.
+
+    Args:
+        frames (list): Dataframes with the same columns
+
+    Returns:
+        pd.DataFrame: Concatenated dataframe with a fresh index
+    """
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+
+    merged = {}
+    for col in frames[0].columns:
+        dtypes = [df[col].dtype for df in frames]
+        if (all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes) and
+                any(dtype != dtypes[0] for dtype in dtypes)):
+            categories = pd.Index(np.concatenate([dtype.categories for dtype in dtypes])).unique()
+            merged[col] = pd.CategoricalDtype(categories)
+    if merged:
+        frames = [df.astype(merged) for df in frames]
+
+    return pd.concat(frames, ignore_index=True)
+
+
+class CategoryCodes(BaseEstimator, TransformerMixin):
+    """
+    Transformer mapping categorical columns to integer codes into the
+    vocabulary seen in fit.
+
+    Each column's vocabulary is its sorted distinct values, so the codes
+    one-hot encode to the same columns, in the same order, as the labels
+    themselves would. Values outside the vocabulary get code -1, which a
+    OneHotEncoder with handle_unknown='ignore' encodes as all zeros.
+    """
+
+    def fit(self, X, y=None):
+        """
+        Learn the vocabulary of each column.
+
+        Args:
+            X (pd.DataFrame): Categorical or string columns
+            y: Ignored
+
+        Returns:
+            CategoryCodes: The fitted transformer
+        """
+        X = pd.DataFrame(X)
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.vocabulary_ = [
+            pd.Index(pd.unique(X[col].dropna()), dtype=object).sort_values()
+            for col in X.columns
+        ]
+        return self
+
+    def transform(self, X):
+        """
+        Encode each column as codes into its vocabulary.
+
+        Args:
+            X (pd.DataFrame): Categorical or string columns
+
+        Returns:
+            np.ndarray: Integer codes, one column per input column
+        """
+        X = pd.DataFrame(X)
+        codes = np.empty((len(X), len(self.vocabulary_)), dtype=np.int64)
+        for i, vocabulary in enumerate(self.vocabulary_):
+            codes[:, i] = lookup_codes(X.iloc[:, i], vocabulary)
+        return codes
+
+    def get_feature_names_out(self, input_features=None):
+        """Names of the output columns (the input columns)"""
+        return self.feature_names_in_
+
+    def vocabulary(self):
+        """
+        The fitted vocabularies.
+
+        Returns:
+            dict: Column name to its list of values, in code order
+        """
+        return {
+            col: vocabulary.tolist()
+            for col, vocabulary in zip(self.feature_names_in_, self.vocabulary_)
+        }
@@ -0,0 +1,333 @@
+"""
+Columnar (Parquet/Feather) ingestion helpers for the Trade AI platform.
+Converts CSV inputs to typed Parquet caches and reads them back with column
+projection and date-range predicate pushdown.
+"""
+
+import os
+import shutil
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Rows per Parquet row group; row group statistics drive predicate pushdown
+ROW_GROUP_SIZE = 1_000_000
+
+# Bytes of CSV parsed per block when converting
+CSV_BLOCK_SIZE = 64 << 20
+
+INT32_RANGE = (-2**31, 2**31 - 1)
+
+
+def _arrow_type(dtype):
+    """Map a schema dtype name to an Arrow type"""
+    import pyarrow as pa
+
+    return {
+        'datetime': pa.timestamp('ns'),
+        'category': pa.dictionary(pa.int32(), pa.string()),
+        'string': pa.string(),
+        'int32': pa.int32(),
+        'int64': pa.int64(),
+        'float32': pa.float32(),
+        'float64': pa.float64()
+    }[dtype]
+
+
+def cast_table(table, schema):
+    """
+    Cast the columns of an Arrow table to the types of a schema.
+
+    int32 casts are only applied when the column's values fit; other columns
+    of the table are left as they are.
+
+    Args:
+        table (pyarrow.Table): Input table
+        schema (dict): Column name to dtype name
+
+    Returns:
+        pyarrow.Table: Typed table
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    for name, dtype in schema.items():
+        if name not in table.column_names:
+            continue
+        column = table[name]
+        target = _arrow_type(dtype)
+        if column.type == target:
+            continue
+        if dtype == 'int32':
+            if not pa.types.is_integer(column.type):
+                continue
+            bounds = pc.min_max(column).as_py()
+            if bounds['min'] is not None and (bounds['min'] < INT32_RANGE[0] or
+                                              bounds['max'] > INT32_RANGE[1]):
+                continue
+        table = table.set_column(table.column_names.index(name), name, column.cast(target))
+    return table
+
+
+def _widen(schema):
+    """Replace 32-bit numeric types in a schema with 64-bit ones"""
+    return {name: {'int32': 'int64', 'float32': 'float64'}.get(dtype, dtype)
+            for name, dtype in schema.items()}
+
+
+def _month_buckets(dates):
+    """Calendar month of each timestamp, with missing dates after every month"""
+    months = dates.to_numpy(zero_copy_only=False).astype('datetime64[M]')
+    return np.where(np.isnat(months), np.iinfo(np.int64).max, months.astype(np.int64))
+
+
+def _stream_csv(csv_path, output_path, schema, sort_by=None):
+    """Convert a CSV file block by block; see convert_csv"""
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    import pyarrow.parquet as pq
+
+    reader = pv.open_csv(
+        csv_path,
+        read_options=pv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+        convert_options=pv.ConvertOptions(
+            column_types={name: _arrow_type(dtype) for name, dtype in schema.items()}
+        )
+    )
+
+    if not sort_by or sort_by not in reader.schema.names:
+        with pq.ParquetWriter(output_path, reader.schema) as writer:
+            for batch in reader:
+                writer.write_table(pa.Table.from_batches([batch]), row_group_size=ROW_GROUP_SIZE)
+        return
+
+    # Bucket rows by calendar month in temporary files, then sort month by month
+    bucket_dir = output_path + '.buckets'
+    os.makedirs(bucket_dir, exist_ok=True)
+    writers = {}
+    try:
+        for batch in reader:
+            buckets = _month_buckets(batch.column(sort_by))
+            for bucket in np.unique(buckets):
+                if bucket not in writers:
+                    writers[bucket] = pq.ParquetWriter(
+                        os.path.join(bucket_dir, f"{bucket}.parquet"), reader.schema
+                    )
+                writers[bucket].write_table(
+                    pa.Table.from_batches([batch.filter(pa.array(buckets == bucket))])
+                )
+        for writer in writers.values():
+            writer.close()
+
+        with pq.ParquetWriter(output_path, reader.schema) as writer:
+            for bucket in sorted(writers):
+                table = pq.read_table(os.path.join(bucket_dir, f"{bucket}.parquet"))
+                writer.write_table(table.sort_by(sort_by), row_group_size=ROW_GROUP_SIZE)
+    finally:
+        shutil.rmtree(bucket_dir, ignore_errors=True)
+
+
+def convert_csv(csv_path, output_path, schema, sort_by=None):
+    """
+    Convert a CSV file to a typed Parquet file.
+
+    The CSV is streamed in blocks, so files larger than memory can be
+    converted. Columns are parsed straight into the schema types; if a value
+    does not fit a 32-bit column, the file is converted again with 64-bit
+    columns.
+
+    Args:
+        csv_path (str): Source CSV file
+        output_path (str): Destination Parquet file
+        schema (dict): Column name to dtype name
+        sort_by (str): Date column to sort rows by, so row group statistics
+            allow range predicates on it to skip row groups. Rows are bucketed
+            by calendar month on disk and sorted one month at a time.
+    """
+    import pyarrow as pa
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = output_path + '.tmp'
+    try:
+        _stream_csv(csv_path, tmp_path, schema, sort_by=sort_by)
+    except pa.ArrowInvalid:
+        _stream_csv(csv_path, tmp_path, _widen(schema), sort_by=sort_by)
+    os.replace(tmp_path, output_path)
+
+
+def read_unique(path, fmt, column):
+    """
+    Read the distinct values of one column, scanning it batch by batch.
+
+    Args:
+        path (str): File to read
+        fmt (str): "parquet" or "feather"
+        column (str): Column name
+
+    Returns:
+        np.ndarray: Distinct non-null values
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format='ipc' if fmt == 'feather' else 'parquet')
+    uniques = [pc.unique(batch.column(column)) for batch in dataset.to_batches(columns=[column])]
+    if not uniques:
+        return np.array([])
+    return pc.drop_null(pc.unique(pa.concat_arrays(uniques))).to_numpy(zero_copy_only=False)
+
+
+def resolve_source(data_path, name, schema, cache_path, sort_by=None):
+    """
+    Find the columnar file for a dataset, converting its CSV if needed.
+
+    A <name>.parquet or <name>.feather file in the data directory is used as
+    is. Otherwise <name>.csv is converted to a Parquet file in the cache
+    directory, which is refreshed whenever the CSV is newer than the cache.
+
+    Args:
+        data_path (str): Data directory
+        name (str): Dataset name, e.g. "sales_data"
+        schema (dict): Column name to dtype name
+        cache_path (str): Directory of converted Parquet files
+        sort_by (str): Column to sort converted rows by
+
+    Returns:
+        tuple: (file path, format) where format is "parquet" or "feather"
+    """
+    for fmt in ('parquet', 'feather'):
+        path = os.path.join(data_path, f"{name}.{fmt}")
+        if os.path.exists(path):
+            return path, fmt
+
+    csv_path = os.path.join(data_path, f"{name}.csv")
+    cached_path = os.path.join(cache_path, f"{name}.parquet")
+    if (not os.path.exists(cached_path) or
+            os.path.getmtime(cached_path) < os.path.getmtime(csv_path)):
+        convert_csv(csv_path, cached_path, schema, sort_by=sort_by)
+    return cached_path, 'parquet'
+
+
+def read_columnar(path, fmt, schema, columns=None, date_column=None,
+                  start_date=None, end_date=None, end_column=None):
+    """
+    Read a Parquet/Feather file into a typed dataframe.
+
+    Args:
+        path (str): File to read
+        fmt (str): "parquet" or "feather"
+        schema (dict): Column name to dtype name
+        columns (list): Columns to read (all columns if None)
+        date_column (str): Column the date range applies to
+        start_date (str): Keep rows on or after this date
+        end_date (str): Keep rows on or before this date
+        end_column (str): For interval data, the column holding the interval
+            end; rows are kept when [date_column, end_column] overlaps the range
+
+    Returns:
+        pd.DataFrame: Loaded data
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format='ipc' if fmt == 'feather' else 'parquet')
+
+    predicate = None
+    if start_date is not None:
+        start = pd.Timestamp(start_date).to_datetime64()
+        predicate = ds.field(end_column or date_column) >= start
+    if end_date is not None:
+        end = pd.Timestamp(end_date).to_datetime64()
+        condition = ds.field(date_column) <= end
+        predicate = condition if predicate is None else predicate & condition
+
+    table = dataset.to_table(columns=columns, filter=predicate)
+    table = cast_table(table, schema)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _partition_labels(df, column):
+    """Partition code of each record and the label of each code"""
+    if column == 'month':
+        codes, months = pd.factorize(df['date'].to_numpy().astype('datetime64[M]'))
+        return codes, np.datetime_as_string(months, unit='M')
+    codes, values = pd.factorize(df[column])
+    return codes, np.asarray(values, dtype=str)
+
+
+def write_partitioned(df, output_dir, partition_by=('month',), compression=None,
+                      basename='part-0.parquet', overwrite=True):
+    """
+    Write records as a Parquet dataset partitioned by month and/or product.
+
+    Files are laid out Hive-style, e.g.
+    <output_dir>/product_name=<name>/month=<YYYY-MM>/<basename>, so the
+    partition columns are restored when the directory is read back as a
+    dataset; they are not repeated inside the files. Records keep their
+    order within each partition, and partitions are written in parallel.
+
+    Args:
+        df (pd.DataFrame): Dataframe with a date column
+        output_dir (str): Dataset directory
+        partition_by (tuple): Partition columns, outermost first; "month" is
+            the calendar month of the date column
+        compression (str): Parquet codec, e.g. "zstd" (uncompressed if None)
+        basename (str): File name within each partition directory
+        overwrite (bool): Remove the dataset directory first
+
+    Returns:
+        int: Number of partitions written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if overwrite and os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+
+    # One integer key per record over all partition columns
+    keys = np.zeros(len(df), dtype=np.int64)
+    labels = []
+    for column in partition_by:
+        codes, column_labels = _partition_labels(df, column)
+        keys = keys * (len(column_labels) + 1) + codes + 1
+        labels.append(column_labels)
+
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=np.int64)
+    stops = np.append(starts[1:], len(keys))
+
+    data_columns = [c for c in df.columns if c not in partition_by]
+    table = pa.Table.from_pandas(df[data_columns], preserve_index=False).take(order)
+
+    def write(start, stop):
+        key = keys[start]
+        segments = []
+        for column, column_labels in zip(reversed(partition_by), reversed(labels)):
+            key, code = divmod(key, len(column_labels) + 1)
+            label = column_labels[code - 1] if code else '__HIVE_DEFAULT_PARTITION__'
+            segments.append(f"{column}={quote(label, safe='')}")
+        directory = os.path.join(output_dir, *reversed(segments))
+        os.makedirs(directory, exist_ok=True)
+        pq.write_table(table.slice(start, stop - start), os.path.join(directory, basename),
+                       compression=compression or 'none', row_group_size=ROW_GROUP_SIZE)
+
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(write, starts, stops))
+    return len(starts)
+
+
+def write_text(path, text, compression=None):
+    """
+    Write text to a file, optionally through an Arrow compression codec.
+
+    Args:
+        path (str): Destination file
+        text (str): Content
+        compression (str): Codec, e.g. "zstd" (uncompressed if None)
+    """
+    import pyarrow as pa
+
+    with pa.output_stream(path, compression=compression) as stream:
+        stream.write(text.encode('utf-8'))
@@ -0,0 +1,249 @@
+"""
+Compiled inference for tree-ensemble models of the Trade AI platform.
+Flattens the fitted trees of a random forest into contiguous node arrays and
+evaluates them without sklearn's per-call validation and job dispatch.
+"""
+
+import numpy as np
+
+# Inference backends of CompiledForest
+BACKENDS = ('auto', 'numpy', 'numba')
+
+# (tree, sample) pairs routed together by the NumPy traversal
+TRAVERSAL_PAIRS = 1 << 16
+
+# Node arrays of a compiled forest, as saved in model artifacts
+ARRAYS = ('children', 'feature', 'threshold', 'value', 'is_leaf', 'missing_left', 'roots')
+
+# Samples from which the "auto" backend without Numba evaluates the trees
+# one at a time with sklearn's compiled tree kernel instead, which is faster
+# than stepping NumPy arrays level by level once each tree sees many samples
+NATIVE_MIN_SAMPLES = 500
+
+_numba_kernel = None
+
+
+def _load_numba_kernel():
+    """Compile the Numba traversal kernel, or return None without Numba"""
+    global _numba_kernel
+    if _numba_kernel is None:
+        try:
+            from numba import njit, prange
+        except ImportError:
+            _numba_kernel = False
+            return None
+
+        @njit(parallel=True)
+        def traverse(X, roots, feature, threshold, children, is_leaf, missing_left, value):
+            out = np.zeros(X.shape[0])
+            for i in prange(X.shape[0]):
+                total = 0.0
+                for t in range(roots.shape[0]):
+                    node = roots[t]
+                    while not is_leaf[node]:
+                        x = X[i, feature[node]]
+                        if np.isnan(x):
+                            go_left = missing_left[node]
+                        else:
+                            go_left = x <= threshold[node]
+                        node = children[2 * node + (1 if go_left else 0)]
+                    total += value[node]
+                out[i] = total
+            return out
+
+        _numba_kernel = traverse
+    return _numba_kernel or None
+
+
+def _float32_thresholds(thresholds):
+    """
+    Largest float32 not above each float64 threshold.
+
+    For any float32 input x, x <= threshold exactly when x <= this value, so
+    float32 inputs can be compared against float32 thresholds.
+    """
+    lowered = thresholds.astype(np.float32)
+    above = lowered.astype(np.float64) > thresholds
+    lowered[above] = np.nextafter(lowered[above], np.float32(-np.inf))
+    return lowered
+
+
+class CompiledForest:
+    """
+    A fitted single-output forest regressor flattened into node arrays.
+
+    The nodes of all trees are concatenated into feature, threshold,
+    children and value arrays. Samples are routed down a group of trees at
+    once, one tree level per step, dropping (tree, sample) pairs as they
+    reach a leaf, or with a Numba kernel when Numba is installed.
+
+    Predictions are bit-identical to the forest's predict: inputs are
+    compared as float32 like sklearn does (against thresholds rounded down
+    to float32, which gives the same decisions), missing values follow each
+    node's learned direction, and per-tree values are summed in tree order
+    before dividing by the number of trees.
+    """
+
+    def __init__(self, forest, backend='auto'):
+        """
+        Compile a fitted forest.
+
+        Args:
+            forest (RandomForestRegressor): Fitted single-output forest
+                (ExtraTreesRegressor is supported too)
+            backend (str): "numpy", "numba", or "auto" for Numba when
+                installed and otherwise NumPy, with sklearn's tree kernel for
+                batches of NATIVE_MIN_SAMPLES or more
+        """
+        if not self.supports(forest):
+            raise ValueError("Only fitted single-output random forest regressors can be compiled")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend: {backend}")
+
+        self.trees = [estimator.tree_ for estimator in forest.estimators_]
+        counts = np.array([tree.node_count for tree in self.trees], dtype=np.int64)
+        offsets = np.cumsum(counts) - counts
+        shift = np.repeat(offsets, counts)
+
+        left = np.concatenate([tree.children_left for tree in self.trees])
+        right = np.concatenate([tree.children_right for tree in self.trees])
+        self.is_leaf = left < 0
+        nodes = np.arange(len(left))
+
+        # Children of node n at 2n (right) and 2n + 1 (left); leaves point to themselves
+        self.children = np.empty(2 * len(left), dtype=np.int32)
+        self.children[0::2] = np.where(self.is_leaf, nodes, right + shift)
+        self.children[1::2] = np.where(self.is_leaf, nodes, left + shift)
+
+        features = np.concatenate([tree.feature for tree in self.trees])
+        self.feature = np.where(self.is_leaf, 0, features).astype(np.int32)
+        self.threshold = _float32_thresholds(np.concatenate([tree.threshold for tree in self.trees]))
+        self.value = np.concatenate([tree.value[:, 0, 0] for tree in self.trees]).astype(np.float64)
+        if all(hasattr(tree, 'missing_go_to_left') for tree in self.trees):
+            missing_left = np.concatenate([tree.missing_go_to_left for tree in self.trees]).astype(bool)
+        else:
+            missing_left = np.zeros(len(left), dtype=bool)
+        self.missing_left = missing_left & ~self.is_leaf
+
+        self.roots = offsets.astype(np.int32)
+        self.depth = max(tree.max_depth for tree in self.trees)
+        self.n_features = forest.n_features_in_
+        self._select_backend(backend)
+
+    @classmethod
+    def from_arrays(cls, arrays, depth, n_features, backend='auto'):
+        """
+        Rebuild a compiled forest from its node arrays, e.g. memory-mapped
+        from a model artifact. Without the sklearn trees, every batch size
+        uses the NumPy (or Numba) traversal.
+
+        Args:
+            arrays (dict): Node arrays, keyed by the names in ARRAYS
+            depth (int): Depth of the deepest tree
+            n_features (int): Number of input features
+            backend (str): "numpy", "numba" or "auto"
+
+        Returns:
+            CompiledForest: The compiled forest
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend: {backend}")
+
+        compiled = cls.__new__(cls)
+        compiled.trees = None
+        for name in ARRAYS:
+            setattr(compiled, name, arrays[name])
+        compiled.depth = int(depth)
+        compiled.n_features = int(n_features)
+        compiled._select_backend(backend)
+        return compiled
+
+    def _select_backend(self, backend):
+        """Load the Numba kernel if the backend uses it"""
+        kernel = _load_numba_kernel() if backend in ('auto', 'numba') else None
+        if backend == 'numba' and kernel is None:
+            raise ImportError("The numba backend requires Numba to be installed")
+        self._kernel = kernel
+        self.backend = 'numba' if kernel is not None else backend
+
+    @staticmethod
+    def supports(estimator):
+        """Whether an estimator can be compiled"""
+        from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor
+
+        return (isinstance(estimator, (RandomForestRegressor, ExtraTreesRegressor)) and
+                hasattr(estimator, 'estimators_') and estimator.n_outputs_ == 1)
+
+    def predict(self, X):
+        """
+        Predict with the compiled trees.
+
+        Args:
+            X (np.ndarray or sparse matrix): Model input, as passed to the
+                forest's predict
+
+        Returns:
+            np.ndarray: Predictions
+        """
+        if hasattr(X, 'toarray'):
+            X = X.toarray()
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input with {self.n_features} features")
+
+        n_trees = len(self.roots)
+        if self._kernel is not None:
+            total = self._kernel(X, self.roots, self.feature, self.threshold, self.children,
+                                 self.is_leaf, self.missing_left, self.value)
+        elif self.backend == 'auto' and self.trees is not None and X.shape[0] >= NATIVE_MIN_SAMPLES:
+            total = self._predict_native(X)
+        else:
+            total = self._predict_vectorized(X)
+        return total / n_trees
+
+    def _predict_native(self, X):
+        """Sum of the tree predictions, one sklearn tree kernel call per tree"""
+        total = self.trees[0].predict(X).reshape(-1).copy()
+        for tree in self.trees[1:]:
+            total += tree.predict(X).reshape(-1)
+        return total
+
+    def _predict_vectorized(self, X):
+        """Sum of the tree predictions, routing groups of trees level by level"""
+        n_samples = X.shape[0]
+        flat = X.ravel()
+        has_missing = bool(np.isnan(flat).any())
+        rows = np.arange(n_samples, dtype=np.int64) * self.n_features
+        group_size = max(1, TRAVERSAL_PAIRS // max(n_samples, 1))
+
+        total = None
+        for start in range(0, len(self.roots), group_size):
+            roots = self.roots[start:start + group_size]
+            leaves = np.repeat(roots, n_samples)
+            pairs = np.arange(len(leaves))
+            nodes = leaves.copy()
+            row_starts = np.tile(rows, len(roots))
+
+            for _ in range(self.depth):
+                values = flat[row_starts + self.feature[nodes]]
+                go_left = values <= self.threshold[nodes]
+                if has_missing:
+                    go_left |= np.isnan(values) & self.missing_left[nodes]
+                nodes = self.children[2 * nodes + go_left]
+
+                # Drop the pairs that reached a leaf
+                done = self.is_leaf[nodes]
+                if done.any():
+                    leaves[pairs[done]] = nodes[done]
+                    pending = ~done
+                    pairs, nodes, row_starts = pairs[pending], nodes[pending], row_starts[pending]
+                    if not len(pairs):
+                        break
+
+            # Sum the trees in order, as the forest does
+            for values in self.value[leaves].reshape(len(roots), n_samples):
+                if total is None:
+                    total = values.copy()
+                else:
+                    total += values
+        return total
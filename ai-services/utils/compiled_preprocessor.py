@@ -0,0 +1,163 @@
+"""
+Compiled preprocessing for the prediction model of the Trade AI platform.
+Exports the fitted ColumnTransformer (scaled numeric features and one-hot
+encoded categorical codes) as plain arrays and dicts, so request payloads
+are encoded straight into a dense row buffer without building a dataframe.
+The compiled form is saved in model artifacts as JSON, so serving processes
+encode requests without importing sklearn.
+"""
+
+import numpy as np
+
+
+class CompiledPreprocessor:
+    """
+    The model's fitted preprocessor as arrays and lookup dicts.
+
+    Numeric features are scaled with the StandardScaler's means and scales;
+    each categorical feature has a dict from value to the output column of
+    its one-hot indicator. Values outside the training vocabulary (and
+    missing values) get the column of the missing-value indicator when the
+    training data had missing values, and otherwise no indicator, as with
+    CategoryCodes followed by OneHotEncoder(handle_unknown='ignore').
+
+    The output equals the ColumnTransformer's (as a dense array).
+    """
+
+    def __init__(self, preprocessor, dtype=np.float64):
+        """
+        Compile a fitted preprocessor.
+
+        Args:
+            preprocessor (ColumnTransformer): Fitted preprocessor, as created
+                by TradeAIPredictionModel
+            dtype: Output dtype (np.float32 for tree models, which compare
+                float32 inputs)
+        """
+        if not self.supports(preprocessor):
+            raise ValueError("Only the prediction model's fitted preprocessor can be compiled")
+
+        numerical = preprocessor.named_transformers_['num'].named_steps['scaler']
+        categorical = preprocessor.named_transformers_['cat']
+        codes = categorical.named_steps['codes']
+        onehot = categorical.named_steps['onehot']
+
+        self.numerical_features = list(preprocessor.transformers_[0][2])
+        self.categorical_features = list(preprocessor.transformers_[1][2])
+        self.mean = np.asarray(numerical.mean_, dtype=np.float64)
+        self.scale = np.asarray(numerical.scale_, dtype=np.float64)
+        self.dtype = dtype
+
+        # Output column of each value's indicator, after the numeric columns
+        self.lookups = []
+        self.missing_columns = []
+        offset = len(self.numerical_features)
+        for vocabulary, encoded in zip(codes.vocabulary_, onehot.categories_):
+            lookup = {}
+            missing = -1
+            for column, code in enumerate(encoded, start=offset):
+                if code < 0:
+                    missing = column
+                else:
+                    lookup[vocabulary[code]] = column
+            self.lookups.append(lookup)
+            self.missing_columns.append(missing)
+            offset += len(encoded)
+        self.n_features_out = offset
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Rebuild a compiled preprocessor from its state (see state()).
+
+        Args:
+            state (dict): State, as returned by state()
+
+        Returns:
+            CompiledPreprocessor: The compiled preprocessor
+        """
+        compiled = cls.__new__(cls)
+        compiled.numerical_features = list(state['numerical_features'])
+        compiled.categorical_features = list(state['categorical_features'])
+        compiled.mean = np.asarray(state['mean'], dtype=np.float64)
+        compiled.scale = np.asarray(state['scale'], dtype=np.float64)
+        compiled.dtype = np.dtype(state['dtype']).type
+        compiled.lookups = [{value: column for value, column in lookup} for lookup in state['lookups']]
+        compiled.missing_columns = list(state['missing_columns'])
+        compiled.n_features_out = int(state['n_features_out'])
+        return compiled
+
+    def state(self):
+        """
+        JSON-serializable state of the compiled preprocessor.
+
+        Returns:
+            dict: Feature names, scaler arrays, dtype and indicator columns
+        """
+        return {
+            'numerical_features': self.numerical_features,
+            'categorical_features': self.categorical_features,
+            'mean': self.mean.tolist(),
+            'scale': self.scale.tolist(),
+            'dtype': np.dtype(self.dtype).name,
+            # (value, column) pairs, since JSON object keys are strings
+            'lookups': [sorted(lookup.items(), key=lambda item: item[1]) for lookup in self.lookups],
+            'missing_columns': self.missing_columns,
+            'n_features_out': self.n_features_out
+        }
+
+    @staticmethod
+    def supports(preprocessor):
+        """Whether a fitted preprocessor can be compiled"""
+        from sklearn.compose import ColumnTransformer
+        from sklearn.preprocessing import StandardScaler, OneHotEncoder
+        from utils.categorical import CategoryCodes
+
+        if not isinstance(preprocessor, ColumnTransformer) or not hasattr(preprocessor, 'transformers_'):
+            return False
+        transformers = [(name, transformer) for name, transformer, _ in preprocessor.transformers_
+                        if name != 'remainder']
+        if [name for name, _ in transformers] != ['num', 'cat']:
+            return False
+        (_, numerical), (_, categorical) = transformers
+        if not hasattr(numerical, 'named_steps') or not hasattr(categorical, 'named_steps'):
+            return False
+        scaler = numerical.named_steps.get('scaler')
+        codes = categorical.named_steps.get('codes')
+        onehot = categorical.named_steps.get('onehot')
+        return (list(numerical.named_steps) == ['scaler'] and isinstance(scaler, StandardScaler) and
+                scaler.with_mean and scaler.with_std and
+                list(categorical.named_steps) == ['codes', 'onehot'] and
+                isinstance(codes, CategoryCodes) and isinstance(onehot, OneHotEncoder) and
+                onehot.drop is None and onehot.handle_unknown == 'ignore' and
+                getattr(onehot, 'max_categories', None) is None and
+                getattr(onehot, 'min_frequency', None) is None)
+
+    def transform(self, columns):
+        """
+        Encode feature values into a dense row buffer.
+
+        Args:
+            columns (dict): Feature name to its values, one per row (numbers,
+                None for missing, for numeric features; labels for
+                categorical features)
+
+        Returns:
+            np.ndarray: Model input, one row per record
+        """
+        n_rows = len(columns[self.numerical_features[0]])
+        out = np.zeros((n_rows, self.n_features_out), dtype=self.dtype)
+
+        numeric = np.empty((n_rows, len(self.numerical_features)), dtype=np.float64)
+        for i, feature in enumerate(self.numerical_features):
+            numeric[:, i] = np.asarray(columns[feature], dtype=np.float64)
+        numeric -= self.mean
+        numeric /= self.scale
+        out[:, :len(self.numerical_features)] = numeric
+
+        rows = np.arange(n_rows)
+        for feature, lookup, missing in zip(self.categorical_features, self.lookups, self.missing_columns):
+            hot = np.array([lookup.get(value, missing) for value in columns[feature]], dtype=np.int64)
+            known = hot >= 0
+            out[rows[known], hot[known]] = 1
+        return out
@@ -5,6 +5,198 @@ import json
 import os
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.impute import SimpleImputer
+from utils.product_catalog import ProductTable, load_catalog
+from utils.categorical import as_categorical, lookup_codes, fill_missing, concat_frames
+
+# Window (in days) of the rolling seasonality and volatility features
+ROLLING_WINDOW = 30
+
+# Columns produced by prepare_features_for_model
+MODEL_FEATURES = [
+    'product_name', 'date', 'product_category', 'base_price', 'discount_percentage',
+    'promo_type', 'is_promo', 'avg_monthly_sales', 'sales_volatility',
+    'seasonality_index', 'competitor_intensity', 'margin_percentage'
+]
+TARGET_COLUMN = 'quantity_sold'
+
+# Columns produced by calculate_rolling_features
+ROLLING_FEATURES = ['seasonality_index', 'sales_volatility', 'avg_monthly_sales']
+
+# Records below which calculate_rolling_features runs in a single process
+PARALLEL_MIN_ROWS = 500_000
+
+# Typed schemas of the columnar ingestion path
+SALES_SCHEMA = {
+    'date': 'datetime',
+    'product_name': 'category',
+    'quantity_sold': 'int32',
+    'revenue': 'float32'
+}
+PROMO_SCHEMA = {
+    'product_name': 'category',
+    'promo_start_date': 'datetime',
+    'promo_end_date': 'datetime',
+    'promo_type': 'category',
+    'discount_percentage': 'float64'
+}
+
+# Product-level aggregations written by export_processed_data
+PRODUCT_AGGREGATIONS = {
+    'quantity_sold': 'sum',
+    'base_price': 'mean',
+    'discount_percentage': 'mean',
+    'is_promo': 'mean',
+    'avg_monthly_sales': 'mean',
+    'sales_volatility': 'mean',
+    'seasonality_index': 'mean',
+    'competitor_intensity': 'mean',
+    'margin_percentage': 'mean',
+    'product_category': 'first'
+}
+PRODUCT_AGGREGATE_NAMES = {
+    'is_promo': 'promo_frequency',
+    'quantity_sold': 'total_sales'
+}
+
+# Compression codecs of export_processed_data and the suffixes of compressed text files
+EXPORT_COMPRESSION_SUFFIXES = {'zstd': '.zst', 'gzip': '.gz'}
+
+def _exact_values(values):
+    """
+    Values as int64 when they are all whole numbers, so that their cumulative
+    sums are exact, and as float64 otherwise.
+    """
+    if np.issubdtype(values.dtype, np.integer):
+        return values.astype(np.int64)
+    values = values.astype(np.float64)
+    if len(values) and np.isfinite(values).all() and np.array_equal(values, np.round(values)):
+        return values.astype(np.int64)
+    return values
+
+def _window_sums(values, lower):
+    """Sum of values[lower[i]:i + 1] for every i, taken from cumulative sums"""
+    cumulative = np.concatenate([np.zeros(1, dtype=values.dtype), np.cumsum(values)])
+    return cumulative[1:] - cumulative[lower]
+
+def _rolling_std(values, lower):
+    """
+    Sample standard deviation of values[lower[i]:i + 1] for every i.
+    
+    For integer values the window sums are exact, so each result depends only
+    on the values in its window and not on where the series starts; chunked
+    computations match a single pass exactly.
+    
+    Args:
+        values (np.ndarray): Values, as returned by _exact_values
+        lower (np.ndarray): Index of the first value of each window
+        
+    Returns:
+        np.ndarray: Standard deviations (NaN for single-value windows)
+    """
+    counts = np.arange(1, len(values) + 1) - lower
+    
+    # n * sum(x^2) must fit in int64 for the exact integer numerator
+    exact = values.dtype == np.int64 and len(values) and np.abs(values).max() * counts.max() < 2**31
+    if not exact:
+        values = values.astype(np.float64)
+    s1 = _window_sums(values, lower)
+    s2 = _window_sums(values * values, lower)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if exact:
+            variance = (counts * s2 - s1 * s1) / (counts * (counts - 1.0))
+        else:
+            variance = (s2 - s1 * s1 / counts) / (counts - 1.0)
+        return np.sqrt(np.maximum(variance, 0))
+
+def _segment_starts(*keys):
+    """Indices where any of the (sorted) key arrays changes value"""
+    if not len(keys[0]):
+        return np.array([], dtype=np.int64)
+    changed = np.zeros(len(keys[0]), dtype=bool)
+    changed[0] = True
+    for key in keys:
+        changed[1:] |= key[1:] != key[:-1]
+    return np.flatnonzero(changed)
+
+def _rolling_feature_block(keys, quantity, recorded, calendar, axis, window):
+    """
+    Rolling features of a block of records holding whole products.
+    
+    Args:
+        keys (np.ndarray): Product code * len(calendar) + position of the
+            record's date in calendar
+        quantity (np.ndarray): Quantity sold, as returned by _exact_values
+        recorded (np.ndarray): Whether the quantity was recorded
+        calendar (np.ndarray): Distinct record dates, sorted
+        axis (np.ndarray): Dates of the seasonality window axis, sorted
+        window (int): Rolling window size
+        
+    Returns:
+        list: seasonality_index, sales_volatility and avg_monthly_sales of each
+            record, in block order
+    """
+    # Sort records by product and date
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    
+    # Daily totals
+    day_starts = _segment_starts(keys)
+    day_rows = np.diff(np.append(day_starts, len(order)))
+    totals = np.add.reduceat(quantity[order], day_starts)
+    day_codes, day_ranks = np.divmod(keys[day_starts], len(calendar))
+    positions = np.arange(len(day_starts))
+    
+    # Volatility: window over the product's own daily totals
+    product_starts = np.zeros(len(day_starts), dtype=np.int64)
+    first_days = _segment_starts(day_codes)
+    product_starts[first_days] = first_days
+    product_starts = np.maximum.accumulate(product_starts)
+    volatility = _rolling_std(totals, np.maximum(positions - window + 1, product_starts))
+    volatility = np.nan_to_num(volatility, nan=0.0)
+    
+    # Seasonality: window over the date axis
+    calendar_slots = np.searchsorted(axis, calendar)
+    calendar_on_axis = (axis[np.minimum(calendar_slots, len(axis) - 1)] == calendar) if len(axis) \
+        else np.zeros(len(calendar), dtype=bool)
+    slots, on_axis = calendar_slots[day_ranks], calendar_on_axis[day_ranks]
+    stride = len(axis) + 1
+    lower = np.searchsorted(day_codes * stride + slots,
+                            day_codes * stride + np.maximum(slots - window + 1, 0))
+    window_sums = _window_sums(np.where(on_axis, totals, 0), lower)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        seasonality = totals / (window_sums / np.minimum(slots + 1, window))
+    # Replace inf and NaN with 1 (neutral seasonality)
+    seasonality[~on_axis | ~np.isfinite(seasonality)] = 1
+    
+    # Monthly mean per record
+    day_months = calendar.astype('datetime64[M]')[day_ranks]
+    month_starts = _segment_starts(day_codes, day_months)
+    month_days = np.diff(np.append(month_starts, len(day_starts)))
+    day_records = np.add.reduceat(recorded[order].astype(np.int64), day_starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        monthly = (np.add.reduceat(totals, month_starts) /
+                   np.add.reduceat(day_records, month_starts))
+    monthly = np.repeat(monthly, month_days)
+    
+    block = []
+    for daily_values in (seasonality, volatility, monthly):
+        values = np.empty(len(order))
+        values[order] = np.repeat(daily_values, day_rows)
+        block.append(values)
+    return block
+
+def _rolling_feature_shard(task):
+    """Worker process: rolling features of one shard of shared records"""
+    from utils.shared_arrays import attach
+    
+    inputs, outputs, start, stop, calendar, axis, window = task
+    with attach(inputs + outputs) as arrays:
+        keys, quantity, recorded = (array[start:stop] for array in arrays[:3])
+        block = _rolling_feature_block(keys, quantity, recorded, calendar, axis, window)
+        for array, values in zip(arrays[3:], block):
+            array[start:stop] = values
+        del keys, quantity, recorded
 
 class TradeAIDataProcessor:
     """
@@ -12,25 +204,54 @@ class TradeAIDataProcessor:
     Handles data loading, cleaning, feature engineering, and preparation for ML models.
     """
     
-    def __init__(self, data_path=None):
+    def __init__(self, data_path=None, feature_store_path=None, cache_path=None, n_jobs=1):
         """
         Initialize the data processor.
         
         Args:
             data_path (str): Path to the data directory
+            feature_store_path (str): Directory of a persistent feature store
+                used by prepare_features_for_model (optional)
+            cache_path (str): Directory of the Parquet files converted from CSV
+                by columnar loading (defaults to <data_path>/.columnar_cache)
+            n_jobs (int): Worker processes for the per-product rolling features
+                of large datasets (-1 for one per CPU core)
         """
         self.data_path = data_path
+        self.cache_path = cache_path
+        self.n_jobs = n_jobs
         self.sales_df = None
         self.promo_df = None
         self.product_catalog = None
+        self._product_table = None
+        self._product_table_source = None
+        self._feature_index = None
         self.company_profile = None
+        self.feature_store = None
         
-    def load_data(self, data_path=None):
+        if feature_store_path:
+            from utils.feature_store import FeatureStore
+            self.feature_store = FeatureStore(feature_store_path, self)
+        
+    def load_data(self, data_path=None, columnar=False, columns=None,
+                  start_date=None, end_date=None, load_sales=True):
         """
         Load all required data files.
         
+        In columnar mode sales and promotional data are read from Parquet or
+        Feather files with the typed SALES_SCHEMA/PROMO_SCHEMA. A CSV without
+        a columnar copy is converted once and cached as Parquet, sorted by date.
+        
         Args:
             data_path (str): Path to the data directory (overrides init path)
+            columnar (bool): Read sales and promotional data from columnar files
+            columns (list): Sales columns to read (columnar mode only)
+            start_date (str): Only read sales from this date on, and promotions
+                running on or after it (columnar mode only)
+            end_date (str): Only read sales up to this date, and promotions
+                starting on or before it (columnar mode only)
+            load_sales (bool): Load the sales history into memory. Pass False
+                when it is streamed with iter_features_for_model.
             
         Returns:
             bool: True if data loaded successfully
@@ -41,19 +262,31 @@ class TradeAIDataProcessor:
         if not self.data_path:
             raise ValueError("Data path not specified")
             
-        try:
-            # Load sales data
-            sales_path = os.path.join(self.data_path, "sales_data.csv")
-            self.sales_df = pd.read_csv(sales_path)
+        if not columnar and (columns or start_date or end_date):
+            raise ValueError("Column projection and date filters require columnar=True")
             
-            # Load promotional data
-            promo_path = os.path.join(self.data_path, "promotional_data.csv")
-            self.promo_df = pd.read_csv(promo_path)
+        try:
+            if columnar:
+                self._load_columnar(columns, start_date, end_date, load_sales)
+            else:
+                # Load sales data
+                if load_sales:
+                    sales_path = os.path.join(self.data_path, "sales_data.csv")
+                    self.sales_df = pd.read_csv(sales_path, dtype={'product_name': 'category'})
+                    # Exports that name the revenue column total_revenue (e.g. test_data)
+                    if 'revenue' not in self.sales_df.columns and 'total_revenue' in self.sales_df.columns:
+                        self.sales_df = self.sales_df.rename(columns={'total_revenue': 'revenue'})
+                
+                # Load promotional data
+                promo_path = os.path.join(self.data_path, "promotional_data.csv")
+                self.promo_df = pd.read_csv(
+                    promo_path, dtype={'product_name': 'category', 'promo_type': 'category'}
+                )
             
-            # Load product catalog
+            # Load product catalog, compiled once per version of the file
             catalog_path = os.path.join(self.data_path, "product_catalog.json")
-            with open(catalog_path, 'r') as f:
-                self.product_catalog = json.load(f)
+            self.product_catalog, self._product_table = load_catalog(catalog_path)
+            self._product_table_source = self.product_catalog
                 
             # Load company profile
             profile_path = os.path.join(self.data_path, "company_profile.json")
@@ -65,21 +298,55 @@ class TradeAIDataProcessor:
             print(f"Error loading data: {e}")
             return False
     
-    def clean_sales_data(self):
+    def _columnar_source(self, name, schema, sort_by=None):
+        """Resolve the columnar file of a dataset, converting its CSV if needed"""
+        from utils.columnar_io import resolve_source
+        
+        cache_path = self.cache_path or os.path.join(self.data_path, '.columnar_cache')
+        return resolve_source(self.data_path, name, schema, cache_path, sort_by=sort_by)
+    
+    def _load_columnar(self, columns=None, start_date=None, end_date=None, load_sales=True):
+        """Load sales and promotional data from typed columnar files"""
+        from utils.columnar_io import read_columnar
+        
+        if load_sales:
+            sales_path, sales_format = self._columnar_source('sales_data', SALES_SCHEMA, sort_by='date')
+            self.sales_df = read_columnar(
+                sales_path, sales_format, SALES_SCHEMA, columns=columns,
+                date_column='date', start_date=start_date, end_date=end_date
+            )
+        
+        promo_path, promo_format = self._columnar_source('promotional_data', PROMO_SCHEMA)
+        self.promo_df = read_columnar(
+            promo_path, promo_format, PROMO_SCHEMA,
+            date_column='promo_start_date', end_column='promo_end_date',
+            start_date=start_date, end_date=end_date
+        )
+    
+    def clean_sales_data(self, df=None):
         """
         Clean and preprocess sales data.
         
+        Product names are converted to categoricals (see utils/categorical.py).
+        
+        Args:
+            df (pd.DataFrame): Raw sales records to clean (defaults to the
+                loaded sales data)
+        
         Returns:
             pd.DataFrame: Cleaned sales dataframe
         """
-        if self.sales_df is None:
-            raise ValueError("Sales data not loaded. Call load_data() first.")
+        if df is None:
+            if self.sales_df is None:
+                raise ValueError("Sales data not loaded. Call load_data() first.")
+            df = self.sales_df
             
         # Make a copy to avoid modifying the original
-        df = self.sales_df.copy()
+        df = as_categorical(df.copy())
         
-        # Convert date to datetime
-        df['date'] = pd.to_datetime(df['date'])
+        # Convert date to datetime (columnar loading already parsed it)
+        if not pd.api.types.is_datetime64_any_dtype(df['date']):
+            df['date'] = pd.to_datetime(df['date'])
         
         # Handle missing values
         df['quantity_sold'].fillna(0, inplace=True)
@@ -106,6 +373,8 @@ class TradeAIDataProcessor:
         """
         Clean and preprocess promotional data.
         
+        Product names and promotion types are converted to categoricals.
+        
         Returns:
             pd.DataFrame: Cleaned promotional dataframe
         """
@@ -113,11 +382,12 @@ class TradeAIDataProcessor:
             raise ValueError("Promotional data not loaded. Call load_data() first.")
             
         # Make a copy to avoid modifying the original
-        df = self.promo_df.copy()
+        df = as_categorical(self.promo_df.copy())
         
-        # Convert dates to datetime
-        df['promo_start_date'] = pd.to_datetime(df['promo_start_date'])
-        df['promo_end_date'] = pd.to_datetime(df['promo_end_date'])
+        # Convert dates to datetime (columnar loading already parsed them)
+        for col in ['promo_start_date', 'promo_end_date']:
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(df[col])
         
         # Calculate promotion duration
         df['promo_duration'] = (df['promo_end_date'] - df['promo_start_date']).dt.days + 1
@@ -143,25 +413,118 @@ class TradeAIDataProcessor:
         # Clean data
         sales_df = self.clean_sales_data()
         promo_df = self.clean_promo_data()
-        
-        # Create a flag for promotional periods
+
+        return self.tag_promotions(sales_df, promo_df)
+
+    def tag_promotions(self, sales_df, promo_df):
+        """
+        Tag sales records with the promotion running on their product and day.
+
+        Promotions are expanded to one key per (product, day) they cover, so the
+        whole calendar is matched against the sales rows with a single sorted
+        lookup instead of one boolean mask per promotion. Promotions cover whole
+        calendar days, from promo_start_date through promo_end_date inclusive.
+
+        When promotions for the same product overlap, the one that started most
+        recently wins; if they started on the same day, the one listed last in
+        the promotional data wins.
+
+        Args:
+            sales_df (pd.DataFrame): Cleaned sales dataframe
+            promo_df (pd.DataFrame): Cleaned promotional dataframe
+
+        Returns:
+            pd.DataFrame: Sales dataframe with is_promo, promo_type (categorical)
+                and discount_percentage columns
+        """
         result_df = sales_df.copy()
-        result_df['is_promo'] = 0
-        result_df['promo_type'] = None
-        result_df['discount_percentage'] = 0
-        
-        # For each promotion, mark the corresponding sales records
-        for _, promo in promo_df.iterrows():
-            mask = ((result_df['date'] >= promo['promo_start_date']) & 
-                   (result_df['date'] <= promo['promo_end_date']) & 
-                   (result_df['product_name'] == promo['product_name']))
-            
-            result_df.loc[mask, 'is_promo'] = 1
-            result_df.loc[mask, 'promo_type'] = promo['promo_type']
-            result_df.loc[mask, 'discount_percentage'] = promo['discount_percentage']
-        
+        n_rows = len(result_df)
+
+        is_promo = np.zeros(n_rows, dtype=np.int64)
+        promo_types = promo_df['promo_type'].astype('category')
+        promo_type = np.full(n_rows, -1, dtype=promo_types.cat.codes.dtype)
+        discount = np.zeros(n_rows, dtype=np.float64)
+
+        promo_start = promo_df['promo_start_date'].values.astype('datetime64[D]').astype(np.int64)
+        promo_end = promo_df['promo_end_date'].values.astype('datetime64[D]').astype(np.int64)
+
+        # Integer product codes shared by both sides of the join
+        promo_codes, products = pd.factorize(promo_df['product_name'])
+        valid = ((promo_codes >= 0) &
+                 promo_df['promo_start_date'].notna().values &
+                 promo_df['promo_end_date'].notna().values)
+        duration = np.where(valid, np.maximum(promo_end - promo_start + 1, 0), 0)
+
+        if n_rows and duration.sum():
+            sales_codes = lookup_codes(result_df['product_name'], products)
+
+            # Expand every promotion to the days it covers
+            promo_idx = np.repeat(np.arange(len(promo_df)), duration)
+            offsets = np.arange(len(promo_idx)) - np.repeat(np.cumsum(duration) - duration, duration)
+            days = promo_start[promo_idx] + offsets
+
+            first_day = days.min()
+            span = days.max() - first_day + 1
+            keys = promo_codes[promo_idx].astype(np.int64) * span + (days - first_day)
+
+            # Sort by key, then by priority, and keep the winning promotion per key
+            order = np.lexsort((promo_idx, promo_start[promo_idx], keys))
+            keys = keys[order]
+            promo_idx = promo_idx[order]
+            winners = np.append(keys[1:] != keys[:-1], True)
+            keys = keys[winners]
+            promo_idx = promo_idx[winners]
+
+            # Look up each sales record's (product, day) key
+            sales_days = result_df['date'].values.astype('datetime64[D]').astype(np.int64) - first_day
+            candidates = ((sales_codes >= 0) & result_df['date'].notna().values &
+                          (sales_days >= 0) & (sales_days < span))
+            sales_keys = np.where(candidates, sales_codes.astype(np.int64) * span + sales_days, -1)
+
+            pos = np.minimum(np.searchsorted(keys, sales_keys), len(keys) - 1)
+            matched = candidates & (keys[pos] == sales_keys)
+            matched_promos = promo_idx[pos[matched]]
+
+            is_promo[matched] = 1
+            promo_type[matched] = promo_types.cat.codes.to_numpy()[matched_promos]
+            discount[matched] = promo_df['discount_percentage'].to_numpy(dtype=np.float64)[matched_promos]
+
+        result_df['is_promo'] = is_promo
+        result_df['promo_type'] = pd.Categorical.from_codes(promo_type, dtype=promo_types.dtype)
+        result_df['discount_percentage'] = discount
+
         return result_df
     
+    def product_table(self):
+        """
+        Compiled lookup table of the product catalog.
+        
+        The table of a catalog file is shared until the file changes (see
+        utils/product_catalog.py); a catalog assigned to product_catalog
+        directly is compiled on first use.
+        
+        Returns:
+            ProductTable: Product attributes indexed by product name
+        """
+        if self.product_catalog is None:
+            raise ValueError("Product catalog not loaded. Call load_data() first.")
+        
+        if self._product_table is None or self._product_table_source is not self.product_catalog:
+            self._product_table = ProductTable(self.product_catalog)
+            self._product_table_source = self.product_catalog
+        
+        return self._product_table
+    
+    def build_product_table(self):
+        """
+        Build the product feature table from the product catalog.
+        
+        Returns:
+            pd.DataFrame: One row per product with product_category, base_price
+                and margin_percentage
+        """
+        return self.product_table().frame()
+    
     def add_product_features(self, df):
         """
         Add product features from the product catalog to the dataframe.
@@ -172,69 +535,25 @@ class TradeAIDataProcessor:
         Returns:
             pd.DataFrame: Enhanced dataframe with product features
         """
-        if self.product_catalog is None:
-            raise ValueError("Product catalog not loaded. Call load_data() first.")
-            
-        # Create a product features dictionary
-        product_features = {}
-        for product in self.product_catalog:
-            product_name = product['product_name']
-            product_features[product_name] = {
-                'product_category': product.get('category', 'Unknown'),
-                'base_price': product.get('base_price', 0),
-                'margin_percentage': product.get('margin_percentage', 0)
-            }
-        
-        # Convert to dataframe for merging
-        product_df = pd.DataFrame.from_dict(product_features, orient='index').reset_index()
-        product_df.rename(columns={'index': 'product_name'}, inplace=True)
-        
-        # Merge with input dataframe
-        result_df = df.merge(product_df, on='product_name', how='left')
+        table = self.product_table()
         
-        return result_df
+        # Attach the catalog columns by product code
+        return df.assign(**table.take(table.codes(df['product_name'])))
     
-    def calculate_seasonality(self, df, window=30):
+    def calculate_category_promo_intensity(self, df):
         """
-        Calculate seasonality index for each product.
+        Calculate the share of promoted sales records per date and product category.
         
         Args:
-            df (pd.DataFrame): Input dataframe with sales data
-            window (int): Rolling window size for seasonality calculation
+            df (pd.DataFrame): Input dataframe with is_promo and product_category columns
             
         Returns:
-            pd.DataFrame: Dataframe with seasonality index
+            pd.DataFrame: Dataframe with category_promo_intensity
         """
-        # Group by product and date
-        product_daily = df.groupby(['product_name', 'date'])['quantity_sold'].sum().reset_index()
-        
-        # Create a pivot table with products as rows and dates as columns
-        pivot_df = product_daily.pivot(index='product_name', columns='date', values='quantity_sold')
-        
-        # Fill missing values with 0
-        pivot_df.fillna(0, inplace=True)
-        
-        # Calculate rolling average
-        rolling_avg = pivot_df.T.rolling(window=window, min_periods=1).mean().T
-        
-        # Calculate seasonality index (actual / rolling average)
-        seasonality = pivot_df / rolling_avg
-        
-        # Replace inf and NaN with 1 (neutral seasonality)
-        seasonality.replace([np.inf, -np.inf], 1, inplace=True)
-        seasonality.fillna(1, inplace=True)
-        
-        # Convert back to long format
-        seasonality_df = seasonality.stack().reset_index()
-        seasonality_df.columns = ['product_name', 'date', 'seasonality_index']
-        
-        # Merge with original dataframe
-        result_df = df.merge(seasonality_df, on=['product_name', 'date'], how='left')
-        
-        # Fill missing seasonality with 1
-        result_df['seasonality_index'].fillna(1, inplace=True)
-        
-        return result_df
+        # Mean of is_promo per date and category, written to each record
+        return df.assign(category_promo_intensity=df.groupby(
+            ['date', 'product_category'], observed=True
+        )['is_promo'].transform('mean'))
     
     def calculate_competitor_intensity(self, df):
         """
@@ -247,12 +566,7 @@ class TradeAIDataProcessor:
         Returns:
             pd.DataFrame: Dataframe with competitor intensity
         """
-        # Group by date and category
-        date_category = df.groupby(['date', 'product_category'])['is_promo'].mean().reset_index()
-        date_category.columns = ['date', 'product_category', 'category_promo_intensity']
-        
-        # Merge back to original dataframe
-        result_df = df.merge(date_category, on=['date', 'product_category'], how='left')
+        result_df = self.calculate_category_promo_intensity(df)
         
         # Scale to 0-1 range to represent competitor intensity
         # Higher values mean more promotional activity in the category
@@ -266,92 +580,309 @@ class TradeAIDataProcessor:
         
         return result_df
     
+    def calculate_rolling_features(self, df, window=ROLLING_WINDOW, dates=None):
+        """
+        Calculate the seasonality index, sales volatility and average monthly
+        sales of each record in a single pass.
+        
+        Records are sorted once by product and date. Daily totals, rolling
+        window sums (from cumulative sums) and monthly means are computed on
+        the sorted arrays and written straight into the dataframe.
+        
+        - seasonality_index: daily sales over their rolling mean across the
+          last `window` dates of the date axis, days without sales counting as 0
+        - sales_volatility: rolling standard deviation of the product's last
+          `window` daily totals
+        - avg_monthly_sales: mean sales per record for the product and
+          calendar month
+        
+        Args:
+            df (pd.DataFrame): Input dataframe with product_name, date and quantity_sold
+            window (int): Rolling window size
+            dates (array-like): Dates forming the seasonality window axis. Defaults to
+                the dates present in df; pass the full history's dates when df
+                only holds a slice of it.
+            
+        Returns:
+            pd.DataFrame: Dataframe with the rolling features
+        """
+        codes, _ = pd.factorize(df['product_name'])
+        day = df['date'].to_numpy().astype('datetime64[ns]')
+        quantity = df['quantity_sold'].to_numpy()
+        recorded = ~pd.isna(quantity)
+        quantity = _exact_values(np.where(recorded, quantity, 0))
+        
+        rows = np.flatnonzero((codes >= 0) & ~np.isnat(day))
+        if not len(rows):
+            return df.assign(seasonality_index=1.0, sales_volatility=np.nan, avg_monthly_sales=np.nan)
+        
+        # One integer sort key per record: product, then date
+        calendar = np.unique(day[rows])
+        codes = codes[rows]
+        keys = codes.astype(np.int64) * len(calendar) + np.searchsorted(calendar, day[rows])
+        
+        if dates is None:
+            axis = calendar
+        else:
+            axis = np.unique(pd.DatetimeIndex(dates).to_numpy().astype('datetime64[ns]'))
+        
+        n_jobs = self._worker_count(len(rows), codes.max() + 1)
+        if n_jobs > 1:
+            block = self._parallel_rolling_features(codes, keys, quantity[rows], recorded[rows],
+                                                    calendar, axis, window, n_jobs)
+        else:
+            block = _rolling_feature_block(keys, quantity[rows], recorded[rows], calendar, axis, window)
+        
+        # Write back in the original row order
+        features = {}
+        for name, default, values in zip(ROLLING_FEATURES, (1.0, np.nan, np.nan), block):
+            features[name] = np.full(len(df), default)
+            features[name][rows] = values
+        
+        return df.assign(**features)
+    
+    def _worker_count(self, n_rows, n_products):
+        """Worker processes to use for n_rows records of n_products products"""
+        if n_rows < PARALLEL_MIN_ROWS:
+            return 1
+        n_jobs = os.cpu_count() if self.n_jobs is None or self.n_jobs < 0 else self.n_jobs
+        return max(1, min(n_jobs, n_products))
+    
+    def _parallel_rolling_features(self, codes, keys, quantity, recorded, calendar, axis,
+                                   window, n_jobs):
+        """
+        Compute rolling features in worker processes, one shard of whole
+        products per worker.
+        
+        Records are grouped by shard and copied once into shared memory;
+        workers sort and reduce their shard and write the results into shared
+        output arrays, so no dataframes or arrays are pickled.
+        
+        Returns:
+            list: seasonality_index, sales_volatility and avg_monthly_sales per record
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from utils.shared_arrays import SharedArrays
+        
+        # Contiguous product ranges with about the same number of records
+        counts = np.bincount(codes)
+        shard_of_product = (np.cumsum(counts) - counts) * n_jobs // len(codes)
+        shards = shard_of_product[codes]
+        by_shard = np.argsort(shards, kind='stable')
+        bounds = np.searchsorted(shards[by_shard], np.arange(n_jobs + 1))
+        
+        with SharedArrays() as shared:
+            inputs = []
+            for values in (keys, quantity, recorded):
+                handle, array = shared.empty(len(keys), values.dtype)
+                np.take(values, by_shard, out=array)
+                inputs.append(handle)
+            outputs, results = zip(*[shared.empty(len(keys)) for _ in ROLLING_FEATURES])
+            
+            tasks = [(inputs, list(outputs), start, stop, calendar, axis, window)
+                     for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+            with ProcessPoolExecutor(max_workers=len(tasks)) as executor:
+                list(executor.map(_rolling_feature_shard, tasks))
+            
+            block = []
+            for result in results:
+                values = np.empty(len(keys))
+                values[by_shard] = result
+                block.append(values)
+            del results, result
+        return block
+    
+    def build_feature_frame(self, sales_df, promo_df, dates=None):
+        """
+        Run the feature engineering steps on cleaned sales and promotional data.
+        
+        Args:
+            sales_df (pd.DataFrame): Cleaned sales dataframe
+            promo_df (pd.DataFrame): Cleaned promotional dataframe
+            dates (array-like): Dates forming the seasonality window axis
+            
+        Returns:
+            pd.DataFrame: Dataframe with all engineered features, including the
+                unscaled category_promo_intensity
+        """
+        df = self.tag_promotions(sales_df, promo_df)
+        df = self.add_product_features(df)
+        df = self.calculate_category_promo_intensity(df)
+        return self.calculate_rolling_features(df, dates=dates)
+    
+    def select_model_features(self, df, include_target=True):
+        """
+        Select model features and fill missing values.
+        
+        Args:
+            df (pd.DataFrame): Dataframe with engineered features
+            include_target (bool): Whether to include the target variable
+            
+        Returns:
+            pd.DataFrame: Feature dataframe ready for ML model
+        """
+        features = list(MODEL_FEATURES)
+        
+        if include_target:
+            features.append(TARGET_COLUMN)
+            
+        # Select only needed columns
+        result_df = df[features].copy()
+        
+        # Handle missing values; categoricals stay encoded, with 'Unknown'
+        # added to their vocabulary
+        for col in result_df.columns:
+            if result_df[col].dtype.kind in 'ifc':  # integer, float, complex
+                result_df[col] = fill_missing(result_df[col], 0)
+            elif result_df[col].dtype.kind != 'M':
+                result_df[col] = fill_missing(result_df[col], 'Unknown')
+        
+        return result_df
+    
     def prepare_features_for_model(self, include_target=True):
         """
         Prepare features for machine learning model.
         
+        When the processor has a feature store, only the partitions whose
+        inputs changed since the last build are recomputed and the features
+        are read back from the store.
+        
         Args:
             include_target (bool): Whether to include the target variable
             
         Returns:
             pd.DataFrame: Feature dataframe ready for ML model
         """
+        if self.feature_store is not None:
+            self.feature_store.build()
+            return self.feature_store.load(include_target=include_target)
+        
         # Merge sales and promo data
         df = self.merge_sales_and_promo()
         
         # Add product features
         df = self.add_product_features(df)
         
-        # Calculate seasonality
-        df = self.calculate_seasonality(df)
-        
         # Calculate competitor intensity
         df = self.calculate_competitor_intensity(df)
         
-        # Calculate sales volatility (rolling standard deviation)
-        product_daily = df.groupby(['product_name', 'date'])['quantity_sold'].sum().reset_index()
-        product_daily['sales_volatility'] = product_daily.groupby('product_name')['quantity_sold'].transform(
-            lambda x: x.rolling(window=30, min_periods=1).std()
-        )
+        # Calculate seasonality, sales volatility and average monthly sales
+        df = self.calculate_rolling_features(df)
         
-        # Fill missing volatility with 0
-        product_daily['sales_volatility'].fillna(0, inplace=True)
-        
-        # Merge volatility back to main dataframe
-        volatility_df = product_daily[['product_name', 'date', 'sales_volatility']]
-        df = df.merge(volatility_df, on=['product_name', 'date'], how='left')
+        return self.select_model_features(df, include_target)
+    
+    def iter_features_for_model(self, include_target=True, months_per_chunk=1):
+        """
+        Prepare features for machine learning model in time-ordered batches.
         
-        # Calculate average monthly sales
-        df['avg_monthly_sales'] = df.groupby(['product_name', 'year', 'month'])['quantity_sold'].transform('mean')
+        The sales history is read from its columnar source (see load_data) a
+        few calendar months at a time, so it never has to fit in memory.
+        Batches cover whole months, which keeps monthly averages and the
+        per-date category promotion intensity complete within a batch. Between
+        batches only the last ROLLING_WINDOW - 1 daily totals of each product
+        are carried forward for the seasonality and volatility windows, and a
+        first pass over the history finds the range competitor intensity is
+        scaled to.
         
-        # Select features for model
-        features = [
-            'product_name', 'date', 'product_category', 'base_price', 'discount_percentage',
-            'promo_type', 'is_promo', 'avg_monthly_sales', 'sales_volatility',
-            'seasonality_index', 'competitor_intensity', 'margin_percentage'
-        ]
+        Concatenated, the batches hold the same rows and values as
+        prepare_features_for_model on columnar-loaded data, in date order.
+        Promotional data and the product catalog must already be loaded.
         
-        if include_target:
-            features.append('quantity_sold')
+        Args:
+            include_target (bool): Whether to include the target variable
+            months_per_chunk (int): Calendar months per batch
             
-        # Select only needed columns
-        result_df = df[features].copy()
+        Yields:
+            pd.DataFrame: Feature dataframe for a block of months
+        """
+        from utils.columnar_io import read_columnar, read_unique
         
-        # Handle missing values
-        for col in result_df.columns:
-            if result_df[col].dtype.kind in 'ifc':  # integer, float, complex
-                result_df[col].fillna(0, inplace=True)
+        if self.promo_df is None or self.product_catalog is None:
+            raise ValueError("Data not loaded. Call load_data() first.")
+        
+        sales_path, sales_format = self._columnar_source('sales_data', SALES_SCHEMA, sort_by='date')
+        promo_df = self.clean_promo_data()
+        
+        # Dates making up the history (the seasonality window axis)
+        dates = pd.DatetimeIndex(np.sort(read_unique(sales_path, sales_format, 'date')))
+        if dates.empty:
+            return
+        
+        months = dates.to_period('M').unique()
+        starts = [months[i].start_time for i in range(0, len(months), months_per_chunk)]
+        chunks = list(zip(starts, starts[1:] + [None]))
+        
+        def read_chunk(start, stop):
+            end = stop - pd.Timedelta(1, 'ns') if stop is not None else None
+            df = read_columnar(sales_path, sales_format, SALES_SCHEMA, date_column='date',
+                               start_date=start, end_date=end)
+            return self.add_product_features(self.tag_promotions(self.clean_sales_data(df), promo_df))
+        
+        # First pass: range of the category promotion intensity
+        low, high = np.inf, -np.inf
+        for start, stop in chunks:
+            intensity = self.calculate_category_promo_intensity(read_chunk(start, stop))
+            low = min(low, intensity['category_promo_intensity'].min())
+            high = max(high, intensity['category_promo_intensity'].max())
+        scaler = MinMaxScaler().fit([[low], [high]]) if low <= high else None
+        
+        # Second pass: features, carrying each product's recent daily totals
+        tail = None
+        for start, stop in chunks:
+            df = read_chunk(start, stop)
+            
+            # Earlier months' daily totals only extend the windows; their
+            # monthly means are separate groups and are discarded
+            records = df[['product_name', 'date', 'quantity_sold']]
+            history = records if tail is None else concat_frames([tail, records])
+            rolling = self.calculate_rolling_features(history, dates=dates).iloc[len(history) - len(df):]
+            df = df.assign(**{name: rolling[name].to_numpy() for name in ROLLING_FEATURES})
+            
+            df = self.calculate_category_promo_intensity(df)
+            if scaler is not None:
+                df['competitor_intensity'] = scaler.transform(
+                    df[['category_promo_intensity']].to_numpy()
+                )[:, 0]
             else:
-                result_df[col].fillna('Unknown', inplace=True)
+                df['competitor_intensity'] = np.nan
+            
+            yield self.select_model_features(df, include_target)
+            
+            daily = history.groupby(['product_name', 'date'], observed=True)['quantity_sold'].sum().reset_index()
+            tail = daily.groupby('product_name', observed=True).tail(ROLLING_WINDOW - 1)
+    
+    def feature_index(self):
+        """
+        Query index over the features of the loaded data.
         
-        return result_df
+        The index is rebuilt when load_data replaces the sales, promotional
+        or catalog data.
+        
+        Returns:
+            FeatureIndex: Feature index (see utils/feature_index.py)
+        """
+        from utils.feature_index import FeatureIndex
+        
+        if self._feature_index is None or not self._feature_index.is_current():
+            self._feature_index = FeatureIndex(self)
+        return self._feature_index
     
     def generate_prediction_dataset(self, start_date=None, end_date=None, products=None):
         """
         Generate a dataset for making predictions.
         
+        Only the history the requested rows depend on is processed, and
+        recent requests are answered from a cache (see feature_index).
+        
         Args:
             start_date (str): Start date for predictions (YYYY-MM-DD)
             end_date (str): End date for predictions (YYYY-MM-DD)
             products (list): List of product names to include
             
         Returns:
-            pd.DataFrame: Dataset for making predictions
+            pd.DataFrame: Dataset for making predictions, ordered by product and date
         """
-        # Prepare features
-        df = self.prepare_features_for_model(include_target=True)
-        
-        # Filter by date range if specified
-        if start_date and end_date:
-            start_date = pd.to_datetime(start_date)
-            end_date = pd.to_datetime(end_date)
-            df = df[(df['date'] >= start_date) & (df['date'] <= end_date)]
-        
-        # Filter by products if specified
-        if products:
-            df = df[df['product_name'].isin(products)]
-        
-        return df
+        return self.feature_index().query(start_date, end_date, products)
     
     def aggregate_by_product(self, df):
         """
@@ -364,59 +895,139 @@ class TradeAIDataProcessor:
             pd.DataFrame: Aggregated dataframe
         """
         # Group by product
-        agg_df = df.groupby('product_name').agg({
-            'quantity_sold': 'sum',
-            'base_price': 'mean',
-            'discount_percentage': 'mean',
-            'is_promo': 'mean',
-            'avg_monthly_sales': 'mean',
-            'sales_volatility': 'mean',
-            'seasonality_index': 'mean',
-            'competitor_intensity': 'mean',
-            'margin_percentage': 'mean',
-            'product_category': 'first'
-        }).reset_index()
+        agg_df = df.groupby('product_name', observed=True).agg(PRODUCT_AGGREGATIONS).reset_index()
         
         # Rename columns
-        agg_df.rename(columns={
-            'is_promo': 'promo_frequency',
-            'quantity_sold': 'total_sales'
-        }, inplace=True)
+        agg_df.rename(columns=PRODUCT_AGGREGATE_NAMES, inplace=True)
         
         return agg_df
     
-    def export_processed_data(self, output_path):
+    def _sum_batch_by_product(self, df):
+        """Per-product sums and counts of one feature batch, for _aggregate_batches_by_product"""
+        grouped = df.groupby('product_name', observed=True)
+        partial = {}
+        for col, how in PRODUCT_AGGREGATIONS.items():
+            if how == 'sum':
+                partial[col] = grouped[col].sum()
+            elif how == 'mean':
+                partial[col] = grouped[col].sum()
+                partial[f"{col}__count"] = grouped[col].count()
+            else:
+                partial[col] = grouped[col].first()
+        return pd.DataFrame(partial)
+    
+    def _aggregate_batches_by_product(self, partials):
         """
-        Export processed data to CSV and JSON files.
+        Combine per-batch product sums into the output of aggregate_by_product.
+        
+        Args:
+            partials (list): Per-batch dataframes indexed by product_name, with
+                a sum and a count column for every averaged feature
+            
+        Returns:
+            pd.DataFrame: Aggregated dataframe
+        """
+        combined = pd.concat(partials).groupby(level=0, sort=True)
+        sums = combined.sum(numeric_only=True)
+        
+        agg_df = pd.DataFrame(index=sums.index)
+        for col, how in PRODUCT_AGGREGATIONS.items():
+            if how == 'sum':
+                agg_df[col] = sums[col]
+            elif how == 'mean':
+                agg_df[col] = sums[col] / sums[f"{col}__count"]
+            else:
+                agg_df[col] = combined[col].first()
+        agg_df.index.name = 'product_name'
+        agg_df = agg_df.reset_index()
+        
+        agg_df.rename(columns=PRODUCT_AGGREGATE_NAMES, inplace=True)
+        
+        return agg_df
+    
+    def export_processed_data(self, output_path, streaming=False, format='csv', compression=None,
+                              partition_by=('month',), features=None):
+        """
+        Export processed data to CSV and JSON files, or to Parquet and NDJSON files.
+        
+        The "csv" format writes processed_data.csv, product_aggregated.csv and
+        product_profiles.json. The "parquet" format writes the features as a
+        Parquet dataset partitioned by month and/or product (processed_data/,
+        see utils/columnar_io.write_partitioned), product_aggregated.parquet
+        and one compact JSON profile per line in product_profiles.ndjson.
         
         Args:
             output_path (str): Path to save the processed data
+            streaming (bool): Build and write the features in monthly batches
+                with iter_features_for_model instead of all at once
+            format (str): "csv" or "parquet"
+            compression (str): "zstd" or "gzip" compression of the parquet
+                format's files; the profiles file gets a matching suffix
+                (product_profiles.ndjson.zst)
+            partition_by (tuple): Partition columns of the parquet format,
+                "month" and/or "product_name"
+            features (pd.DataFrame): Features already built by
+                prepare_features_for_model; when omitted, the full feature
+                frame of feature_index is used, which is built at most once
+                per data load
             
         Returns:
             bool: True if export successful
         """
+        from utils.columnar_io import write_partitioned, write_text
+        
+        if format not in ('csv', 'parquet'):
+            raise ValueError(f"Unknown export format: {format}")
+        if compression and format != 'parquet':
+            raise ValueError("Compression requires format='parquet'")
+        if compression and compression not in EXPORT_COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported export compression: {compression}")
+        
         try:
             # Create output directory if it doesn't exist
             os.makedirs(output_path, exist_ok=True)
+            data_file = os.path.join(output_path, 'processed_data.csv')
+            data_dir = os.path.join(output_path, 'processed_data')
             
-            # Prepare features
-            df = self.prepare_features_for_model()
-            
-            # Save full dataset
-            df.to_csv(os.path.join(output_path, 'processed_data.csv'), index=False)
-            
-            # Save aggregated product data
-            agg_df = self.aggregate_by_product(df)
-            agg_df.to_csv(os.path.join(output_path, 'product_aggregated.csv'), index=False)
-            
-            # Save product profiles as JSON
-            product_profiles = {}
-            for _, row in agg_df.iterrows():
-                product_name = row['product_name']
-                product_profiles[product_name] = row.to_dict()
+            if streaming:
+                # Write each batch and keep per-product sums for the aggregates
+                partials = []
+                for i, batch in enumerate(self.iter_features_for_model()):
+                    if format == 'parquet':
+                        write_partitioned(batch, data_dir, partition_by=partition_by,
+                                          compression=compression, basename=f"part-{i}.parquet",
+                                          overwrite=i == 0)
+                    else:
+                        batch.to_csv(data_file, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+                    partials.append(self._sum_batch_by_product(batch))
+                agg_df = self._aggregate_batches_by_product(partials)
+            else:
+                # Reuse computed features
+                df = features if features is not None else self.feature_index().frame()[0]
+                
+                # Save full dataset
+                if format == 'parquet':
+                    write_partitioned(df, data_dir, partition_by=partition_by, compression=compression)
+                else:
+                    df.to_csv(data_file, index=False)
+                
+                agg_df = self.aggregate_by_product(df)
             
-            with open(os.path.join(output_path, 'product_profiles.json'), 'w') as f:
-                json.dump(product_profiles, f, indent=2)
+            # Save aggregated product data and product profiles, built column-wise
+            profiles = agg_df.set_index('product_name', drop=False)
+            if format == 'parquet':
+                agg_df.to_parquet(os.path.join(output_path, 'product_aggregated.parquet'),
+                                  index=False, compression=compression)
+                profiles_file = os.path.join(output_path, 'product_profiles.ndjson')
+                if compression:
+                    profiles_file += EXPORT_COMPRESSION_SUFFIXES[compression]
+                write_text(profiles_file,
+                           profiles.to_json(orient='records', lines=True, double_precision=15),
+                           compression=compression)
+            else:
+                agg_df.to_csv(os.path.join(output_path, 'product_aggregated.csv'), index=False)
+                with open(os.path.join(output_path, 'product_profiles.json'), 'w') as f:
+                    json.dump(profiles.to_dict(orient='index'), f, indent=2)
                 
             return True
         except Exception as e:
@@ -0,0 +1,279 @@
+"""
+Query-oriented access to model features for the Trade AI platform.
+Answers (date range, products) feature queries from a (product, date) index
+of the sales history, computing only the history the queried rows depend on,
+and keeps recent query results in an LRU cache.
+"""
+
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from utils.data_processor import ROLLING_WINDOW, _segment_starts
+from utils.categorical import lookup_codes
+
+# Query results kept by the LRU cache
+QUERY_CACHE_SIZE = 64
+
+# Share of the history a query may need before the full feature frame is
+# built instead, so that later queries are answered by slicing it
+FULL_BUILD_FRACTION = 0.5
+
+
+def _ranges(starts, stops):
+    """Concatenated np.arange(start, stop) of every range"""
+    lengths = np.maximum(stops - starts, 0)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum())
+
+
+class FeatureIndex:
+    """
+    Model features of a processor's loaded data, queried by date range and
+    products.
+
+    Sales records are indexed by an integer (product, date) key: the product's
+    position in the sorted product names times the number of distinct dates
+    plus one, plus the date's position among them (missing dates last). A
+    query for a date range and products reads only:
+
+    - the queried products' records from the start of the seasonality and
+      volatility windows of the first queried date, and from the start of its
+      month, up to the end of the last queried date's month (monthly means
+      cover whole months)
+    - the other products of the same categories on the queried dates (they
+      drive competitor intensity)
+
+    Competitor intensity is scaled over the whole history, whose range is
+    computed once. Queries needing most of the history build the full feature
+    frame instead, and later queries slice it.
+
+    The index reflects the processor's data at creation; it does not notice
+    dataframes changed in place (see is_current).
+    """
+
+    def __init__(self, processor, window=ROLLING_WINDOW, cache_size=QUERY_CACHE_SIZE):
+        """
+        Initialize the feature index.
+
+        Args:
+            processor (TradeAIDataProcessor): Processor with loaded data
+            window (int): Rolling window size of the seasonality and volatility features
+            cache_size (int): Query results kept by the LRU cache
+        """
+        if processor.sales_df is None or processor.promo_df is None:
+            raise ValueError("Data not loaded. Call load_data() first.")
+
+        self.processor = processor
+        self.window = window
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+
+        self._source = self._data_objects()
+        self._lock = threading.RLock()
+        self._cache = OrderedDict()
+        self._frame = None
+        self._frame_keys = None
+        self._intensity_range = None
+
+        self.sales_df = processor.clean_sales_data()
+        self.promo_df = processor.clean_promo_data()
+        self.products = pd.Index(pd.unique(self.sales_df['product_name'].dropna()), dtype=object).sort_values()
+        dates = self.sales_df['date'].to_numpy().astype('datetime64[ns]')
+        self.axis = np.unique(dates[~np.isnat(dates)])
+        self.stride = len(self.axis) + 1
+
+        # History sorted by product and date
+        keys = self._keys(self.sales_df)
+        order = np.argsort(keys, kind='stable')
+        self.sales_df = self.sales_df.iloc[order].reset_index(drop=True)
+        self.keys = keys[order]
+        self.day_keys = self.keys[_segment_starts(self.keys)]
+
+        table = processor.product_table()
+        categories = table.take(table.codes(pd.Series(self.products)))['product_category']
+        self.category_codes, _ = pd.factorize(categories)
+
+    def _data_objects(self):
+        """The processor dataframes and catalog the index was built from"""
+        return (self.processor.sales_df, self.processor.promo_df, self.processor.product_catalog)
+
+    def is_current(self):
+        """Whether the processor still holds the data the index was built from"""
+        return all(a is b for a, b in zip(self._source, self._data_objects()))
+
+    def _keys(self, df):
+        """(product, date) key of each record"""
+        codes = lookup_codes(df['product_name'], self.products)
+        dates = df['date'].to_numpy().astype('datetime64[ns]')
+        ranks = np.where(np.isnat(dates), len(self.axis), np.searchsorted(self.axis, dates))
+        return codes.astype(np.int64) * self.stride + ranks
+
+    def _rank(self, date, side='left'):
+        """Position of a date on the date axis"""
+        return int(np.searchsorted(self.axis, pd.Timestamp(date).to_datetime64(), side=side))
+
+    def query(self, start_date=None, end_date=None, products=None):
+        """
+        Model features for a date range and a set of products.
+
+        Args:
+            start_date (str): First date (inclusive), unbounded if None
+            end_date (str): Last date (inclusive), unbounded if None
+            products (list): Product names, all products if None or empty
+
+        Returns:
+            pd.DataFrame: Feature dataframe including the target, ordered by
+                product and date
+        """
+        # An empty list selects all products, as generate_prediction_dataset did
+        products = products or None
+        key = (
+            None if start_date is None else pd.Timestamp(start_date),
+            None if end_date is None else pd.Timestamp(end_date),
+            None if products is None else tuple(sorted(set(products)))
+        )
+
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key].copy()
+            self.misses += 1
+
+            result = self._compute(*key)
+
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return result.copy()
+
+    def cache_info(self):
+        """
+        Query cache statistics.
+
+        Returns:
+            dict: hits, misses, hit_rate and size of the cache
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._cache)
+        }
+
+    def _compute(self, start, end, products):
+        """Features of one query, from the full frame or the needed history"""
+        codes = np.arange(len(self.products))
+        if products is not None:
+            codes = self.products.get_indexer(list(products))
+            codes = np.sort(codes[codes >= 0])
+
+        dated = start is not None or end is not None
+        lo = self._rank(start) if start is not None else 0
+        hi = self._rank(end, side='right') if end is not None else len(self.axis)
+        if not dated:
+            # Include records without a date
+            hi = self.stride
+
+        if self._frame is None and dated:
+            rows = self._history_rows(codes, lo, hi)
+            if len(rows) <= FULL_BUILD_FRACTION * len(self.keys):
+                return self._compute_from_history(rows, codes, lo, hi)
+
+        frame, frame_keys = self.frame()
+        rows = _ranges(np.searchsorted(frame_keys, codes * self.stride + lo),
+                       np.searchsorted(frame_keys, codes * self.stride + hi))
+        return frame.iloc[rows].reset_index(drop=True)
+
+    def _history_rows(self, codes, lo, hi):
+        """History records the features of the queried records depend on"""
+        window = self.window
+        axis = self.axis
+        keys, day_keys, stride = self.keys, self.day_keys, self.stride
+
+        # Seasonality window over the date axis
+        first = np.full(len(codes), max(lo - window + 1, 0), dtype=np.int64)
+
+        # Volatility window over each product's own dates
+        day_position = np.searchsorted(day_keys, codes * stride + lo)
+        product_start = np.searchsorted(day_keys, codes * stride)
+        back = np.maximum(day_position - window + 1, product_start)
+        has_history = back < day_position
+        first[has_history] = np.minimum(first[has_history],
+                                        day_keys[back[has_history]] - codes[has_history] * stride)
+
+        # Monthly means cover whole months
+        if lo < len(axis):
+            month_start = axis[lo].astype('datetime64[M]').astype(axis.dtype)
+            first = np.minimum(first, np.searchsorted(axis, month_start))
+        last = hi
+        if 0 < hi <= len(axis):
+            month_end = (axis[hi - 1].astype('datetime64[M]') + 1).astype(axis.dtype)
+            last = int(np.searchsorted(axis, month_end))
+
+        product_rows = _ranges(np.searchsorted(keys, codes * stride + first),
+                               np.searchsorted(keys, codes * stride + last))
+
+        # Other products of the same categories, on the queried dates
+        queried = np.zeros(len(self.products), dtype=bool)
+        queried[codes] = True
+        categories = np.unique(self.category_codes[codes])
+        peers = np.flatnonzero(np.isin(self.category_codes, categories[categories >= 0]) & ~queried)
+        peer_rows = _ranges(np.searchsorted(keys, peers * stride + lo),
+                            np.searchsorted(keys, peers * stride + hi))
+
+        return np.sort(np.concatenate([product_rows, peer_rows]))
+
+    def _compute_from_history(self, rows, codes, lo, hi):
+        """Build the features of the queried records from part of the history"""
+        processor = self.processor
+        keys = self.keys[rows]
+
+        df = processor.build_feature_frame(self.sales_df.iloc[rows], self.promo_df, dates=self.axis)
+        df = self._scale_intensity(df)
+
+        product_codes, ranks = np.divmod(keys, self.stride)
+        queried = np.zeros(len(self.products), dtype=bool)
+        queried[codes] = True
+        keep = queried[product_codes] & (ranks >= lo) & (ranks < hi)
+
+        return processor.select_model_features(df[keep], include_target=True).reset_index(drop=True)
+
+    def _scale_intensity(self, df):
+        """Scale category promo intensity to competitor intensity over the whole history"""
+        if self._intensity_range is None:
+            processor = self.processor
+            history = processor.add_product_features(
+                processor.tag_promotions(self.sales_df, self.promo_df)
+            )
+            intensity = processor.calculate_category_promo_intensity(history)['category_promo_intensity']
+            self._intensity_range = (intensity.min(), intensity.max())
+
+        low, high = self._intensity_range
+        if low <= high and len(df):
+            scaler = MinMaxScaler().fit([[low], [high]])
+            competitor = scaler.transform(df[['category_promo_intensity']].to_numpy())[:, 0]
+        else:
+            competitor = np.nan
+        return df.assign(competitor_intensity=competitor)
+
+    def frame(self):
+        """
+        The features of the whole history, built once.
+
+        Returns:
+            tuple: (feature dataframe ordered by product and date, its keys)
+        """
+        with self._lock:
+            if self._frame is None:
+                frame = self.processor.prepare_features_for_model(include_target=True)
+                keys = self._keys(frame)
+                order = np.argsort(keys, kind='stable')
+                self._frame = frame.iloc[order].reset_index(drop=True)
+                self._frame_keys = keys[order]
+            return self._frame, self._frame_keys
@@ -0,0 +1,110 @@
+"""
+On-disk feature shards for out-of-core training on the Trade AI platform.
+A shard is one Parquet file of a feature dataset written by
+TradeAIDataProcessor.export_processed_data(format='parquet'), e.g. one
+month of features. Shards are partitioned into training, validation and
+test sets by index and read one at a time, so training never holds more
+than one shard of features in memory.
+"""
+
+import os
+import numpy as np
+
+
+class FeatureShards:
+    """
+    Feature dataset split into Parquet files.
+
+    Shards are the dataset's Parquet files in sorted path order (for a
+    dataset partitioned by month, calendar order). Only the requested
+    columns of one shard are read at a time; row counts come from the
+    Parquet footers without reading any data.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize the dataset.
+
+        Args:
+            path (str): Dataset directory (searched recursively) or a
+                single Parquet file
+        """
+        import pyarrow.parquet as pq
+
+        if os.path.isfile(path):
+            self.paths = [path]
+        else:
+            self.paths = sorted(
+                os.path.join(directory, name)
+                for directory, _, names in os.walk(path)
+                for name in names if name.endswith('.parquet')
+            )
+        if not self.paths:
+            raise ValueError(f"No Parquet feature shards found in {path}")
+        self.n_rows = [pq.ParquetFile(shard).metadata.num_rows for shard in self.paths]
+
+    def __len__(self):
+        return len(self.paths)
+
+    def split(self, test_size=0.2, validation_size=0.2, random_state=42):
+        """
+        Partition the shards into training, validation and test shards.
+
+        Shards are shuffled with the seed and assigned whole, so no rows are
+        copied between sets; each set gets at least one shard while there
+        are enough shards.
+
+        Args:
+            test_size (float): Share of the shards for testing
+            validation_size (float): Share of the remaining shards for
+                validation
+            random_state (int): Seed of the shuffle
+
+        Returns:
+            tuple: Lists of training, validation and test shard indices
+        """
+        order = np.random.RandomState(random_state).permutation(len(self.paths))
+        n_test = int(round(len(order) * test_size)) if test_size else 0
+        if test_size and len(order) > 2:
+            n_test = min(max(n_test, 1), len(order) - 2)
+        n_validation = int(round((len(order) - n_test) * validation_size)) if validation_size else 0
+        if validation_size and len(order) - n_test > 1:
+            n_validation = min(max(n_validation, 1), len(order) - n_test - 1)
+
+        test = sorted(order[:n_test].tolist())
+        validation = sorted(order[n_test:n_test + n_validation].tolist())
+        train = sorted(order[n_test + n_validation:].tolist())
+        return train, validation, test
+
+    def read(self, index, columns=None):
+        """
+        Read one shard.
+
+        Args:
+            index (int): Shard index
+            columns (list): Columns to read (all columns if None)
+
+        Returns:
+            pd.DataFrame: The shard's rows
+        """
+        import pyarrow.parquet as pq
+
+        return pq.read_table(self.paths[index], columns=columns).to_pandas()
+
+    def iter(self, indices, columns=None):
+        """
+        Read shards one at a time.
+
+        Args:
+            indices (list): Shard indices
+            columns (list): Columns to read (all columns if None)
+
+        Yields:
+            pd.DataFrame: Each shard's rows
+        """
+        for index in indices:
+            yield self.read(index, columns=columns)
+
+    def rows(self, indices):
+        """Total rows of shards"""
+        return int(sum(self.n_rows[index] for index in indices))
@@ -0,0 +1,421 @@
+"""
+Persistent feature store for the Trade AI platform.
+Stores the features built by TradeAIDataProcessor as Parquet files partitioned
+by product and month, and only recomputes partitions whose inputs changed.
+"""
+
+import os
+import json
+import shutil
+from datetime import datetime
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from utils.data_processor import ROLLING_WINDOW, MODEL_FEATURES, TARGET_COLUMN
+from utils.categorical import lookup_codes, fill_missing
+
+# Bump when the stored layout or the feature definitions change
+STORE_VERSION = 2
+
+# Columns written to each partition; competitor intensity is scaled over the
+# whole history, so partitions keep the unscaled category intensity instead
+STORED_COLUMNS = [c for c in MODEL_FEATURES if c != 'competitor_intensity'] + [
+    TARGET_COLUMN, 'category_promo_intensity'
+]
+
+
+def _combine_hashes(groups, hashes, n_groups):
+    """Sum 64-bit row hashes per group (order independent, wraps on overflow)"""
+    combined = np.zeros(n_groups, dtype=np.uint64)
+    if len(groups) == 0:
+        return combined
+    order = np.argsort(groups, kind='stable')
+    groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    combined[groups[starts]] = np.add.reduceat(hashes[order], starts)
+    return combined
+
+
+def _month_ids(dates):
+    """Convert dates to consecutive month numbers"""
+    return dates.values.astype('datetime64[M]').astype(np.int64)
+
+
+def _month_label(month_id):
+    """Format a month number as YYYY-MM"""
+    return str(np.datetime64(int(month_id), 'M'))
+
+
+class FeatureStore:
+    """
+    On-disk store of model features, partitioned by product and month.
+
+    Every build fingerprints the inputs of each (product, month) partition:
+    its sales rows, the promotions overlapping the month, the product's catalog
+    entry, the dates present in the month and the inputs of the other products
+    in the same category and month (they drive competitor intensity). Changed
+    partitions are recomputed together with the partitions whose rolling
+    windows reach back into them, using just enough history before the
+    earliest dirty month to keep the rolling features exact.
+    """
+
+    MANIFEST_FILE = 'manifest.json'
+
+    def __init__(self, store_path, processor, window=ROLLING_WINDOW):
+        """
+        Initialize the feature store.
+
+        Args:
+            store_path (str): Directory holding the store
+            processor (TradeAIDataProcessor): Processor with loaded data
+            window (int): Rolling window size of the seasonality and volatility features
+        """
+        self.store_path = store_path
+        self.processor = processor
+        self.window = window
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        """Read the manifest, discarding the store if it was built with other settings"""
+        manifest_path = os.path.join(self.store_path, self.MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if (manifest.get('version') == STORE_VERSION and
+                    manifest.get('window') == self.window and
+                    manifest.get('columns') == STORED_COLUMNS):
+                return manifest
+            shutil.rmtree(os.path.join(self.store_path, 'data'), ignore_errors=True)
+
+        return {
+            'version': STORE_VERSION,
+            'window': self.window,
+            'columns': STORED_COLUMNS,
+            'built_at': None,
+            'partitions': {}
+        }
+
+    def _write_manifest(self):
+        """Atomically replace the manifest on disk"""
+        manifest_path = os.path.join(self.store_path, self.MANIFEST_FILE)
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+    def _product_dir(self, product_name):
+        """Directory holding the partitions of one product"""
+        return os.path.join(self.store_path, 'data', quote(str(product_name), safe=''))
+
+    def _partition_path(self, product_name, month):
+        """Path of the Parquet file holding one partition"""
+        return os.path.join(self._product_dir(product_name), f"{month}.parquet")
+
+    def _fingerprint_partitions(self, sales_df, promo_df, product_df, products, product_codes,
+                                months, first_month, n_months):
+        """
+        Fingerprint the inputs of every (product, month) partition.
+
+        Partitions are numbered product_code * n_months + month.
+
+        Returns:
+            tuple: (partition numbers, fingerprints, category code of each partition)
+        """
+        n_partitions = len(products) * n_months
+        partitions = product_codes.astype(np.int64) * n_months + months
+
+        # Sales rows
+        raw_columns = [c for c in self.processor.sales_df.columns if c in sales_df.columns]
+        row_hashes = pd.util.hash_pandas_object(sales_df[raw_columns], index=False).values
+        sales_hash = _combine_hashes(partitions, row_hashes, n_partitions)
+        row_counts = np.bincount(partitions, minlength=n_partitions).astype(np.uint64)
+
+        # Promotions, attributed to every month they overlap
+        promo_codes = lookup_codes(promo_df['product_name'], products)
+        valid = ((promo_codes >= 0) &
+                 promo_df['promo_start_date'].notna().values &
+                 promo_df['promo_end_date'].notna().values)
+        promo_df = promo_df[valid]
+        promo_codes = promo_codes[valid]
+        start_month = np.clip(_month_ids(promo_df['promo_start_date']) - first_month, 0, n_months)
+        end_month = np.clip(_month_ids(promo_df['promo_end_date']) - first_month, -1, n_months - 1)
+        span = np.maximum(end_month - start_month + 1, 0)
+        promo_idx = np.repeat(np.arange(len(promo_df)), span)
+        offsets = np.arange(len(promo_idx)) - np.repeat(np.cumsum(span) - span, span)
+        promo_partitions = (promo_codes[promo_idx].astype(np.int64) * n_months +
+                            start_month[promo_idx] + offsets)
+        promo_hashes = pd.util.hash_pandas_object(promo_df, index=False).values[promo_idx]
+        promo_hash = _combine_hashes(promo_partitions, promo_hashes, n_partitions)
+
+        # Catalog entries
+        catalog = product_df.set_index('product_name').reindex(products)
+        catalog_hash = pd.util.hash_pandas_object(catalog, index=False).values
+
+        # Dates present in each month (the seasonality window axis)
+        dates = pd.Series(sales_df['date'].unique())
+        axis_hash = _combine_hashes(_month_ids(dates) - first_month,
+                                    pd.util.hash_pandas_object(dates, index=False).values,
+                                    n_months)
+
+        own = pd.DataFrame({
+            'sales': sales_hash,
+            'rows': row_counts,
+            'promos': promo_hash,
+            'catalog': np.repeat(catalog_hash, n_months)
+        })
+        own_hash = pd.util.hash_pandas_object(own, index=False).values
+
+        # Inputs of every product sharing the category in the same month
+        category_codes, _ = pd.factorize(fill_missing(catalog['product_category'], 'Unknown'))
+        partition_categories = np.repeat(category_codes, n_months)
+        category_months = (partition_categories.astype(np.int64) * n_months +
+                           np.tile(np.arange(n_months), len(products)))
+        n_category_months = (category_codes.max() + 1) * n_months
+        category_hash = _combine_hashes(category_months, own_hash, n_category_months)
+
+        fingerprints = pd.util.hash_pandas_object(pd.DataFrame({
+            'own': own_hash,
+            'category': category_hash[category_months],
+            'axis': np.tile(axis_hash, len(products))
+        }), index=False).values
+
+        present = np.flatnonzero(row_counts)
+        return present, fingerprints[present], partition_categories[present]
+
+    def build(self, full_rebuild=False):
+        """
+        Bring the store up to date with the processor's data.
+
+        Args:
+            full_rebuild (bool): Recompute every partition
+
+        Returns:
+            dict: Build statistics
+        """
+        sales_df = self.processor.clean_sales_data()
+        promo_df = self.processor.clean_promo_data()
+        product_df = self.processor.build_product_table()
+
+        sales_df = sales_df[sales_df['date'].notna()]
+        if sales_df.empty:
+            raise ValueError("No sales data to build features from")
+
+        products = pd.Index(pd.unique(sales_df['product_name']), dtype=object)
+        product_codes = lookup_codes(sales_df['product_name'], products)
+        month_ids = _month_ids(sales_df['date'])
+        first_month = int(month_ids.min())
+        n_months = int(month_ids.max()) - first_month + 1
+        months = month_ids - first_month
+
+        partitions, fingerprints, partition_categories = self._fingerprint_partitions(
+            sales_df, promo_df, product_df, products, product_codes, months, first_month, n_months
+        )
+        partition_products = partitions // n_months
+        partition_months = partitions % n_months
+        labels = [_month_label(m) for m in range(first_month, first_month + n_months)]
+        fingerprints = [format(f, '016x') for f in fingerprints]
+
+        # Partitions whose inputs changed since the last build
+        stored = self.manifest['partitions']
+        changed = np.array([
+            full_rebuild or
+            stored.get(products[p], {}).get(labels[m], {}).get('fingerprint') != f
+            for p, m, f in zip(partition_products, partition_months, fingerprints)
+        ], dtype=bool)
+
+        # Extend to the months whose rolling windows reach into changed months
+        daily = pd.DataFrame({
+            'product': product_codes,
+            'date': sales_df['date'].values,
+            'month': months
+        }).drop_duplicates(['product', 'date']).sort_values(['product', 'date'], kind='stable')
+        dirty = self._propagate_changes(daily, first_month, n_months, partitions, changed)
+
+        # Competitor intensity needs every product of a category in a dirty month
+        dirty_category_months = np.unique(partition_categories[dirty] * n_months + partition_months[dirty])
+        dirty |= np.isin(partition_categories * n_months + partition_months, dirty_category_months)
+
+        if dirty.any():
+            self._rebuild_partitions(sales_df, promo_df, daily, products, product_codes, months,
+                                     n_months, partitions, dirty, partition_categories, labels,
+                                     fingerprints)
+
+        # Drop partitions that no longer have any sales
+        current = {}
+        for p, m in zip(partition_products, partition_months):
+            current.setdefault(products[p], set()).add(labels[m])
+        removed = 0
+        for product_name in list(stored):
+            for month in list(stored[product_name]):
+                if month not in current.get(product_name, ()):
+                    path = self._partition_path(product_name, month)
+                    if os.path.exists(path):
+                        os.remove(path)
+                    del stored[product_name][month]
+                    removed += 1
+            if not stored[product_name]:
+                shutil.rmtree(self._product_dir(product_name), ignore_errors=True)
+                del stored[product_name]
+
+        self.manifest['built_at'] = datetime.now().isoformat()
+        self._write_manifest()
+
+        stats = {
+            'partitions': len(partitions),
+            'rebuilt': int(dirty.sum()),
+            'removed': removed
+        }
+        print(f"Feature store: rebuilt {stats['rebuilt']} of {stats['partitions']} partitions")
+        return stats
+
+    def _propagate_changes(self, daily, first_month, n_months, partitions, changed):
+        """
+        Mark the partitions whose rolling windows include changed data.
+
+        A change in month m reaches forward over the next window - 1 days with
+        sales of the product (volatility) and the next window - 1 dates of the
+        history (seasonality).
+        """
+        dirty = changed.copy()
+        if not changed.any():
+            return dirty
+
+        daily_products = daily['product'].values
+        daily_dates = daily['date'].values
+        daily_partitions = daily_products.astype(np.int64) * n_months + daily['month'].values
+        product_end = np.searchsorted(daily_products, np.arange(partitions.max() // n_months + 1),
+                                      side='right') - 1
+        axis = np.unique(daily_dates)
+
+        # Last observation of each changed partition, then step forward
+        changed_partitions = partitions[changed]
+        last_obs = np.searchsorted(daily_partitions, changed_partitions, side='right') - 1
+        obs_reach = daily_dates[np.minimum(last_obs + self.window - 1,
+                                           product_end[changed_partitions // n_months])]
+        axis_pos = np.searchsorted(axis, daily_dates[last_obs], side='left')
+        axis_reach = axis[np.minimum(axis_pos + self.window - 1, len(axis) - 1)]
+
+        reach = np.maximum(obs_reach, axis_reach).astype('datetime64[M]').astype(np.int64) - first_month
+        extra = reach - changed_partitions % n_months
+        idx = np.repeat(np.arange(len(changed_partitions)), extra)
+        offsets = np.arange(len(idx)) - np.repeat(np.cumsum(extra) - extra, extra) + 1
+        dirty |= np.isin(partitions, changed_partitions[idx] + offsets)
+        return dirty
+
+    def _rebuild_partitions(self, sales_df, promo_df, daily, products, product_codes, months,
+                            n_months, partitions, dirty, partition_categories, labels,
+                            fingerprints):
+        """Recompute and write the dirty partitions, one product category at a time"""
+        row_partitions = product_codes.astype(np.int64) * n_months + months
+        axis = np.unique(daily['date'].values)
+
+        # Lookback start per product: enough history before its first dirty month
+        first_dirty = np.full(len(products), n_months, dtype=np.int64)
+        np.minimum.at(first_dirty, partitions[dirty] // n_months, partitions[dirty] % n_months)
+        context_start = self._context_start(daily, first_dirty, axis)
+        in_context = (first_dirty[product_codes] < n_months) & (
+            sales_df['date'].values >= context_start[product_codes])
+        dirty_rows = np.isin(row_partitions, partitions[dirty])
+
+        product_categories = np.zeros(len(products), dtype=np.int64)
+        product_categories[partitions // n_months] = partition_categories
+        fingerprint_of = dict(zip(partitions, fingerprints))
+
+        stored = self.manifest['partitions']
+        os.makedirs(os.path.join(self.store_path, 'data'), exist_ok=True)
+
+        with ThreadPoolExecutor() as executor:
+            for category in np.unique(partition_categories[dirty]):
+                rows = in_context & (product_categories[product_codes] == category)
+                df = self.processor.build_feature_frame(sales_df[rows], promo_df, dates=axis)
+                keep = dirty_rows[rows]
+                df = df[keep].assign(_partition=row_partitions[rows][keep])
+                df = df.sort_values('_partition', kind='stable')
+
+                partition_ids = df['_partition'].values
+                bounds = np.flatnonzero(np.r_[True, partition_ids[1:] != partition_ids[:-1], True])
+                frame = df[STORED_COLUMNS]
+                intensity = df['category_promo_intensity'].to_numpy(dtype=np.float64)
+
+                writes = []
+                for start, stop in zip(bounds[:-1], bounds[1:]):
+                    partition = partition_ids[start]
+                    product_name = products[partition // n_months]
+                    month = labels[partition % n_months]
+                    path = self._partition_path(product_name, month)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    writes.append(executor.submit(
+                        frame.iloc[start:stop].to_parquet, path, index=False
+                    ))
+
+                    part_intensity = intensity[start:stop]
+                    has_intensity = not np.isnan(part_intensity).all()
+                    stored.setdefault(product_name, {})[month] = {
+                        'fingerprint': fingerprint_of[partition],
+                        'rows': int(stop - start),
+                        'intensity_min': float(np.nanmin(part_intensity)) if has_intensity else None,
+                        'intensity_max': float(np.nanmax(part_intensity)) if has_intensity else None
+                    }
+
+                for write in writes:
+                    write.result()
+
+    def _context_start(self, daily, first_dirty, axis):
+        """First date each product needs so its rolling windows are complete"""
+        context_start = np.full(len(first_dirty), np.datetime64('NaT'), dtype=axis.dtype)
+
+        daily_products = daily['product'].values
+        daily_dates = daily['date'].values
+        product_start = np.searchsorted(daily_products, np.arange(len(first_dirty)), side='left')
+
+        # First observation in each product's first dirty month, then step back
+        first_obs = np.flatnonzero(daily['month'].values >= first_dirty[daily_products])
+        first_obs = first_obs[np.r_[True, daily_products[first_obs][1:] != daily_products[first_obs][:-1]]]
+        targets = daily_products[first_obs]
+
+        obs_start = daily_dates[np.maximum(first_obs - (self.window - 1), product_start[targets])]
+        axis_pos = np.searchsorted(axis, daily_dates[first_obs], side='left')
+        axis_start = axis[np.maximum(axis_pos - (self.window - 1), 0)]
+
+        context_start[targets] = np.minimum(obs_start, axis_start)
+        return context_start
+
+    def load(self, include_target=True):
+        """
+        Load the stored features.
+
+        Rows are ordered by product and month rather than in sales file order.
+
+        Args:
+            include_target (bool): Whether to include the target variable
+
+        Returns:
+            pd.DataFrame: Feature dataframe ready for ML model
+        """
+        stored = self.manifest['partitions']
+        paths = [self._partition_path(product_name, month)
+                 for product_name in sorted(stored)
+                 for month in sorted(stored[product_name])]
+        if not paths:
+            df = pd.DataFrame(columns=STORED_COLUMNS)
+        else:
+            import pyarrow.parquet as pq
+            df = pq.read_table(paths).to_pandas()
+
+        # Scale competitor intensity over the whole history
+        minimums = [e['intensity_min'] for months in stored.values()
+                    for e in months.values() if e['intensity_min'] is not None]
+        maximums = [e['intensity_max'] for months in stored.values()
+                    for e in months.values() if e['intensity_max'] is not None]
+        if minimums:
+            scaler = MinMaxScaler().fit([[min(minimums)], [max(maximums)]])
+            df['competitor_intensity'] = scaler.transform(
+                df[['category_promo_intensity']].to_numpy()
+            )[:, 0]
+        else:
+            df['competitor_intensity'] = np.nan
+
+        return self.processor.select_model_features(df, include_target)
@@ -0,0 +1,175 @@
+"""
+Preprocessing cache for cross-validated searches of the Trade AI platform.
+The preprocessor is fitted once per fold, on the fold's training rows, and
+the encoded training and validation matrices are reused by every candidate
+model evaluated on that fold, as dense float32 arrays.
+"""
+
+import numpy as np
+from scipy import sparse
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+
+
+def row_positions(n_rows):
+    """
+    Stand-in feature matrix of a search over cached folds: each row holds
+    its position in the data.
+
+    Args:
+        n_rows (int): Number of rows
+
+    Returns:
+        np.ndarray: Row positions, shape (n_rows, 1)
+    """
+    return np.arange(n_rows).reshape(-1, 1)
+
+
+def as_dense_float32(X):
+    """
+    Dense float32 array of a preprocessor's output.
+
+    Tree models split on float32 features, so the matrix is converted once
+    here instead of on every fit.
+
+    Args:
+        X (np.ndarray or sparse matrix): Encoded features
+
+    Returns:
+        np.ndarray: C-contiguous float32 array
+    """
+    if sparse.issparse(X):
+        X = X.toarray()
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+class FoldCache:
+    """
+    Fitted preprocessors and encoded matrices by training rows.
+
+    A fold is keyed by its training row positions. `prepare` encodes the
+    folds of a splitter up front, so that search workers in other processes
+    receive them with the estimator; rows not prepared (e.g. the subsamples
+    of successive halving by sample count) are encoded on first use and
+    cached in the calling process.
+    """
+
+    def __init__(self, preprocessor, X):
+        """
+        Initialize the cache.
+
+        Args:
+            preprocessor (ColumnTransformer): Unfitted preprocessor
+            X (pd.DataFrame): Features dataframe the row positions refer to
+        """
+        self.preprocessor = preprocessor
+        self.X = X
+        self._fitted = {}
+        self._encoded = {}
+        self.fits = 0
+
+    def __deepcopy__(self, memo):
+        """Shared, not copied, when the estimator holding it is cloned"""
+        return self
+
+    @staticmethod
+    def _key(rows):
+        """Cache key of row positions"""
+        return np.asarray(rows, dtype=np.int64).tobytes()
+
+    def prepare(self, splits):
+        """
+        Fit and encode the folds of a splitter.
+
+        Args:
+            splits (iterable): (train rows, validation rows) pairs, e.g.
+                KFold.split(row_positions(len(X)))
+        """
+        for train, validation in splits:
+            key = self.fit_transform(train)[0]
+            self.transform(key, validation)
+
+    def fit_transform(self, rows):
+        """
+        Fitted preprocessor and encoded matrix of training rows.
+
+        Args:
+            rows (np.ndarray): Training row positions
+
+        Returns:
+            tuple: (key of the rows, encoded float32 matrix)
+        """
+        key = self._key(rows)
+        if key not in self._fitted:
+            preprocessor = clone(self.preprocessor)
+            encoded = preprocessor.fit_transform(self.X.iloc[rows])
+            self._fitted[key] = preprocessor
+            self._encoded[key, key] = as_dense_float32(encoded)
+            self.fits += 1
+        return key, self._encoded[key, key]
+
+    def transform(self, key, rows):
+        """
+        Encoded matrix of rows, using the preprocessor fitted on a fold.
+
+        Args:
+            key (bytes): Key of the fold's training rows
+            rows (np.ndarray): Row positions to encode
+
+        Returns:
+            np.ndarray: Encoded float32 matrix
+        """
+        rows_key = self._key(rows)
+        if (key, rows_key) not in self._encoded:
+            self._encoded[key, rows_key] = as_dense_float32(
+                self._fitted[key].transform(self.X.iloc[rows])
+            )
+        return self._encoded[key, rows_key]
+
+
+class CachedPreprocessingModel(BaseEstimator, RegressorMixin):
+    """
+    Model fitted and scored on FoldCache matrices.
+
+    Takes row positions (see row_positions) instead of features, so the
+    searches of sklearn split and subsample rows as usual while the
+    preprocessing of each fold comes from the shared cache. The model's
+    parameters are set as "model__<parameter>", as on the pipeline.
+    """
+
+    def __init__(self, model, cache):
+        """
+        Initialize the model.
+
+        Args:
+            model (estimator): Unfitted model
+            cache (FoldCache): Shared preprocessing cache
+        """
+        self.model = model
+        self.cache = cache
+
+    def fit(self, X, y):
+        """
+        Fit the model on the encoded training rows.
+
+        Args:
+            X (np.ndarray): Row positions, shape (n_rows, 1)
+            y (pd.Series): Target variable
+
+        Returns:
+            CachedPreprocessingModel: The fitted model
+        """
+        self.fold_key_, encoded = self.cache.fit_transform(X[:, 0])
+        self.model_ = clone(self.model).fit(encoded, y)
+        return self
+
+    def predict(self, X):
+        """
+        Predict the encoded rows.
+
+        Args:
+            X (np.ndarray): Row positions, shape (n_rows, 1)
+
+        Returns:
+            np.ndarray: Predictions
+        """
+        return self.model_.predict(self.cache.transform(self.fold_key_, X[:, 0]))
@@ -0,0 +1,209 @@
+"""
+Memory-mapped model artifacts for the Trade AI platform.
+A model artifact is a directory holding the model's metadata as JSON, its
+fitted preprocessor, and, for forest models, the compiled node arrays as
+uncompressed .npy files. Serving processes memory-map the node arrays, so
+they load in milliseconds and every worker shares one page-cached copy.
+The compiled preprocessor is saved as JSON too, so a forest model can be
+loaded for serving without unpickling (or importing) sklearn.
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+
+from utils.compiled_forest import CompiledForest, ARRAYS
+from utils.compiled_preprocessor import CompiledPreprocessor
+
+# Format version written to the artifact metadata
+ARTIFACT_VERSION = 1
+
+# File suffix of model artifacts (directories)
+ARTIFACT_SUFFIX = '.model'
+
+METADATA_FILE = 'metadata.json'
+PREPROCESSOR_FILE = 'preprocessor.joblib'
+COMPILED_PREPROCESSOR_FILE = 'preprocessor.json'
+ESTIMATOR_FILE = 'estimator.joblib'
+PIPELINE_FILE = 'pipeline.joblib'
+FOREST_DIR = 'forest'
+
+
+def is_artifact(path):
+    """Whether a path is a model artifact"""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, METADATA_FILE))
+
+
+def read_metadata(path):
+    """
+    Read an artifact's metadata without loading the model.
+
+    Args:
+        path (str): Artifact directory
+
+    Returns:
+        dict: Metadata
+    """
+    with open(os.path.join(path, METADATA_FILE), 'r') as f:
+        return json.load(f)
+
+
+def write_artifact(path, metadata, pipeline, compiled_forest=None, compiled_preprocessor=None):
+    """
+    Write a model artifact.
+
+    The artifact is written to a temporary directory and renamed into place,
+    so readers never see a partly written artifact.
+
+    Args:
+        path (str): Artifact directory
+        metadata (dict): JSON-serializable model metadata
+        pipeline (Pipeline): Fitted preprocessor + model pipeline, kept for
+            retraining; serving loads only the preprocessor and estimator
+        compiled_forest (CompiledForest): Compiled forest of the pipeline's
+            model, saved as memory-mappable node arrays instead of pickling
+            the estimator
+        compiled_preprocessor (CompiledPreprocessor): Compiled form of the
+            pipeline's preprocessor, saved as JSON for serving
+    """
+    import joblib
+
+    temp_path = f"{path}.tmp"
+    shutil.rmtree(temp_path, ignore_errors=True)
+    os.makedirs(temp_path)
+
+    joblib.dump(pipeline.named_steps['preprocessor'], os.path.join(temp_path, PREPROCESSOR_FILE))
+    joblib.dump(pipeline, os.path.join(temp_path, PIPELINE_FILE))
+
+    metadata = dict(metadata, artifact_version=ARTIFACT_VERSION)
+    if compiled_forest is not None:
+        os.makedirs(os.path.join(temp_path, FOREST_DIR))
+        for name in ARRAYS:
+            np.save(os.path.join(temp_path, FOREST_DIR, f"{name}.npy"),
+                    np.ascontiguousarray(getattr(compiled_forest, name)))
+        metadata['estimator'] = {
+            'format': 'compiled_forest',
+            'depth': compiled_forest.depth,
+            'n_features': compiled_forest.n_features
+        }
+    else:
+        joblib.dump(pipeline.named_steps['model'], os.path.join(temp_path, ESTIMATOR_FILE))
+        metadata['estimator'] = {'format': 'joblib'}
+
+    if compiled_preprocessor is not None:
+        with open(os.path.join(temp_path, COMPILED_PREPROCESSOR_FILE), 'w') as f:
+            json.dump(compiled_preprocessor.state(), f)
+
+    # Metadata last: an artifact directory is complete once it has metadata
+    with open(os.path.join(temp_path, METADATA_FILE), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    old_path = f"{path}.old"
+    if os.path.exists(path):
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.rename(path, old_path)
+    os.rename(temp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def read_artifact(path, mmap=True, backend='auto', serve_only=False):
+    """
+    Load a model artifact for serving.
+
+    Args:
+        path (str): Artifact directory
+        mmap (bool): Memory-map the forest node arrays (read-only) instead
+            of reading them into private memory
+        backend (str): Inference backend of a compiled forest
+        serve_only (bool): Return the compiled preprocessor instead of the
+            sklearn one when the artifact has it (see read_preprocessor)
+
+    Returns:
+        tuple: (metadata, preprocessor, estimator); the estimator is a
+            CompiledForest for forest models, and with serve_only the
+            preprocessor may be a CompiledPreprocessor
+    """
+    metadata = read_metadata(path)
+    if metadata.get('artifact_version', 0) > ARTIFACT_VERSION:
+        raise ValueError(f"Unsupported model artifact version: {metadata.get('artifact_version')}")
+
+    compiled_path = os.path.join(path, COMPILED_PREPROCESSOR_FILE)
+    if serve_only and os.path.exists(compiled_path):
+        with open(compiled_path, 'r') as f:
+            preprocessor = CompiledPreprocessor.from_state(json.load(f))
+    else:
+        preprocessor = read_preprocessor(path)
+
+    estimator_info = metadata['estimator']
+    if estimator_info['format'] == 'compiled_forest':
+        arrays = {
+            name: np.load(os.path.join(path, FOREST_DIR, f"{name}.npy"), mmap_mode='r' if mmap else None)
+            for name in ARRAYS
+        }
+        estimator = CompiledForest.from_arrays(
+            arrays, estimator_info['depth'], estimator_info['n_features'], backend=backend
+        )
+    else:
+        import joblib
+
+        estimator = joblib.load(os.path.join(path, ESTIMATOR_FILE))
+
+    return metadata, preprocessor, estimator
+
+
+def serving_size(path, serve_only=False):
+    """
+    Bytes of the files read_artifact loads.
+
+    The pickled training pipeline (read by read_pipeline only) is not
+    counted, and only the preprocessor serving reads: the compiled one with
+    serve_only when the artifact has it, the sklearn one otherwise.
+
+    Args:
+        path (str): Artifact directory
+        serve_only (bool): As passed to read_artifact
+
+    Returns:
+        int: Size in bytes
+    """
+    skipped = {PIPELINE_FILE}
+    if serve_only and os.path.exists(os.path.join(path, COMPILED_PREPROCESSOR_FILE)):
+        skipped.add(PREPROCESSOR_FILE)
+    else:
+        skipped.add(COMPILED_PREPROCESSOR_FILE)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+        if os.path.relpath(os.path.join(root, name), path) not in skipped
+    )
+
+
+def read_preprocessor(path):
+    """
+    Load the fitted sklearn preprocessor of an artifact.
+
+    Args:
+        path (str): Artifact directory
+
+    Returns:
+        ColumnTransformer: Fitted preprocessor
+    """
+    import joblib
+
+    return joblib.load(os.path.join(path, PREPROCESSOR_FILE))
+
+
+def read_pipeline(path):
+    """
+    Load the full sklearn pipeline of an artifact (e.g. to retrain from it).
+
+    Args:
+        path (str): Artifact directory
+
+    Returns:
+        Pipeline: Fitted preprocessor + model pipeline
+    """
+    import joblib
+
+    return joblib.load(os.path.join(path, PIPELINE_FILE))
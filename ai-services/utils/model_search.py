@@ -0,0 +1,191 @@
+"""
+Hyperparameter search for the prediction model of the Trade AI platform.
+Searches the model's parameters with an exhaustive grid, successive halving,
+or a random search that stops early, over the same seeded folds. The data
+is preprocessed once per fold, so candidates only fit the model.
+"""
+
+import numpy as np
+
+# Search strategies of HyperparameterSearch
+SEARCH_STRATEGIES = ('grid', 'halving', 'random')
+
+# Strategy used by TradeAIPredictionModel.train(optimize=True)
+DEFAULT_SEARCH = 'halving'
+
+# Resources of successive halving: trees (or boosting stages) per model, or
+# training samples per fit
+HALVING_RESOURCES = ('n_estimators', 'n_samples')
+
+SCORING = 'neg_mean_squared_error'
+
+
+class HyperparameterSearch:
+    """
+    Cross-validated search of a pipeline's parameters.
+
+    Strategies:
+        grid: every combination of the grid on every fold (GridSearchCV).
+        halving: successive halving (HalvingGridSearchCV). Every combination
+            is first fitted with a small resource (a few trees, or a sample
+            of the rows); the best 1/factor of the candidates go on to the
+            next round with factor times the resource, until the full
+            resource. With n_estimators as the resource, n_estimators is
+            taken out of the grid and the final model gets the largest
+            value.
+        random: up to n_iter combinations sampled from the grid, stopping
+            once `patience` candidates in a row do not improve the best
+            score.
+
+    All strategies use the same shuffled folds and seeds, so runs are
+    reproducible and scores comparable. None of the searched parameters
+    touch the preprocessor, so it is fitted once per fold, on the fold's
+    training rows, and every candidate is fitted and scored on the fold's
+    cached dense float32 matrices (utils/fold_cache.py) instead of
+    re-scaling and re-encoding per fit. The pipeline with the best
+    parameters is then refitted on all data.
+
+    After fit: best_estimator_, best_params_, best_score_ (mean negative
+    MSE across folds, at the final resource for halving), n_candidates_,
+    n_fits_ and preprocessor_fits_.
+    """
+
+    def __init__(self, pipeline, param_grid, strategy=DEFAULT_SEARCH, cv=5, random_state=42,
+                 n_jobs=-1, resource='n_estimators', factor=3, n_iter=30, patience=8):
+        """
+        Initialize the search.
+
+        Args:
+            pipeline (Pipeline): Unfitted pipeline of a "preprocessor" and a
+                "model" step
+            param_grid (dict): Parameter name ("model__<parameter>") to its
+                candidate values
+            strategy (str): "grid", "halving" or "random"
+            cv (int): Number of folds
+            random_state (int): Seed of the folds, halving subsamples and
+                random sampling
+            n_jobs (int): Parallel fits (-1 for one per CPU core)
+            resource (str): Resource of successive halving, "n_estimators"
+                or "n_samples"
+            factor (int): Candidates kept (1/factor) and resource growth per
+                halving round
+            n_iter (int): Most candidates of the random search
+            patience (int): Candidates without improvement after which the
+                random search stops
+        """
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {strategy}")
+        if resource not in HALVING_RESOURCES:
+            raise ValueError(f"Unknown halving resource: {resource}")
+        self.pipeline = pipeline
+        self.param_grid = dict(param_grid)
+        self.strategy = strategy
+        self.cv = cv
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.resource = resource
+        self.factor = factor
+        self.n_iter = n_iter
+        self.patience = patience
+
+    def fit(self, X, y):
+        """
+        Search the parameters and refit the best on all data.
+
+        Args:
+            X (pd.DataFrame): Features dataframe
+            y (pd.Series): Target variable
+
+        Returns:
+            HyperparameterSearch: The fitted search
+        """
+        from sklearn.base import clone
+        from sklearn.model_selection import KFold
+        from utils.fold_cache import FoldCache, CachedPreprocessingModel, row_positions
+
+        folds = KFold(n_splits=self.cv, shuffle=True, random_state=self.random_state)
+        rows = row_positions(len(X))
+        cache = FoldCache(self.pipeline.named_steps['preprocessor'], X)
+        cache.prepare(folds.split(rows))
+        model = CachedPreprocessingModel(clone(self.pipeline.named_steps['model']), cache)
+
+        search = getattr(self, f"_search_{self.strategy}")
+        best_params, self.best_score_, final_params = search(model, self.param_grid, folds, rows, y)
+        self.preprocessor_fits_ = cache.fits
+
+        self.best_params_ = dict(best_params, **final_params)
+        self.best_estimator_ = clone(self.pipeline).set_params(**self.best_params_)
+        self.best_estimator_.fit(X, y)
+        return self
+
+    def _search_grid(self, model, param_grid, folds, X, y):
+        """Exhaustive grid search"""
+        from sklearn.model_selection import GridSearchCV
+
+        search = GridSearchCV(model, param_grid, cv=folds, scoring=SCORING,
+                              n_jobs=self.n_jobs, refit=False)
+        search.fit(X, y)
+        self.n_candidates_ = len(search.cv_results_['params'])
+        self.n_fits_ = self.n_candidates_ * self.cv
+        return search.best_params_, search.best_score_, {}
+
+    def _search_halving(self, model, param_grid, folds, X, y):
+        """Successive halving over the grid"""
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingGridSearchCV
+
+        param_grid = dict(param_grid)
+        final_params = {}
+        if self.resource == 'n_estimators':
+            # Trees are the resource: rounds fit factor times more trees,
+            # ending at the largest n_estimators of the grid
+            max_resources = max(param_grid.pop('model__n_estimators', [model.model.n_estimators]))
+            rounds = max(1, int(np.ceil(np.log(self._n_combinations(param_grid)) / np.log(self.factor))))
+            search = HalvingGridSearchCV(
+                model, param_grid, factor=self.factor, resource='model__n_estimators',
+                max_resources=max_resources,
+                min_resources=max(1, max_resources // self.factor ** (rounds - 1)),
+                cv=folds, scoring=SCORING, refit=False, random_state=self.random_state,
+                n_jobs=self.n_jobs
+            )
+            final_params['model__n_estimators'] = max_resources
+        else:
+            search = HalvingGridSearchCV(
+                model, param_grid, factor=self.factor, resource='n_samples',
+                cv=folds, scoring=SCORING, refit=False, random_state=self.random_state,
+                n_jobs=self.n_jobs
+            )
+        search.fit(X, y)
+        self.n_candidates_ = int(search.n_candidates_[0])
+        self.n_fits_ = int(sum(search.n_candidates_)) * self.cv
+        best_params = {k: v for k, v in search.best_params_.items() if k not in final_params}
+        return best_params, search.best_score_, final_params
+
+    def _search_random(self, model, param_grid, folds, X, y):
+        """Random search with early stopping"""
+        from sklearn.base import clone
+        from sklearn.model_selection import ParameterSampler, cross_val_score
+
+        n_iter = min(self.n_iter, self._n_combinations(param_grid))
+        sampler = ParameterSampler(param_grid, n_iter, random_state=self.random_state)
+        best_params, best_score = None, -np.inf
+        without_improvement = 0
+        self.n_candidates_ = 0
+        for params in sampler:
+            scores = cross_val_score(clone(model).set_params(**params), X, y, cv=folds,
+                                     scoring=SCORING, n_jobs=self.n_jobs)
+            self.n_candidates_ += 1
+            if scores.mean() > best_score:
+                best_params, best_score = params, scores.mean()
+                without_improvement = 0
+            else:
+                without_improvement += 1
+                if without_improvement >= self.patience:
+                    break
+        self.n_fits_ = self.n_candidates_ * self.cv
+        return best_params, best_score, {}
+
+    @staticmethod
+    def _n_combinations(param_grid):
+        """Number of combinations of a grid"""
+        return int(np.prod([len(values) for values in param_grid.values()]))
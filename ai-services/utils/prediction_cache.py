@@ -0,0 +1,125 @@
+"""
+Prediction cache for the Trade AI prediction service.
+Keeps model outputs keyed on the encoded model input, so repeated requests
+for the same product and promotion skip model evaluation; fields that only
+enter the lift/ROI arithmetic (promo cost, margin, product name) are not
+part of the model input and do not affect the key.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of predictions with a time to live.
+
+    Keys are the bytes of an encoded model input row (the normalized feature
+    vector: defaults applied, numeric features scaled, categorical features
+    one-hot encoded) together with the ID of the model that scored it, so
+    several models (e.g. routed per category) can share the cache. The
+    service invalidates it when a new model is activated.
+    """
+
+    def __init__(self, max_size=10000, ttl=300.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size (int): Most predictions kept; 0 disables the cache
+            ttl (float): Seconds a prediction is kept; 0 or None for no expiry
+        """
+        self.max_size = max(0, max_size)
+        self.ttl = ttl or None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def predict(self, model_id, X, predict_function):
+        """
+        Predictions of encoded rows, evaluating the model only for rows not
+        in the cache.
+
+        Args:
+            model_id (str): ID of the model that predict_function evaluates
+            X (np.ndarray): Encoded model input, one row per prediction
+            predict_function (callable): Model predictions of encoded rows
+
+        Returns:
+            np.ndarray: Predictions, one per row
+        """
+        if not self.max_size:
+            return np.asarray(predict_function(X), dtype=np.float64)
+
+        X = np.ascontiguousarray(X)
+        keys = [(model_id, row.tobytes()) for row in X]
+        predictions = np.empty(len(keys), dtype=np.float64)
+        now = time.monotonic()
+
+        # Look up under the lock; rows with the same key are evaluated once
+        missing = {}
+        with self._lock:
+            generation = self._generation
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and (entry[1] is None or entry[1] > now):
+                    self._entries.move_to_end(key)
+                    predictions[i] = entry[0]
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+                    self.misses += 1
+
+        if missing:
+            first_rows = [rows[0] for rows in missing.values()]
+            scored = np.asarray(predict_function(X[first_rows]), dtype=np.float64)
+            expires = now + self.ttl if self.ttl else None
+            with self._lock:
+                # Predictions made across an invalidation are not kept
+                store = generation == self._generation
+                for (key, rows), prediction in zip(missing.items(), scored):
+                    predictions[rows] = prediction
+                    if store:
+                        self._entries[key] = (prediction, expires)
+                        self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        return predictions
+
+    def invalidate(self):
+        """Drop every cached prediction"""
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        """
+        Cache statistics.
+
+        Returns:
+            dict: size, hits, misses, hit rate, evictions and invalidations
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.max_size > 0,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl or 0,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
@@ -0,0 +1,171 @@
+"""
+Product catalog lookup for the Trade AI platform.
+Compiles the product catalog into an indexed table whose attributes are
+attached to records by integer product code.
+"""
+
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+
+from utils.categorical import lookup_codes
+
+# Compiled catalogs by file path: (mtime_ns, size, sha256, catalog, table)
+_catalog_cache = {}
+_catalog_lock = threading.Lock()
+
+
+def iter_catalog_products(catalog):
+    """
+    Iterate over the products of a catalog as (name, entry) pairs.
+
+    Two catalog shapes are supported: a list of entries keyed by
+    "product_name", and a mapping of product groups to lists of entries keyed
+    by "name", e.g. {"Beverages": [{"name": ..., "category": ...}]}. In the
+    grouped shape the group name is the category of entries without one.
+
+    Args:
+        catalog (list or dict): Parsed product catalog
+
+    Yields:
+        tuple: (product name, entry dict)
+    """
+    if isinstance(catalog, dict):
+        groups = catalog.items()
+    else:
+        groups = [(None, catalog)]
+
+    for group, entries in groups:
+        for entry in entries:
+            name = entry.get('product_name', entry.get('name'))
+            if name is None:
+                continue
+            if group is not None and 'category' not in entry:
+                entry = dict(entry, category=group)
+            yield name, entry
+
+
+class ProductTable:
+    """
+    Product attributes indexed by product name.
+
+    Attributes are held as arrays aligned with a product index, so they can
+    be attached to any number of records with one integer take per column.
+    """
+
+    def __init__(self, catalog):
+        """
+        Compile a product catalog.
+
+        Later entries for the same product replace earlier ones.
+
+        Args:
+            catalog (list or dict): Parsed product catalog
+        """
+        products = {}
+        for name, entry in iter_catalog_products(catalog):
+            products[name] = (
+                entry.get('category', 'Unknown'),
+                entry.get('base_price', 0),
+                entry.get('margin_percentage', 0)
+            )
+
+        self.index = pd.Index(list(products), dtype=object)
+        categories, base_prices, margins = zip(*products.values()) if products else ((), (), ())
+        self.columns = {
+            'product_category': pd.Categorical(categories),
+            'base_price': np.array(base_prices, dtype=np.float64),
+            'margin_percentage': np.array(margins, dtype=np.float64)
+        }
+
+        # Columns with a trailing missing value, which code -1 selects;
+        # categoricals are looked up by their codes
+        self._lookup = {
+            name: np.append(values.codes, -1) if isinstance(values, pd.Categorical)
+            else np.append(values, np.nan)
+            for name, values in self.columns.items()
+        }
+
+    def codes(self, product_names):
+        """
+        Look up the product code of each record.
+
+        Distinct names are looked up once; for categorical input that is one
+        lookup per category.
+
+        Args:
+            product_names (pd.Series): Product name of each record
+
+        Returns:
+            np.ndarray: Product codes, -1 for products not in the catalog
+        """
+        return lookup_codes(product_names, self.index)
+
+    def take(self, codes):
+        """
+        Product attributes of the given product codes.
+
+        Args:
+            codes (np.ndarray): Product codes, -1 for unknown products
+
+        Returns:
+            dict: Column name to array (categorical for product_category),
+                missing values for unknown products
+        """
+        columns = {}
+        for name, values in self._lookup.items():
+            column = self.columns[name]
+            if isinstance(column, pd.Categorical):
+                columns[name] = pd.Categorical.from_codes(values[codes], dtype=column.dtype)
+            else:
+                columns[name] = values[codes]
+        return columns
+
+    def frame(self):
+        """
+        The table as a dataframe.
+
+        Returns:
+            pd.DataFrame: One row per product with product_name,
+                product_category, base_price and margin_percentage
+        """
+        return pd.DataFrame({'product_name': self.index.to_numpy(), **self.columns})
+
+
+def load_catalog(catalog_path):
+    """
+    Load and compile a product catalog file, reusing the compiled table
+    while the file is unchanged.
+
+    The file is re-read when its modification time or size changes, and
+    recompiled only when its content hash changes too.
+
+    Args:
+        catalog_path (str): Path to product_catalog.json
+
+    Returns:
+        tuple: (parsed catalog, ProductTable)
+    """
+    path = os.path.abspath(catalog_path)
+    stat = os.stat(path)
+
+    with _catalog_lock:
+        cached = _catalog_cache.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[3], cached[4]
+
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+
+        if cached is not None and cached[2] == digest:
+            catalog, table = cached[3], cached[4]
+        else:
+            catalog = json.loads(content)
+            table = ProductTable(catalog)
+
+        _catalog_cache[path] = (stat.st_mtime_ns, stat.st_size, digest, catalog, table)
+        return catalog, table
@@ -0,0 +1,150 @@
+"""
+NumPy arrays in shared memory for the Trade AI platform.
+Lets worker processes read inputs and write results in place instead of
+pickling arrays between processes.
+"""
+
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+import numpy as np
+
+
+class SharedArrays:
+    """
+    Owner of a set of shared memory blocks, each holding one array.
+
+    Arrays are described to workers by handles (block name, shape, dtype),
+    which are cheap to pickle. The blocks are released when the owner is
+    closed, so results must be copied out before that.
+    """
+
+    def __init__(self):
+        self._blocks = []
+
+    def empty(self, shape, dtype=np.float64):
+        """
+        Allocate an uninitialized shared array.
+
+        Args:
+            shape (int or tuple): Array shape
+            dtype (np.dtype): Array dtype
+
+        Returns:
+            tuple: (handle, array)
+        """
+        dtype = np.dtype(dtype)
+        shape = (shape,) if np.isscalar(shape) else tuple(shape)
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        block = shared_memory.SharedMemory(create=True, size=size)
+        self._blocks.append(block)
+        return (block.name, shape, dtype.str), np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    def share(self, array):
+        """
+        Copy an array into shared memory.
+
+        Args:
+            array (np.ndarray): Array to share
+
+        Returns:
+            tuple: Handle of the shared copy
+
+        Raises:
+            TypeError: If the array has object dtype
+        """
+        array = np.asarray(array)
+        if array.dtype == object:
+            raise TypeError("Object arrays hold pointers into the owner's memory "
+                            "and cannot be shared; share their values as codes")
+        handle, shared = self.empty(array.shape, array.dtype)
+        shared[...] = array
+        return handle
+
+    def close(self):
+        """Release all blocks"""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@contextmanager
+def attach(handles):
+    """
+    Open shared arrays in a worker process.
+
+    The arrays are only valid inside the with block, and views of them must
+    not be kept beyond it.
+
+    Args:
+        handles (list): Handles returned by SharedArrays.empty/share
+
+    Yields:
+        list: Arrays, in the order of the handles
+    """
+    blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in handles]
+    arrays = [np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+              for block, (_, shape, dtype) in zip(blocks, handles)]
+    try:
+        yield arrays
+    finally:
+        arrays.clear()
+        for block in blocks:
+            block.close()
+
+
+def share_frame(shared, df):
+    """
+    Copy a dataframe's columns into shared memory.
+
+    Categorical, string and object columns are shared as integer codes, with
+    their categories in the description.
+
+    Args:
+        shared (SharedArrays): Owner of the blocks
+        df (pd.DataFrame): Dataframe of numeric, categorical or string columns
+
+    Returns:
+        list: Description of the columns for read_frame, cheap to pickle
+    """
+    import pandas as pd
+
+    columns = []
+    for name in df.columns:
+        column = df[name]
+        if not isinstance(column.dtype, pd.CategoricalDtype) and (
+                pd.api.types.is_string_dtype(column) or column.dtype == object):
+            column = column.astype('category')
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            columns.append((name, shared.share(column.cat.codes.to_numpy()),
+                            column.cat.categories.tolist()))
+        else:
+            columns.append((name, shared.share(column.to_numpy()), None))
+    return columns
+
+
+def read_frame(columns):
+    """
+    Copy a dataframe shared with share_frame out of shared memory.
+
+    Args:
+        columns (list): Description returned by share_frame
+
+    Returns:
+        pd.DataFrame: The dataframe, with categorical columns as categoricals
+    """
+    import pandas as pd
+
+    with attach([handle for _, handle, _ in columns]) as arrays:
+        data = {
+            name: (pd.Categorical.from_codes(array.copy(), categories) if categories is not None
+                   else array.copy())
+            for (name, _, categories), array in zip(columns, arrays)
+        }
+    return pd.DataFrame(data)